@@ -0,0 +1,174 @@
+"""
+Benchmark of CleanLandingPage.process_data against the previous iterrows loop
+and Series.apply landing page cleaning.
+Usage: python benchmarks/clean_landing_page_benchmark.py --rows 10000
+Both are timed on the same rows with a cold parse cache and their outputs are compared.
+The loop filters the dataframes for every row, so its time grows with rows * rows.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import pandas as pd
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+from data_transform.clean_landing_page import CleanLandingPage
+from data_transform.landing_page_parse_cache import LandingPageParseCache
+# pylint: enable=wrong-import-position
+
+SACOMMUNITY_URL = "https://sacommunity.org"
+LANDING_PAGE_SUFFIXES = ["", "", "", "?fbclid=IwAR05WAQ", "?_x_tr_sl=en&_x_tr_tl=th", "?back=x"]
+
+
+def get_landing_page_df(rows: int, organisations: int, seed: int = 1) -> pd.DataFrame:
+    """landing pages of google analytics, organisations are repeated"""
+    random_generator = random.Random(seed)
+    landing_pages = []
+    for _ in range(rows):
+        org_id = random_generator.randint(1, organisations)
+        if random_generator.random() < 0.05:
+            landing_pages.append("/search")
+        else:
+            suffix = random_generator.choice(LANDING_PAGE_SUFFIXES)
+            landing_pages.append(f"/org/{org_id}-Organisation_{org_id}{suffix}")
+    return pd.DataFrame(
+        {
+            "landingPage": landing_pages,
+            "sessions": [random_generator.randint(1, 100) for _ in range(rows)],
+        }
+    )
+
+
+def get_sa_community_df(organisations: int) -> pd.DataFrame:
+    """sa community export with every second organisation"""
+    org_ids = list(range(1, organisations + 1, 2))
+    return pd.DataFrame(
+        {"ID_19": org_ids, "Org_name": [f"Organisation {i}" for i in org_ids]}
+    )
+
+
+def clean_landing_page_text(sacommunity_url: str, text: str) -> str:
+    """previous implementation of clean_landing_page_text"""
+    if "/search?q=cache:" in text:
+        text = text[text.index(sacommunity_url) :].replace(sacommunity_url, "")
+
+    for suffix_to_remove in ["?fbclid=", "+&", "?_x_tr_", "?back="]:
+        if suffix_to_remove in text:
+            text = text[: text.index(suffix_to_remove)]
+
+    return text.replace("_", " ").replace("/org/", "").strip()
+
+
+def get_sessions_by_organization_with_apply(
+    clean_landing_page: CleanLandingPage,
+    df_ga_orig: pd.DataFrame,
+    landing_page_column_name: str = "landingPage",
+) -> pd.DataFrame:
+    """previous implementation of get_sessions_by_organization"""
+    df_ga = df_ga_orig.dropna().copy()
+    df_ga["organization_id_name"] = df_ga[landing_page_column_name].apply(
+        lambda text: clean_landing_page_text(clean_landing_page.sacommunity_url, text)
+    )
+    df_ga["organization_id"] = df_ga["organization_id_name"].apply(
+        clean_landing_page.get_organization_id
+    )
+    df_ga["organization_name"] = df_ga["organization_id_name"].apply(
+        clean_landing_page.get_organization_name
+    )
+    return df_ga
+
+
+def process_data_with_loop(
+    clean_landing_page: CleanLandingPage,
+    landing_page_df,
+    sa_community_df,
+    landing_page_column_name="landingPage",
+) -> pd.DataFrame:
+    """previous implementation of process_data"""
+    sessions_data_df = get_sessions_by_organization_with_apply(
+        clean_landing_page, landing_page_df
+    )
+    results = []
+    for _, row in sessions_data_df.iterrows():
+        org_id = row["organization_id"]
+        if pd.isna(org_id):
+            continue
+        org_id = int(org_id)
+
+        org_names_sa_community = sa_community_df[sa_community_df["ID_19"] == org_id][
+            "Org_name"
+        ].values
+        org_names_google = sessions_data_df[
+            sessions_data_df["organization_id"] == org_id
+        ]["organization_name"].values
+        landing_page = (
+            clean_landing_page.sacommunity_url
+            + sessions_data_df[sessions_data_df["organization_id"] == org_id][
+                landing_page_column_name
+            ].values[0]
+        )
+        result = {
+            "org_id": org_id,
+            "landing_page": landing_page,
+            "sessions_count": row["sessions"],
+            "organization_name_sa_community": ""
+            if len(org_names_sa_community) == 0
+            else org_names_sa_community[0],
+            "organization_name_google": ""
+            if len(org_names_google) == 0
+            else org_names_google[0],
+            "is_record_available_in_sacommunity_db": len(org_names_sa_community) > 0,
+        }
+        for col in sessions_data_df.columns:
+            if col not in result:
+                result[col] = row[col]
+        results.append(result)
+
+    return pd.DataFrame(results)
+
+
+def get_clean_landing_page() -> CleanLandingPage:
+    """clean landing page with an empty parse cache"""
+    return CleanLandingPage(
+        sacommunity_url=SACOMMUNITY_URL, parse_cache=LandingPageParseCache()
+    )
+
+
+def measure(function, *args):
+    """returns result and elapsed seconds"""
+    start_time = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start_time
+
+
+def main():
+    """run benchmark"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--organisations", type=int, default=20000)
+    args = parser.parse_args()
+
+    sa_community_df = get_sa_community_df(args.organisations)
+    landing_page_df = get_landing_page_df(args.rows, args.organisations)
+
+    legacy_df, legacy_seconds = measure(
+        process_data_with_loop, get_clean_landing_page(), landing_page_df, sa_community_df
+    )
+    clean_landing_page = get_clean_landing_page()
+    results_df, seconds = measure(
+        clean_landing_page.process_data, landing_page_df, sa_community_df
+    )
+    pd.testing.assert_frame_equal(results_df, legacy_df, check_dtype=False)
+    print(f"parse cache: {clean_landing_page.get_parse_cache().get_stats()}")
+    print(
+        f"{args.rows} rows: loop {legacy_seconds:.2f} seconds, "
+        f"process_data {seconds:.3f} seconds, {legacy_seconds / seconds:.0f}x faster"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark of saving and reading run files as csv, parquet and feather.
+Usage: python benchmarks/run_file_storage_benchmark.py --rows 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+from helpers.enums import DataModule, StorageFormat
+from helpers.file_helper import FileHelper
+from helpers.pandas_helper import PandasHelper
+# pylint: enable=wrong-import-position
+
+
+def get_landing_page_df(rows: int, seed: int = 1) -> pd.DataFrame:
+    """sessions of landing pages of google analytics"""
+    random_generator = np.random.default_rng(seed)
+    org_ids = random_generator.integers(1, 20000, rows)
+    dates = pd.Timestamp(2024, 1, 1) + pd.to_timedelta(
+        random_generator.integers(0, 365, rows), unit="D")
+    return PandasHelper().apply_schema(pd.DataFrame({
+        "customEvent:DatasetID": [f"0QK91R{i}" for i in random_generator.integers(1, 70, rows)],
+        "landingPage": [f"/org/{i}-Organisation_{i}" for i in org_ids],
+        "sessions": random_generator.integers(1, 100, rows),
+        "start_date": dates,
+        "end_date": dates,
+    }), DataModule.LANDING_PAGE)
+
+
+def main():
+    """run benchmark"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+
+    file_helper = FileHelper()
+    pandas_helper = PandasHelper()
+    landing_page_df = get_landing_page_df(args.rows)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for storage_format in StorageFormat:
+            file_path = os.path.join(temp_dir,
+                                     f"landing_page{file_helper.get_extension(storage_format)}")
+            start_time = time.perf_counter()
+            file_helper.save_df(landing_page_df, file_path)
+            write_time = time.perf_counter() - start_time
+
+            start_time = time.perf_counter()
+            data_df = pandas_helper.apply_schema(file_helper.read_df(file_path),
+                                                 DataModule.LANDING_PAGE)
+            read_time = time.perf_counter() - start_time
+            pd.testing.assert_frame_equal(data_df, landing_page_df)
+
+            start_time = time.perf_counter()
+            file_helper.read_df(file_path, columns=["sessions"],
+                                filters=[("customEvent:DatasetID", "==", "0QK91R12")])
+            filtered_read_time = time.perf_counter() - start_time
+
+            print(f"{storage_format.name}: write {write_time:.2f}s, read {read_time:.2f}s, "
+                  f"filtered read {filtered_read_time:.2f}s, "
+                  f"size {os.path.getsize(file_path) / 1024 / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
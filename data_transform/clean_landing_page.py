@@ -1,16 +1,35 @@
 """clean landing page"""
 
-import math
+import re
+import numpy as np
 import pandas as pd
 
+from data_transform.landing_page_parse_cache import LandingPageParseCache
+from helpers.cu_export_store import CuExportStore
 from helpers.settings_helper import SettingsHelper
 
+SEARCH_CACHE_IDENTIFIER = "/search?q=cache:"
+# landing page is truncated at the first of these suffixes
+LANDING_PAGE_SUFFIXES_PATTERN = re.compile(r"\?fbclid=|\+&|\?_x_tr_|\?back=")
+
 
 class CleanLandingPage:
     """cleans the landing page"""
 
-    def __init__(self) -> None:
-        self.sacommunity_url = SettingsHelper().get_sacommunity_url()
+    def __init__(
+        self, sacommunity_url: str = None, parse_cache: LandingPageParseCache = None
+    ) -> None:
+        self.sacommunity_url = sacommunity_url
+        if self.sacommunity_url is None:
+            self.sacommunity_url = SettingsHelper().get_sacommunity_url()
+        # None uses the parse cache shared by the process
+        self.parse_cache = parse_cache
+
+    def get_parse_cache(self) -> LandingPageParseCache:
+        """get parse cache"""
+        if self.parse_cache is None:
+            return LandingPageParseCache.shared()
+        return self.parse_cache
 
     def get_organization_id(self, text: str) -> str:
         """get organization id"""
@@ -26,94 +45,126 @@ class CleanLandingPage:
 
     def clean_landing_page_text(self, text: str) -> str:
         """clean landing page"""
-        search_cache_identifier = "/search?q=cache:"
-        if search_cache_identifier in text:
-            text = text[text.index(self.sacommunity_url) :].replace(
-                self.sacommunity_url, ""
-            )
-
-        suffixes_to_remove = ["?fbclid=", "+&", "?_x_tr_", "?back="]
-        for suffix_to_remove in suffixes_to_remove:
-            if suffix_to_remove in text:
-                text = text[: text.index(suffix_to_remove)]
-
-        # remove underscore
-        text = text.replace("_", " ")
-        # remove /org/
-        text = text.replace("/org/", "")
-
-        return text.strip()
+        return self.get_parse_cache().get_or_parse(
+            self.sacommunity_url, text, self.parse_landing_page
+        )[0]
+
+    def parse_landing_page(self, text: str) -> tuple:
+        """Clean landing page and split it into organization id and name in one pass.
+        Returns (organization_id_name, organization_id, organization_name),
+        organization id is None when it is not a number"""
+        if SEARCH_CACHE_IDENTIFIER in text and self.sacommunity_url in text:
+            text = text[
+                text.index(self.sacommunity_url) + len(self.sacommunity_url) :
+            ].replace(self.sacommunity_url, "")
+
+        suffix_match = LANDING_PAGE_SUFFIXES_PATTERN.search(text)
+        if suffix_match is not None:
+            text = text[: suffix_match.start()]
+
+        organization_id_name = text.replace("_", " ").replace("/org/", "").strip()
+        organization_id, hyphen, organization_name = organization_id_name.partition("-")
+        if not hyphen:
+            return organization_id_name, None, None
+        try:
+            return organization_id_name, int(organization_id), organization_name
+        except ValueError:
+            return organization_id_name, None, organization_name
+
+    def normalise_landing_pages(self, landing_pages: pd.Series) -> pd.DataFrame:
+        """Batch version of clean_landing_page_text, get_organization_id and
+        get_organization_name. Every distinct landing page is parsed once, through the
+        parse cache, and the results are mapped back to the rows.
+        Returns organization_id_name, organization_id (nullable Int64) and
+        organization_name of each landing page"""
+        codes, unique_landing_pages = pd.factorize(landing_pages.astype(str))
+        parsed = self.get_parse_cache().get_or_parse_many(
+            self.sacommunity_url, unique_landing_pages, self.parse_landing_page
+        )
+        organization_id_names = np.array([p[0] for p in parsed], dtype=object)
+        organization_ids = pd.array([p[1] for p in parsed], dtype="Int64")
+        organization_names = np.array([p[2] for p in parsed], dtype=object)
+
+        return pd.DataFrame(
+            {
+                "organization_id_name": organization_id_names[codes],
+                "organization_id": organization_ids.take(codes),
+                "organization_name": organization_names[codes],
+            },
+            index=landing_pages.index,
+        )
 
     def get_sessions_by_organization(
         self, df_ga_orig: pd.DataFrame, landing_page_column_name: str = "landingPage"
     ) -> pd.DataFrame:
         """get sessions by organization"""
         df_ga = df_ga_orig.dropna().copy()
-        df_ga["organization_id_name"] = df_ga[landing_page_column_name].apply(
-            self.clean_landing_page_text
-        )
-        df_ga["organization_id"] = df_ga["organization_id_name"].apply(
-            self.get_organization_id
-        )
-        df_ga["organization_name"] = df_ga["organization_id_name"].apply(
-            self.get_organization_name
-        )
+        normalised_df = self.normalise_landing_pages(df_ga[landing_page_column_name])
+        for col in normalised_df.columns:
+            df_ga[col] = normalised_df[col]
         return df_ga
         # return df_ga[[landing_page_column_name, "organization_id_name", "organization_id",
         #               "organization_name", "sessions"]]
 
     def process_data(
-        self, landing_page_df, sa_community_df, landing_page_column_name="landingPage"
+        self,
+        landing_page_df,
+        sa_community_df,
+        landing_page_column_name="landingPage",
+        cu_export_store: CuExportStore = None,
     ) -> pd.DataFrame:
-        """process data"""
-        sessions_data_df = self.get_sessions_by_organization(landing_page_df)
-        results = []
-        for _, row in sessions_data_df.iterrows():
-            org_id = row["organization_id"]
-            if math.isnan(org_id):
-                print("org id is invalid, so skip it ", org_id)
-                continue
-
-            if org_id is not None:
-                org_id = int(org_id)
-
-            # organization name from sa-community file
-            org_names_sa_community = sa_community_df[
-                sa_community_df["ID_19"] == org_id
-            ]["Org_name"].values
-            organization_name_sa_community = ""
-            is_record_available_in_sacommunity_db = False
-            if len(org_names_sa_community) > 0:
-                organization_name_sa_community = org_names_sa_community[0]
-                is_record_available_in_sacommunity_db = True
-
-            # organization name from google analytics file
-            org_names_google = sessions_data_df[
-                sessions_data_df["organization_id"] == org_id
-            ]["organization_name"].values
-
-            landing_page = (
-                self.sacommunity_url
-                + sessions_data_df[sessions_data_df["organization_id"] == org_id][
-                    landing_page_column_name
-                ].values[0]
-            )
-
-            result = {
-                "org_id": org_id,
-                "landing_page": landing_page,
-                "sessions_count": row["sessions"],
-                "organization_name_sa_community": organization_name_sa_community,
-                "organization_name_google": ""
-                if len(org_names_google) == 0
-                else org_names_google[0],
-                "is_record_available_in_sacommunity_db": is_record_available_in_sacommunity_db,
+        """Process data, a row per landing page with a valid organization id.
+        Organization name in sa community, organization name in google analytics
+        and landing page are taken from the first row of the organization id,
+        looked up by index instead of filtering the dataframes for every row.
+        cu_export_store: organizations are looked up in the indexed store
+        instead of sa_community_df, which can be None"""
+        sessions_data_df = self.get_sessions_by_organization(
+            landing_page_df, landing_page_column_name
+        )
+        if "organization_id" not in sessions_data_df.columns:
+            return pd.DataFrame()
+
+        valid_data_df = sessions_data_df[sessions_data_df["organization_id"].notna()]
+        if len(valid_data_df) == 0:
+            return pd.DataFrame()
+
+        org_ids = valid_data_df["organization_id"].astype("int64")
+
+        # first row of each organization id
+        first_google_rows = valid_data_df.assign(org_id=org_ids).drop_duplicates(
+            "org_id"
+        ).set_index("org_id")
+        if cu_export_store is not None:
+            first_sa_community_rows = cu_export_store.get_organisations_by_id()
+        else:
+            first_sa_community_rows = sa_community_df.drop_duplicates(
+                "ID_19"
+            ).set_index("ID_19")
+        is_record_available_in_sacommunity_db = org_ids.isin(
+            first_sa_community_rows.index
+        )
+        organization_name_sa_community = org_ids.map(
+            first_sa_community_rows["Org_name"]
+        ).where(is_record_available_in_sacommunity_db, "")
+
+        results_df = pd.DataFrame(
+            {
+                "org_id": org_ids.values,
+                "landing_page": self.sacommunity_url
+                + org_ids.map(first_google_rows[landing_page_column_name]).values,
+                "sessions_count": valid_data_df["sessions"].values,
+                "organization_name_sa_community": organization_name_sa_community.values,
+                "organization_name_google": org_ids.map(
+                    first_google_rows["organization_name"]
+                ).values,
+                "is_record_available_in_sacommunity_db": (
+                    is_record_available_in_sacommunity_db.values
+                ),
             }
+        )
+        for col in sessions_data_df.columns:
+            if col not in results_df.columns:
+                results_df[col] = valid_data_df[col].values
 
-            for col in sessions_data_df.columns:
-                if col not in result:
-                    result[col] = row[col]
-
-            results.append(result)
-
-        return pd.DataFrame(results)
+        return results_df
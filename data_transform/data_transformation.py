@@ -1,6 +1,7 @@
 """data transformations"""
 import os
 import pandas as pd
+from helpers.cu_export_store import CuExportStore
 from helpers.settings_helper import SettingsHelper
 
 # google analytics data cleanup
@@ -29,7 +30,8 @@ class GoogleAnalyticsDataProcessing():
     def read_sacommunity_data_gov_au_export(self, file_name: str) -> pd.DataFrame:
         """read SA community data gov au export"""
         full_file_name = os.path.join(self.get_data_folder_path(), file_name)
-        self.sa_community_data_gov_au_export_df = pd.read_csv(full_file_name)
+        self.sa_community_data_gov_au_export_df = CuExportStore.shared(
+            full_file_name).get_data_frame()
         return self.sa_community_data_gov_au_export_df
 
     def save_processed_data(self, data_df: pd.DataFrame, file_name: str):
@@ -0,0 +1,109 @@
+"""Cache of parsed landing pages"""
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from threading import Lock
+
+from helpers.file_helper import FileHelper
+
+
+class LandingPageParseCache:
+    """Least recently used cache of parsed landing pages, shared by the process.
+    The key is (sacommunity url, landing page) and the value is
+    (organization_id_name, organization_id, organization_name).
+    When file_path is set, the cache is loaded from and saved to a json file,
+    so that landing pages are parsed once across runs.
+    """
+
+    _shared_cache = None
+    _shared_cache_lock = Lock()
+
+    def __init__(self, maximum_size: int = 100000, file_path: str = None) -> None:
+        self.maximum_size = maximum_size
+        self.file_path = file_path
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.lock = Lock()
+        self.file_helper = FileHelper()
+        self.log = logging.getLogger(__name__)
+        if file_path is not None and os.path.exists(file_path):
+            self.load()
+
+    @classmethod
+    def shared(cls):
+        """returns the cache shared by the current process"""
+        with cls._shared_cache_lock:
+            if cls._shared_cache is None:
+                cls._shared_cache = cls()
+            return cls._shared_cache
+
+    def get_or_parse(self, sacommunity_url: str, landing_page: str, parser) -> tuple:
+        """parsed landing page from cache, parser is called on cache miss"""
+        return self.get_or_parse_many(sacommunity_url, [landing_page], parser)[0]
+
+    def get_or_parse_many(self, sacommunity_url: str, landing_pages, parser) -> list:
+        """parsed landing pages from cache, parser is called for each cache miss"""
+        results = []
+        with self.lock:
+            for landing_page in landing_pages:
+                key = (sacommunity_url, landing_page)
+                parsed = self.entries.get(key)
+                if parsed is None:
+                    self.stats["misses"] += 1
+                    parsed = parser(landing_page)
+                    self.entries[key] = parsed
+                else:
+                    self.stats["hits"] += 1
+                    self.entries.move_to_end(key)
+                results.append(parsed)
+
+            self.evict_least_recently_used()
+        return results
+
+    def evict_least_recently_used(self):
+        """evict entries above maximum size, must be called within lock"""
+        while len(self.entries) > self.maximum_size:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def load(self):
+        """load cache from json file"""
+        with open(self.file_path, "r", encoding="UTF-8") as file_obj:
+            records = json.load(file_obj)
+        with self.lock:
+            for sacommunity_url, landing_page, *parsed in records:
+                self.entries[(sacommunity_url, landing_page)] = tuple(parsed)
+            self.evict_least_recently_used()
+        self.log.debug("Loaded %s parsed landing pages", len(records))
+
+    def save(self):
+        """save cache to json file atomically"""
+        if self.file_path is None:
+            return
+
+        with self.lock:
+            records = [[*key, *parsed] for key, parsed in self.entries.items()]
+        self.file_helper.create_directory_excluding_filename(self.file_path)
+        temp_file_path = f"{self.file_path}.tmp"
+        with open(temp_file_path, "w", encoding="UTF-8") as file_obj:
+            json.dump(records, file_obj)
+        os.replace(temp_file_path, self.file_path)
+
+    def get_stats(self):
+        """hits, misses, evictions and size of the cache"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self.entries)
+            return stats
+
+    def __getstate__(self):
+        """locks cannot be pickled (eg. joblib workers)"""
+        state = self.__dict__.copy()
+        state["lock"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = Lock()
@@ -0,0 +1,244 @@
+"""
+Weekly, monthly and yearly rollups of the daily google analytics partitions
+"""
+
+import logging
+import os
+from datetime import date, timedelta
+import pandas as pd
+from dtos.date_range_dto import DateRangeDto
+from google_analytics_module.services.google_analytics_extraction_service import (
+    DAILY_DATA_MODULES,
+)
+from helpers.date_helper import DateHelper
+from helpers.enums import DataFrequency, DataModule, JobStatus, StorageFormat
+from helpers.file_helper import FileHelper
+from helpers.metadata_helper import JobConfig, MetadataHelper
+from helpers.pandas_helper import PandasHelper
+from helpers.partition_reader import PartitionReader
+from helpers.settings_helper import SettingsHelper
+
+ROLLUP_DATA_FREQUENCIES = [
+    DataFrequency.WEEKLY,
+    DataFrequency.MONTHLY,
+    DataFrequency.YEARLY,
+]
+# columns of the daily partitions which are not dimensions of the report
+NON_DIMENSION_COLUMNS = ["sessions", "start_date", "end_date"]
+
+
+class RollupMaterialiser:
+    """Sums the sessions of the daily partitions of a data module into a partition per
+    week, month or year data/<frequency>/<module>/YYYY/MM/DD named by the first day
+    of the period, so reports of higher data frequencies need no google analytics request.
+    The last daily day rolled up is recorded in metadata of (data_frequency, module),
+    only the periods of the days extracted since then are computed again, and the earlier
+    periods of which a daily partition was saved after the rollup, eg. a day extracted again.
+    The period in progress has the days extracted so far, end_date is the last of them.
+    Daily partitions are read by the partition reader shared by the process, they are
+    removed from its cache once every data frequency of the data module is rolled up.
+    """
+
+    def __init__(
+        self,
+        metadata_helper: MetadataHelper = None,
+        partition_reader: PartitionReader = None,
+        root_dir: str = None,
+    ) -> None:
+        self.root_dir = root_dir
+        if self.root_dir is None:
+            self.root_dir = SettingsHelper().get_file_storage_root_folder()
+        self.metadata_helper = metadata_helper
+        if self.metadata_helper is None:
+            self.metadata_helper = MetadataHelper()
+        self.partition_reader = partition_reader
+        if self.partition_reader is None:
+            self.partition_reader = PartitionReader.shared(self.root_dir)
+        self.file_helper = FileHelper(StorageFormat.PARQUET)
+        self.date_helper = DateHelper()
+        self.pandas_helper = PandasHelper()
+        self.log = logging.getLogger(__name__)
+
+    def get_last_extracted_day(self, module: DataModule,
+                               first_date: date = date(2021, 1, 1)) -> date | None:
+        """last day of which daily partition is complete, None if no day is extracted"""
+        metadata = self.metadata_helper.load_metadata(
+            DataFrequency.DAILY, module, default_date=first_date
+        )
+        job_status = metadata.job_status.get("value")
+        if job_status == JobStatus.DEFAULT.value:
+            return None
+        if job_status == JobStatus.SUCCESS.value:
+            return metadata.last_data_extraction_date
+        # the day in progress or failed is not complete
+        return metadata.last_data_extraction_date - timedelta(days=1)
+
+    def get_rollup_start_date(self, data_frequency: DataFrequency, module: DataModule,
+                              first_date: date = date(2021, 1, 1)) -> date:
+        """first day not rolled up, from metadata of (data_frequency, module)"""
+        metadata = self.metadata_helper.load_metadata(
+            data_frequency, module, default_date=first_date
+        )
+        return self.metadata_helper.get_start_date(
+            metadata.last_data_extraction_date, metadata.job_status
+        )
+
+    def get_outdated_periods(
+        self,
+        data_frequency: DataFrequency,
+        module: DataModule,
+        last_day: date,
+        first_date: date = date(2021, 1, 1),
+    ) -> list[DateRangeDto]:
+        """periods with days extracted after the last rollup, clipped to last day"""
+        start_date = self.get_rollup_start_date(data_frequency, module, first_date)
+        if start_date > last_day:
+            return []
+
+        period_start = self.date_helper.get_period_start(start_date, data_frequency)
+        return self.date_helper.split_date_range(
+            DateRangeDto(period_start, last_day), data_frequency
+        )
+
+    def is_rollup_outdated(self, data_frequency: DataFrequency, module: DataModule,
+                           period: DateRangeDto) -> bool:
+        """a daily partition of period was saved after the rollup of period"""
+        daily_file_paths = self.partition_reader.get_partition_paths(
+            DataFrequency.DAILY, module, period)
+        if len(daily_file_paths) == 0:
+            return False
+
+        rollup_file_path = self.partition_reader.get_partition_path(
+            data_frequency, module, period.start_date)
+        if not os.path.exists(rollup_file_path):
+            return True
+        rollup_modified_time = os.stat(rollup_file_path).st_mtime_ns
+        return any(os.stat(f).st_mtime_ns > rollup_modified_time for f in daily_file_paths)
+
+    def get_changed_periods(
+        self,
+        data_frequency: DataFrequency,
+        module: DataModule,
+        end_date: date,
+        first_date: date = date(2021, 1, 1),
+    ) -> list[DateRangeDto]:
+        """periods until end date already rolled up, of which daily partitions changed"""
+        start_date = self.date_helper.get_period_start(first_date, data_frequency)
+        if start_date > end_date:
+            return []
+
+        return [
+            period
+            for period in self.date_helper.split_date_range(
+                DateRangeDto(start_date, end_date), data_frequency)
+            if self.is_rollup_outdated(data_frequency, module, period)
+        ]
+
+    def aggregate(self, daily_df: pd.DataFrame, period: DateRangeDto,
+                  module: DataModule) -> pd.DataFrame:
+        """sessions of each combination of dimensions in period, empty with the
+        columns of data module when the days of period have no sessions"""
+        if daily_df.empty or "sessions" not in daily_df.columns:
+            dimensions = [c for c in self.pandas_helper.get_data_module_dtypes(module)
+                          if c not in NON_DIMENSION_COLUMNS]
+            return self.pandas_helper.apply_schema(
+                pd.DataFrame(columns=dimensions + NON_DIMENSION_COLUMNS), module)
+
+        dimensions = [c for c in daily_df.columns if c not in NON_DIMENSION_COLUMNS]
+        rollup_df = (
+            daily_df.groupby(dimensions, observed=True, dropna=False)["sessions"]
+            .sum()
+            .reset_index()
+        )
+        rollup_df["start_date"] = pd.Timestamp(period.start_date)
+        rollup_df["end_date"] = pd.Timestamp(period.end_date)
+        return self.pandas_helper.apply_schema(rollup_df, module)
+
+    def materialise_period(self, data_frequency: DataFrequency, module: DataModule,
+                           period: DateRangeDto) -> str:
+        """save rollup of period, returns the saved file path"""
+        daily_df = self.partition_reader.read(DataFrequency.DAILY, module, period)
+        file_path = self.file_helper.get_data_path(
+            self.root_dir,
+            data_frequency.name.lower(),
+            module.name.lower(),
+            period.start_date,
+        )
+        self.file_helper.save_df(self.aggregate(daily_df, period, module), file_path)
+        return file_path
+
+    def materialise(
+        self,
+        data_frequency: DataFrequency,
+        module: DataModule,
+        first_date: date = date(2021, 1, 1),
+    ) -> list[DateRangeDto]:
+        """rollup the periods of data module with newly extracted days.
+        Returns the materialised periods
+        """
+        if data_frequency not in ROLLUP_DATA_FREQUENCIES:
+            raise ValueError(f"DataFrequency: {data_frequency} is not supported")
+
+        job_config = JobConfig(data_frequency, module)
+        with self.metadata_helper.job_lock(job_config) as is_locked:
+            if not is_locked:
+                self.log.warning("%s %s is being rolled up by another job",
+                                 data_frequency.name, module.name)
+                return []
+
+            last_day = self.get_last_extracted_day(module, first_date)
+            if last_day is None:
+                return []
+
+            periods = self.get_outdated_periods(data_frequency, module, last_day, first_date)
+            # the periods rolled up before the outdated periods are checked for changed days
+            rollup_start_date = periods[0].start_date if periods else \
+                self.get_rollup_start_date(data_frequency, module, first_date)
+            changed_periods = self.get_changed_periods(
+                data_frequency, module, rollup_start_date - timedelta(days=1), first_date)
+            self.log.info("Rolling up %s %s periods of %s, %s periods changed",
+                          len(periods), data_frequency.name, module.name,
+                          len(changed_periods))
+            # the checkpoint is not moved back, a failed period is found changed again
+            for period in changed_periods:
+                self.metadata_helper.renew_job_lock(job_config)
+                self.materialise_period(data_frequency, module, period)
+
+            for period in periods:
+                self.metadata_helper.save_metadata(
+                    job_config, period.start_date, JobStatus.IN_PROGRESS
+                )
+                try:
+                    self.materialise_period(data_frequency, module, period)
+                except Exception as ex:
+                    self.metadata_helper.save_metadata(
+                        job_config, period.start_date, JobStatus.FAILED, failure_reason=str(ex)
+                    )
+                    raise
+                self.metadata_helper.save_metadata(
+                    job_config, period.end_date, JobStatus.SUCCESS
+                )
+
+        return changed_periods + periods
+
+    def materialise_modules(
+        self,
+        modules: list[DataModule] = None,
+        data_frequencies: list[DataFrequency] = None,
+        first_date: date = date(2021, 1, 1),
+    ) -> dict:
+        """rollup every data frequency of every data module.
+        Returns the materialised periods of each (data_frequency, module)
+        """
+        if modules is None:
+            modules = DAILY_DATA_MODULES
+        if data_frequencies is None:
+            data_frequencies = ROLLUP_DATA_FREQUENCIES
+
+        results = {}
+        for module in modules:
+            for data_frequency in data_frequencies:
+                results[(data_frequency, module)] = self.materialise(
+                    data_frequency, module, first_date)
+            self.partition_reader.clear_cache(DataFrequency.DAILY, module)
+        return results
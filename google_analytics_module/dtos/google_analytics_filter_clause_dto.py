@@ -4,6 +4,7 @@ from dtos.page_dto import PageDto
 from helpers.enums import GoogleApiVersion
 
 
+# pylint: disable=too-many-instance-attributes
 class GoogleAnalyticsFilterClause():
     """filter clauses"""
 
@@ -14,6 +15,8 @@ class GoogleAnalyticsFilterClause():
         self.council_name = ''
         self.api_version = GoogleApiVersion.DEFAULT
         self.organisation_id = ""
+        self.organisation_ids: list[str] = []
+        self.landing_page_prefix = ""
 
     def set_dataset_id(self, dataset_id: str):
         """set dataset id"""
@@ -39,6 +42,14 @@ class GoogleAnalyticsFilterClause():
         """Filters by organisation id"""
         self.organisation_id = organisation_id
 
+    def set_organisation_ids(self, organisation_ids: list[str]):
+        """Filters by any of the organisation ids"""
+        self.organisation_ids = organisation_ids
+
+    def set_landing_page_prefix(self, landing_page_prefix: str):
+        """Filters landing pages beginning with the prefix"""
+        self.landing_page_prefix = landing_page_prefix
+
     def to_dict(self):
         """returns dictionary representation of dto"""
         return self.__dict__
@@ -47,3 +58,6 @@ class GoogleAnalyticsFilterClause():
     def from_dict(cls, dict_obj):
         """creates new instance from dictionary"""
         return cls(**dict_obj)
+
+
+# pylint: enable=too-many-instance-attributes
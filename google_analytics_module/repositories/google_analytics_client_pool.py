@@ -0,0 +1,104 @@
+"""Pool of google analytics data clients, shared across repository calls"""
+
+import logging
+import os
+from threading import Lock
+
+# pylint: disable=no-name-in-module
+# pylint: disable=import-error
+from google.analytics.data_v1beta import BetaAnalyticsDataClient
+
+# pylint: enable=no-name-in-module
+# pylint: enable=import-error
+
+
+# pylint: disable=too-many-instance-attributes
+class GoogleAnalyticsClientPool:
+    """Creates the BetaAnalyticsDataClient lazily and reuses it for every request.
+    The grpc channel of the client is thread safe, so one client is shared by all the
+    threads of the process. The client is rebuilt when the credentials rotate.
+    """
+
+    _shared_pool = None
+    _shared_pool_lock = Lock()
+
+    def __init__(self, client_factory=BetaAnalyticsDataClient) -> None:
+        self.client_factory = client_factory
+        self.log = logging.getLogger(__name__)
+        self.lock = Lock()
+        self.client = None
+        # oauth credentials and service account key the client is built with
+        self.client_creds = None
+        self.client_service_account_key = None
+        self.created_count = 0
+        self.reused_count = 0
+
+    @classmethod
+    def shared(cls):
+        """returns the pool shared by the current process"""
+        with cls._shared_pool_lock:
+            if cls._shared_pool is None:
+                cls._shared_pool = cls()
+            return cls._shared_pool
+
+    def get_service_account_key(self):
+        """identifies the service account file used by the default credentials.
+        Replacing the file (new path or new modified time) rotates the credentials"""
+        file_path = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+        if file_path is None or not os.path.exists(file_path):
+            return file_path, None
+        return file_path, os.stat(file_path).st_mtime_ns
+
+    def is_client_valid(self, creds, service_account_key) -> bool:
+        """check if the existing client was built for the same credentials"""
+        return (
+            self.client is not None
+            and self.client_creds is creds
+            and self.client_service_account_key == service_account_key
+        )
+
+    def get_client(self, creds=None):
+        """get client for the credentials, creates a new one only when required
+        creds: oauth credentials, None for service account (default credentials)
+        """
+        service_account_key = self.get_service_account_key() if creds is None else None
+        with self.lock:
+            if self.is_client_valid(creds, service_account_key):
+                self.reused_count += 1
+                return self.client
+
+            if self.client is not None:
+                self.log.info("Credentials changed, rebuilding google analytics client")
+
+            self.client = self.client_factory(credentials=creds)
+            self.client_creds = creds
+            self.client_service_account_key = service_account_key
+            self.created_count += 1
+            return self.client
+
+    def get_stats(self):
+        """returns how often the client is created and reused"""
+        with self.lock:
+            total = self.created_count + self.reused_count
+            return {
+                "created_count": self.created_count,
+                "reused_count": self.reused_count,
+                "reuse_ratio": self.reused_count / total if total > 0 else 0,
+            }
+
+    def __getstate__(self):
+        """grpc clients and locks cannot be pickled (eg. joblib workers),
+        so the worker creates its own client"""
+        state = self.__dict__.copy()
+        state["lock"] = None
+        state["client"] = None
+        state["client_creds"] = None
+        state["client_service_account_key"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = Lock()
+
+
+# pylint: enable=too-many-instance-attributes
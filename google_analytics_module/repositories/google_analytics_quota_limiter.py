@@ -0,0 +1,183 @@
+"""Quota aware limiter of concurrent google analytics requests"""
+
+import logging
+from contextlib import contextmanager
+from threading import Condition, Lock
+
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+
+# errors of exhausted quota (429) and unavailable service (503) are retried
+RETRYABLE_EXCEPTIONS = (ResourceExhausted, ServiceUnavailable)
+
+
+# pylint: disable=too-many-instance-attributes
+class GoogleAnalyticsQuotaLimiter:
+    """Limits the concurrent requests of the process to google analytics.
+    The limit follows the property quota returned with each response:
+    it is lowered when the remaining hourly or daily tokens cannot afford the current
+    concurrency, halved when the quota is exhausted (429), and raised by one
+    after every response with healthy quota.
+    Reference: https://developers.google.com/analytics/devguides/reporting/data/v1/quotas
+    """
+
+    _shared_limiter = None
+    _shared_limiter_lock = Lock()
+
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        maximum_concurrent_requests: int = 10,
+        requests_headroom: int = 10,
+        maximum_tries: int = 5,
+        backoff_factor: float = 1,
+    ) -> None:
+        """
+        maximum_concurrent_requests: concurrent requests allowed per property
+        requests_headroom: concurrency is reduced when the remaining tokens cannot
+        afford this many rounds of concurrent requests
+        maximum_tries, backoff_factor: retries of 429 and 503 errors
+        """
+        self.maximum_concurrent_requests = maximum_concurrent_requests
+        self.requests_headroom = requests_headroom
+        self.maximum_tries = maximum_tries
+        self.backoff_factor = backoff_factor
+        self.log = logging.getLogger(__name__)
+        self.condition = Condition()
+        self.concurrent_requests_limit = maximum_concurrent_requests
+        self.active_requests = 0
+        self.metrics = self.new_metrics()
+
+    # pylint: enable=too-many-arguments
+    # pylint: enable=too-many-positional-arguments
+
+    @classmethod
+    def shared(cls):
+        """returns the limiter shared by the current process"""
+        with cls._shared_limiter_lock:
+            if cls._shared_limiter is None:
+                cls._shared_limiter = cls()
+            return cls._shared_limiter
+
+    def new_metrics(self):
+        """metrics of quota consumption"""
+        return {
+            "requests": 0,
+            "throttled_requests": 0,
+            "retries": 0,
+            "resource_exhausted_errors": 0,
+            "tokens_consumed": 0,
+            "tokens_per_hour_remaining": None,
+            "tokens_per_day_remaining": None,
+            "concurrent_requests_remaining": None,
+        }
+
+    @contextmanager
+    def request_slot(self):
+        """waits until the request is allowed by the concurrent requests limit"""
+        with self.condition:
+            if self.active_requests >= self.concurrent_requests_limit:
+                self.metrics["throttled_requests"] += 1
+            self.condition.wait_for(
+                lambda: self.active_requests < self.concurrent_requests_limit
+            )
+            self.active_requests += 1
+            self.metrics["requests"] += 1
+
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.active_requests -= 1
+                self.condition.notify_all()
+
+    def set_concurrent_requests_limit(self, limit: int):
+        """set limit between 1 and maximum concurrent requests, must be called within lock"""
+        limit = max(1, min(self.maximum_concurrent_requests, limit))
+        if limit != self.concurrent_requests_limit:
+            self.log.info("Concurrent google analytics requests limit %s", limit)
+        self.concurrent_requests_limit = limit
+        self.condition.notify_all()
+
+    def get_affordable_concurrency(self, property_quota) -> int:
+        """concurrency affordable by the remaining hourly and daily tokens"""
+        tokens_per_request = max(1, property_quota.tokens_per_hour.consumed)
+        remaining_tokens = min(
+            property_quota.tokens_per_hour.remaining,
+            property_quota.tokens_per_day.remaining,
+        )
+        affordable_requests = remaining_tokens // tokens_per_request
+        return affordable_requests // self.requests_headroom
+
+    def update_from_quota(self, property_quota):
+        """adjust the concurrent requests limit from the property quota of a response"""
+        if property_quota is None or (
+            property_quota.tokens_per_hour.consumed == 0
+            and property_quota.tokens_per_hour.remaining == 0
+        ):
+            # quota is not returned
+            return
+
+        with self.condition:
+            self.metrics["tokens_consumed"] += property_quota.tokens_per_hour.consumed
+            self.metrics["tokens_per_hour_remaining"] = (
+                property_quota.tokens_per_hour.remaining
+            )
+            self.metrics["tokens_per_day_remaining"] = property_quota.tokens_per_day.remaining
+            self.metrics["concurrent_requests_remaining"] = (
+                property_quota.concurrent_requests.remaining
+            )
+
+            affordable_concurrency = self.get_affordable_concurrency(property_quota)
+            if affordable_concurrency < self.concurrent_requests_limit:
+                self.set_concurrent_requests_limit(affordable_concurrency)
+            elif property_quota.concurrent_requests.remaining > 0:
+                # healthy quota, increase concurrency slowly
+                self.set_concurrent_requests_limit(self.concurrent_requests_limit + 1)
+
+    def update_from_response(self, response):
+        """update quota from run report or batch run reports response"""
+        reports = getattr(response, "reports", None)
+        if reports is None:
+            self.update_from_quota(getattr(response, "property_quota", None))
+            return
+
+        for report in reports:
+            self.update_from_quota(report.property_quota)
+
+    def record_retry(self, details):
+        """backoff handler, halves the concurrency when the quota is exhausted"""
+        with self.condition:
+            self.metrics["retries"] += 1
+            if isinstance(details.get("exception"), ResourceExhausted):
+                self.metrics["resource_exhausted_errors"] += 1
+                self.set_concurrent_requests_limit(self.concurrent_requests_limit // 2)
+
+        self.log.warning(
+            "Retrying google analytics request in %.1f seconds, try %s. %s",
+            details.get("wait", 0),
+            details.get("tries"),
+            details.get("exception"),
+        )
+
+    def get_metrics(self):
+        """returns quota consumption metrics"""
+        with self.condition:
+            metrics = dict(self.metrics)
+            metrics["concurrent_requests_limit"] = self.concurrent_requests_limit
+            metrics["active_requests"] = self.active_requests
+            return metrics
+
+    def __getstate__(self):
+        """locks cannot be pickled (eg. joblib workers)"""
+        state = self.__dict__.copy()
+        state["condition"] = None
+        state["active_requests"] = 0
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.condition = Condition()
+
+
+# pylint: enable=too-many-instance-attributes
@@ -1,9 +1,13 @@
 """version 4 of google analytics data"""
 
+import backoff
+import numpy as np
+import pandas as pd
+
 # pylint: disable=no-name-in-module
 # pylint: disable=import-error
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
 from google.analytics.data_v1beta.types import (
+    BatchRunReportsRequest,
     DateRange,
     Dimension,
     Metric,
@@ -11,11 +15,22 @@ from google.analytics.data_v1beta.types import (
     FilterExpression,
     FilterExpressionList,
     Filter,
+    MetricType,
 )
 # pylint: enable=no-name-in-module
 # pylint: enable=import-error
 
 from google_analytics_module.enums import GoogleAuthenticationMethod
+from google_analytics_module.repositories.google_analytics_client_pool import (
+    GoogleAnalyticsClientPool,
+)
+from google_analytics_module.repositories.google_analytics_quota_limiter import (
+    RETRYABLE_EXCEPTIONS,
+    GoogleAnalyticsQuotaLimiter,
+)
+from google_analytics_module.repositories.google_analytics_response_cache import (
+    GoogleAnalyticsResponseCache,
+)
 from google_analytics_module.repositories.google_analytics_repository_base import (
     GoogleAnalyticsRepositoryBase,
 )
@@ -26,6 +41,23 @@ from google_analytics_module.dtos.google_analytics_request_config_dto import (
     GoogleAnalyticsRequestConfig,
 )
 from helpers.date_helper import DateHelper
+from helpers.list_helper import ListHelper
+
+# maximum number of rows returned by api in a single request, default is 10000
+MAXIMUM_PAGE_SIZE = 250000
+# maximum number of reports in a single batchRunReports request
+MAXIMUM_BATCH_SIZE = 5
+# dimensions with a few distinct values, decoded as categorical columns
+CATEGORICAL_DIMENSIONS = {
+    "eventName",
+    "userAgeBracket",
+    "userGender",
+    "deviceCategory",
+    "sessionSource",
+    "sessionMedium",
+    "sessionSourceMedium",
+    "customEvent:DatasetID",
+}
 
 
 class GoogleAnalyticsRepositoryV4(GoogleAnalyticsRepositoryBase):
@@ -34,11 +66,16 @@ class GoogleAnalyticsRepositoryV4(GoogleAnalyticsRepositoryBase):
 
     """
 
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
     def __init__(
         self,
         google_authentication_method=GoogleAuthenticationMethod.SERVICE_ACCOUNT,
         oauth_credentials_filepath: str = "./credentials/oauth_credentials.json",
         oauth_token_filepath: str = "./credentials/token.json",
+        client_pool: GoogleAnalyticsClientPool = None,
+        response_cache: GoogleAnalyticsResponseCache = None,
+        quota_limiter: GoogleAnalyticsQuotaLimiter = None,
     ) -> None:
         super().__init__(
             google_authentication_method,
@@ -46,18 +83,72 @@ class GoogleAnalyticsRepositoryV4(GoogleAnalyticsRepositoryBase):
             oauth_token_filepath,
         )
         self.date_helper = DateHelper()
+        self.list_helper = ListHelper()
+        # None uses the pool shared by the process
+        self.client_pool = client_pool
+        # None disables the cache of responses
+        self.response_cache = response_cache
+        # None uses the quota limiter shared by the process
+        self.quota_limiter = quota_limiter
 
-    def get_data(
+    # pylint: enable=too-many-arguments
+    # pylint: enable=too-many-positional-arguments
+
+    def get_client_pool(self) -> GoogleAnalyticsClientPool:
+        """get client pool"""
+        if self.client_pool is None:
+            return GoogleAnalyticsClientPool.shared()
+        return self.client_pool
+
+    def get_quota_limiter(self) -> GoogleAnalyticsQuotaLimiter:
+        """get quota limiter"""
+        if self.quota_limiter is None:
+            return GoogleAnalyticsQuotaLimiter.shared()
+        return self.quota_limiter
+
+    def execute_request(self, api_method, request):
+        """execute api request within the concurrent requests limit of quota limiter.
+        Exhausted quota (429) and unavailable service (503) errors are retried
+        with jittered exponential backoff"""
+        quota_limiter = self.get_quota_limiter()
+
+        @backoff.on_exception(
+            backoff.expo,
+            RETRYABLE_EXCEPTIONS,
+            max_tries=quota_limiter.maximum_tries,
+            jitter=backoff.full_jitter,
+            on_backoff=quota_limiter.record_retry,
+            factor=quota_limiter.backoff_factor,
+        )
+        def execute():
+            with quota_limiter.request_slot():
+                return api_method(request)
+
+        response = execute()
+        quota_limiter.update_from_response(response)
+        return response
+
+    def get_client(self):
+        """get pooled client for the current credentials"""
+        if self.google_authentication_method == GoogleAuthenticationMethod.OAUTH:
+            self.refresh_oauth_token()
+
+        return self.get_client_pool().get_client(self.creds)
+
+    def get_page_size(self, filter_clause: GoogleAnalyticsFilterClause) -> int:
+        """page size of the request, defaults to the maximum rows returned by api"""
+        if filter_clause.page_dto is None or not filter_clause.page_dto.page_size:
+            return MAXIMUM_PAGE_SIZE
+        return min(int(filter_clause.page_dto.page_size), MAXIMUM_PAGE_SIZE)
+
+    def get_request(
         self,
         property_id: str,
         request_config: GoogleAnalyticsRequestConfig,
         filter_clause: GoogleAnalyticsFilterClause,
-    ):
-        """Get data from google analytics api"""
-        if self.google_authentication_method == GoogleAuthenticationMethod.OAUTH:
-            self.refresh_oauth_token()
-
-        client = BetaAnalyticsDataClient(credentials=self.creds)
+        offset: int = 0,
+    ) -> RunReportRequest:
+        """construct the report request for a page starting at offset"""
         dimensions_list = [Dimension(name=d) for d in request_config.dimensions]
         metrics_list = [Metric(name=m) for m in request_config.metrics]
 
@@ -68,12 +159,14 @@ class GoogleAnalyticsRepositoryV4(GoogleAnalyticsRepositoryBase):
             filter_clause.date_range.end_date
         )
 
-        request = RunReportRequest(
+        return RunReportRequest(
             property=f"properties/{property_id}",
             dimensions=dimensions_list,
             metrics=metrics_list,
             date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
-            limit=250000,  # this is the maximum number of rows returned by api, default in 10000
+            offset=offset,
+            limit=self.get_page_size(filter_clause),
+            return_property_quota=True,
             dimension_filter=FilterExpression(
                 and_group=FilterExpressionList(
                     expressions=self.get_filter_expressions(filter_clause)
@@ -81,8 +174,125 @@ class GoogleAnalyticsRepositoryV4(GoogleAnalyticsRepositoryBase):
             ),
         )
 
-        response = client.run_report(request)
-        return self.format_response(response)
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def get_data_pages(
+        self,
+        property_id: str,
+        request_config: GoogleAnalyticsRequestConfig,
+        filter_clause: GoogleAnalyticsFilterClause,
+        offset: int = 0,
+        as_data_frame: bool = False,
+    ):
+        """Get data from google analytics api page by page.
+        Yields the formatted rows of each page as soon as it arrives,
+        and walks the offset until row_count of the report is reached.
+        as_data_frame: yield typed dataframes instead of list of dicts
+        The pages are not cached, see get_data
+        """
+        client = self.get_client()
+        while True:
+            request = self.get_request(
+                property_id, request_config, filter_clause, offset=offset
+            )
+            response = self.execute_request(client.run_report, request)
+            rows_count = len(response.rows)
+            if rows_count > 0 and as_data_frame:
+                yield self.format_response_as_df(response)
+            elif rows_count > 0:
+                yield self.format_response(response)
+
+            offset += rows_count
+            self.log.debug("Retrieved %s of %s rows", offset, response.row_count)
+            if rows_count == 0 or offset >= response.row_count:
+                break
+
+    # pylint: enable=too-many-arguments
+    # pylint: enable=too-many-positional-arguments
+
+    def get_data(
+        self,
+        property_id: str,
+        request_config: GoogleAnalyticsRequestConfig,
+        filter_clause: GoogleAnalyticsFilterClause,
+    ):
+        """Get all the data from google analytics api.
+        The response is served from the response cache when available"""
+        if self.response_cache is None:
+            return self.get_data_from_api(property_id, request_config, filter_clause)
+
+        cache_key = self.response_cache.get_key(property_id, request_config, filter_clause)
+        results = self.response_cache.get(cache_key)
+        if results is None:
+            results = self.get_data_from_api(property_id, request_config, filter_clause)
+            self.response_cache.put(
+                cache_key, results, filter_clause.date_range.end_date
+            )
+
+        return results
+
+    def get_data_from_api(
+        self,
+        property_id: str,
+        request_config: GoogleAnalyticsRequestConfig,
+        filter_clause: GoogleAnalyticsFilterClause,
+    ):
+        """Get all the data from google analytics api, page by page"""
+        results = []
+        for page in self.get_data_pages(property_id, request_config, filter_clause):
+            results.extend(page)
+
+        return results
+
+    def get_batch_data(
+        self,
+        property_id: str,
+        requests: list[tuple[GoogleAnalyticsRequestConfig, GoogleAnalyticsFilterClause]],
+        as_data_frame: bool = False,
+    ):
+        """Get data for multiple reports, sending up to 5 reports per batchRunReports call.
+        requests: list of (request_config, filter_clause)
+        as_data_frame: return a typed dataframe for each report instead of list of dicts
+        Returns the rows of each report in the same order as requests
+        The reports are not cached, see get_data
+        """
+        client = self.get_client()
+        results = []
+        for batch in self.list_helper.split_into_chunks(requests, MAXIMUM_BATCH_SIZE):
+            batch_request = BatchRunReportsRequest(
+                property=f"properties/{property_id}",
+                requests=[
+                    self.get_request(property_id, request_config, filter_clause)
+                    for request_config, filter_clause in batch
+                ],
+            )
+            batch_response = self.execute_request(
+                client.batch_run_reports, batch_request
+            )
+            for (request_config, filter_clause), response in zip(
+                batch, batch_response.reports
+            ):
+                if as_data_frame:
+                    pages = [self.format_response_as_df(response)]
+                else:
+                    pages = [self.format_response(response)]
+                if len(response.rows) < response.row_count:
+                    # the report is larger than a page, fetch the remaining pages
+                    pages.extend(
+                        self.get_data_pages(
+                            property_id,
+                            request_config,
+                            filter_clause,
+                            offset=len(response.rows),
+                            as_data_frame=as_data_frame,
+                        )
+                    )
+                if as_data_frame:
+                    results.append(self.concat_data_frames(pages))
+                else:
+                    results.append([row for page in pages for row in page])
+
+        return results
 
     def get_filter_expressions(self, filter_clause: GoogleAnalyticsFilterClause):
         """contruct filter expressions"""
@@ -124,21 +334,84 @@ class GoogleAnalyticsRepositoryV4(GoogleAnalyticsRepositoryBase):
                 )
             )
 
+        if not self.str_helper.is_null_or_whitespace(filter_clause.landing_page_prefix):
+            filter_expressions.append(
+                FilterExpression(
+                    filter=Filter(
+                        field_name="landingPage",
+                        string_filter=Filter.StringFilter(
+                            value=filter_clause.landing_page_prefix,
+                            match_type=Filter.StringFilter.MatchType.BEGINS_WITH,
+                        ),
+                    )
+                )
+            )
+
+        if filter_clause.organisation_ids:
+            filter_expressions.append(
+                FilterExpression(
+                    or_group=FilterExpressionList(
+                        expressions=[
+                            FilterExpression(
+                                filter=Filter(
+                                    field_name="landingPage",
+                                    string_filter=Filter.StringFilter(
+                                        value=f"/org/{organisation_id}",
+                                        match_type=Filter.StringFilter.MatchType.BEGINS_WITH,
+                                    ),
+                                )
+                            )
+                            for organisation_id in filter_clause.organisation_ids
+                        ]
+                    )
+                )
+            )
+
         return filter_expressions
 
+    def decode_columns(self, response) -> dict[str, list[str]]:
+        """Decode the values of response column by column.
+        Headers are read once, and rows are read from the underlying protobuf message,
+        which avoids wrapping every cell in a proto-plus object"""
+        response_pb = type(response).pb(response)
+        rows = response_pb.rows
+        columns = {}
+        for i, header in enumerate(response_pb.dimension_headers):
+            columns[header.name] = [row.dimension_values[i].value for row in rows]
+
+        for i, header in enumerate(response_pb.metric_headers):
+            columns[header.name] = [row.metric_values[i].value for row in rows]
+
+        return columns
+
     def format_response(self, response):
-        """Format response"""
-        results = []
-        for row in response.rows:
-            result = {}
-            for i, dimension_value in enumerate(row.dimension_values):
-                dimension_name = response.dimension_headers[i].name
-                result[dimension_name] = dimension_value.value
+        """Format response as list of dicts, values are strings"""
+        columns = self.decode_columns(response)
+        names = list(columns)
+        return [dict(zip(names, values)) for values in zip(*columns.values())]
 
-            for i, metric_value in enumerate(row.metric_values):
-                metric_name = response.metric_headers[i].name
-                result[metric_name] = metric_value.value
+    def format_response_as_df(self, response) -> pd.DataFrame:
+        """Format response as dataframe.
+        Metrics are typed from the metric headers and
+        low cardinality dimensions are categorical"""
+        columns = self.decode_columns(response)
+        for header in response.dimension_headers:
+            if header.name in CATEGORICAL_DIMENSIONS:
+                columns[header.name] = pd.Categorical(columns[header.name])
 
-            results.append(result)
+        for header in response.metric_headers:
+            dtype = np.int64 if header.type_ == MetricType.TYPE_INTEGER else np.float64
+            columns[header.name] = np.asarray(columns[header.name], dtype=str).astype(dtype)
 
-        return results
+        return pd.DataFrame(columns)
+
+    def concat_data_frames(self, data_frames: list[pd.DataFrame]) -> pd.DataFrame:
+        """concat pages of report, categories of pages are unified"""
+        if len(data_frames) == 1:
+            return data_frames[0]
+
+        results_df = pd.concat(data_frames, ignore_index=True)
+        for column in results_df.columns:
+            if column in CATEGORICAL_DIMENSIONS:
+                results_df[column] = results_df[column].astype("category")
+        return results_df
@@ -0,0 +1,274 @@
+"""On-disk cache of google analytics report responses"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from threading import Lock
+
+import pandas as pd
+
+from google_analytics_module.dtos.google_analytics_filter_clause_dto import (
+    GoogleAnalyticsFilterClause,
+)
+from google_analytics_module.dtos.google_analytics_request_config_dto import (
+    GoogleAnalyticsRequestConfig,
+)
+from helpers.date_helper import DateHelper
+from helpers.file_helper import FileHelper
+
+# file locks are not available on windows, the index is merged without a lock
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+# pylint: disable=too-many-instance-attributes
+class GoogleAnalyticsResponseCache:
+    """Caches the rows of google analytics reports as compressed parquet files.
+    The key is a hash of property, dimensions, metrics, filters and date range.
+    Reports of closed date ranges (ended before today - closed_range_lag_in_days)
+    are immutable and never expire, other reports expire after time_to_live_in_seconds.
+    Least recently used reports are evicted when the cache exceeds maximum_size_in_bytes.
+    Hits are recorded in memory and saved with the next put or on close, the index is
+    merged with the index on disk before saving, so processes sharing the cache
+    keep the reports of each other.
+    Only GoogleAnalyticsRepositoryV4.get_data is cached, get_data_pages and
+    get_batch_data always request the api.
+    """
+
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        cache_dir: str = "./cache/google_analytics",
+        time_to_live_in_seconds: int = 24 * 60 * 60,
+        maximum_size_in_bytes: int = 1024 * 1024 * 1024,
+        closed_range_lag_in_days: int = 2,
+        compression: str = "zstd",
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.time_to_live_in_seconds = time_to_live_in_seconds
+        self.maximum_size_in_bytes = maximum_size_in_bytes
+        self.closed_range_lag_in_days = closed_range_lag_in_days
+        self.compression = compression
+        self.index_file_path = os.path.join(cache_dir, "index.json")
+        self.index_lock_file_path = os.path.join(cache_dir, "index.lock")
+        self.log = logging.getLogger(__name__)
+        self.lock = Lock()
+        self.index = None
+        self.is_index_changed = False
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self.date_helper = DateHelper()
+        self.file_helper = FileHelper()
+
+    # pylint: enable=too-many-arguments
+    # pylint: enable=too-many-positional-arguments
+
+    @classmethod
+    def from_settings(cls, cache_settings: dict):
+        """creates cache from GoogleAnalyticsCache module of app_settings"""
+        return cls(
+            cache_dir=cache_settings.get("RootDir", "./cache/google_analytics"),
+            time_to_live_in_seconds=cache_settings.get("TimeToLiveInSeconds", 24 * 60 * 60),
+            maximum_size_in_bytes=cache_settings.get("MaximumSizeInMegabytes", 1024)
+            * 1024
+            * 1024,
+        )
+
+    def get_key(
+        self,
+        property_id: str,
+        request_config: GoogleAnalyticsRequestConfig,
+        filter_clause: GoogleAnalyticsFilterClause,
+    ) -> str:
+        """canonical hash of the request. Page size is excluded,
+        because the cache holds all the rows of the report"""
+        key_data = {
+            "property_id": str(property_id),
+            "dimensions": list(request_config.dimensions),
+            "metrics": list(request_config.metrics),
+            "dataset_id": filter_clause.dataset_id or "",
+            "organisation_id": str(filter_clause.organisation_id or ""),
+            "organisation_ids": sorted(str(o) for o in filter_clause.organisation_ids or []),
+            "landing_page_prefix": filter_clause.landing_page_prefix or "",
+            "start_date": self.date_helper.convert_date_to_yyyy_mm_dd(
+                filter_clause.date_range.start_date
+            ),
+            "end_date": self.date_helper.convert_date_to_yyyy_mm_dd(
+                filter_clause.date_range.end_date
+            ),
+        }
+        key_json = json.dumps(key_data, sort_keys=True)
+        return hashlib.sha256(key_json.encode("UTF-8")).hexdigest()
+
+    def is_closed_date_range(self, end_date: date | datetime) -> bool:
+        """data of the date range will not change anymore"""
+        if isinstance(end_date, datetime):
+            end_date = end_date.date()
+        return end_date < date.today() - timedelta(days=self.closed_range_lag_in_days)
+
+    def read_index_file(self) -> dict:
+        """index saved on disk, empty if not saved yet"""
+        if not os.path.exists(self.index_file_path):
+            return {}
+        with open(self.index_file_path, "r", encoding="UTF-8") as file_obj:
+            return json.load(file_obj)
+
+    def load_index(self):
+        """load index of cached reports, must be called within lock"""
+        if self.index is not None:
+            return self.index
+
+        self.index = self.read_index_file()
+        atexit.register(self.close)
+        return self.index
+
+    @contextmanager
+    def lock_index_file(self):
+        """exclusive lock of index file between processes"""
+        self.file_helper.create_directory(self.cache_dir)
+        with open(self.index_lock_file_path, "a", encoding="UTF-8") as lock_file_obj:
+            if fcntl is not None:
+                fcntl.flock(lock_file_obj, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file_obj, fcntl.LOCK_UN)
+
+    def merge_index(self, disk_index: dict):
+        """merge index on disk into index, must be called within lock.
+        The newest report of a key is kept with its latest access,
+        reports whose file was removed (expired or evicted) are dropped"""
+        for key, disk_entry in disk_index.items():
+            entry = self.index.get(key)
+            if entry is None or entry["created_time"] < disk_entry["created_time"]:
+                self.index[key] = {
+                    **disk_entry,
+                    "last_accessed_time": max(
+                        disk_entry["last_accessed_time"],
+                        entry["last_accessed_time"] if entry else 0,
+                    ),
+                }
+            else:
+                entry["last_accessed_time"] = max(
+                    entry["last_accessed_time"], disk_entry["last_accessed_time"]
+                )
+
+        for key in [k for k in self.index if not os.path.exists(self.get_file_path(k))]:
+            self.index.pop(key)
+
+    def save_index(self):
+        """merge index with the index on disk, evict reports over maximum size
+        and save index atomically, must be called within lock"""
+        with self.lock_index_file():
+            self.merge_index(self.read_index_file())
+            self.evict_least_recently_used()
+            temp_file_path = f"{self.index_file_path}.{os.getpid()}.tmp"
+            with open(temp_file_path, "w", encoding="UTF-8") as file_obj:
+                json.dump(self.index, file_obj)
+            os.replace(temp_file_path, self.index_file_path)
+        self.is_index_changed = False
+
+    def get_file_path(self, key: str) -> str:
+        """parquet file of the cached report"""
+        return os.path.join(self.cache_dir, f"{key}.parquet")
+
+    def is_expired(self, entry: dict) -> bool:
+        """closed date ranges never expire"""
+        if entry["is_closed_date_range"]:
+            return False
+        return time.time() - entry["created_time"] > self.time_to_live_in_seconds
+
+    def remove_entry(self, key: str):
+        """remove report from cache, must be called within lock"""
+        self.index.pop(key, None)
+        file_path = self.get_file_path(key)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    def get(self, key: str):
+        """get cached rows of report, returns None if not found or expired"""
+        with self.lock:
+            entry = self.load_index().get(key)
+            if entry is None or not os.path.exists(self.get_file_path(key)):
+                self.stats["misses"] += 1
+                return None
+
+            if self.is_expired(entry):
+                self.remove_entry(key)
+                self.is_index_changed = True
+                self.stats["misses"] += 1
+                return None
+
+            results = pd.read_parquet(self.get_file_path(key)).to_dict("records")
+            entry["last_accessed_time"] = time.time()
+            self.is_index_changed = True
+            self.stats["hits"] += 1
+            return results
+
+    def put(self, key: str, results: list[dict], end_date: date | datetime):
+        """cache rows of report"""
+        with self.lock:
+            self.load_index()
+            self.file_helper.create_directory(self.cache_dir)
+            file_path = self.get_file_path(key)
+            temp_file_path = f"{file_path}.tmp"
+            pd.DataFrame(results).to_parquet(
+                temp_file_path, compression=self.compression, index=False
+            )
+            os.replace(temp_file_path, file_path)
+
+            now = time.time()
+            self.index[key] = {
+                "size_in_bytes": os.path.getsize(file_path),
+                "created_time": now,
+                "last_accessed_time": now,
+                "is_closed_date_range": self.is_closed_date_range(end_date),
+            }
+            self.save_index()
+
+    def evict_least_recently_used(self):
+        """evict reports until the cache fits maximum size, must be called within lock"""
+        total_size = sum(e["size_in_bytes"] for e in self.index.values())
+        keys_by_last_access = sorted(
+            self.index, key=lambda k: self.index[k]["last_accessed_time"]
+        )
+        for key in keys_by_last_access:
+            if total_size <= self.maximum_size_in_bytes:
+                break
+            total_size -= self.index[key]["size_in_bytes"]
+            self.remove_entry(key)
+            self.stats["evictions"] += 1
+            self.log.debug("Evicted report %s from cache", key)
+
+    def close(self):
+        """save hits recorded since the last save"""
+        with self.lock:
+            if self.is_index_changed:
+                self.save_index()
+
+    def get_stats(self):
+        """hits, misses and evictions of the cache"""
+        with self.lock:
+            return dict(self.stats)
+
+    def __getstate__(self):
+        """locks cannot be pickled (eg. joblib workers)"""
+        state = self.__dict__.copy()
+        state["lock"] = None
+        state["index"] = None
+        state["is_index_changed"] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = Lock()
+
+
+# pylint: enable=too-many-instance-attributes
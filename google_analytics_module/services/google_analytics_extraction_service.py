@@ -0,0 +1,171 @@
+"""
+Incremental daily extraction of google analytics data
+"""
+
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+import pandas as pd
+from google_analytics_module.services.google_analytics_service import (
+    DATA_MODULE_DIMENSIONS,
+    GoogleAnalyticsService,
+)
+from helpers.date_helper import DateHelper
+from helpers.enums import DataFrequency, DataModule, JobStatus, StorageFormat
+from helpers.file_helper import FileHelper
+from helpers.metadata_helper import JobConfig, MetadataHelper
+from helpers.pandas_helper import PandasHelper
+from helpers.settings_helper import SettingsHelper
+
+# data modules extracted from google analytics every day
+DAILY_DATA_MODULES = [
+    DataModule.AGE,
+    DataModule.GENDER,
+    DataModule.LANDING_PAGE,
+    DataModule.DEVICE_CATEGORY,
+    DataModule.SOURCE_MEDIUM,
+]
+
+
+class GoogleAnalyticsExtractionService:
+    """Extracts the days missing since the last extraction recorded in metadata.
+    Each day of a data module is saved in its own partition
+    data/daily/<module>/YYYY/MM/DD, as parquet with the data types of the data module,
+    and the checkpoint is advanced after every day, so a failed run resumes from the failed day.
+    A data module is skipped while another job holds its job lock.
+    The breakdowns of a single dataset over a date range are saved as run files instead.
+    """
+
+    def __init__(
+        self,
+        google_analytics_service: GoogleAnalyticsService = None,
+        metadata_helper: MetadataHelper = None,
+        root_dir: str = None,
+    ) -> None:
+        self.google_analytics_service = google_analytics_service
+        if self.google_analytics_service is None:
+            self.google_analytics_service = GoogleAnalyticsService()
+        self.metadata_helper = metadata_helper
+        if self.metadata_helper is None:
+            self.metadata_helper = MetadataHelper()
+        self.root_dir = root_dir
+        if self.root_dir is None:
+            self.root_dir = SettingsHelper().get_file_storage_root_folder()
+        self.file_helper = FileHelper(StorageFormat.PARQUET)
+        self.pandas_helper = PandasHelper()
+        self.date_helper = DateHelper()
+        self.log = logging.getLogger(__name__)
+
+    def get_missing_days(
+        self, module: DataModule, end_date: date, first_date: date = date(2021, 1, 1)
+    ) -> list[date]:
+        """days after the last successful extraction until end date"""
+        metadata = self.metadata_helper.load_metadata(
+            DataFrequency.DAILY, module, default_date=first_date
+        )
+        start_date = self.metadata_helper.get_start_date(
+            metadata.last_data_extraction_date, metadata.job_status
+        )
+        return [
+            start_date + timedelta(days=i)
+            for i in range((end_date - start_date).days + 1)
+        ]
+
+    def get_partition_path(self, module: DataModule, day: date) -> str:
+        """file path of the daily partition"""
+        return self.file_helper.get_data_path(
+            self.root_dir,
+            DataFrequency.DAILY.name.lower(),
+            module.name.lower(),
+            day,
+        )
+
+    def extract_day(self, module: DataModule, day: date) -> str:
+        """extract a single day of data module, returns the saved file path"""
+        data_df = self.google_analytics_service.get_sessions_by_data_module_as_df(
+            "", day, day, module
+        )
+        # a day without sessions has no rows to infer the columns from
+        if data_df.empty:
+            data_df = pd.DataFrame(columns=DATA_MODULE_DIMENSIONS[module] + ["sessions"])
+        data_df["start_date"] = pd.Timestamp(day)
+        data_df["end_date"] = pd.Timestamp(day)
+        file_path = self.get_partition_path(module, day)
+        self.file_helper.save_df(self.pandas_helper.apply_schema(data_df, module), file_path)
+        return file_path
+
+    def extract_module(
+        self,
+        module: DataModule,
+        end_date: date = None,
+        first_date: date = date(2021, 1, 1),
+    ) -> list[date]:
+        """extract the missing days of data module until end_date (default yesterday,
+        because data of today is incomplete). Returns the extracted days
+        """
+        if end_date is None:
+            end_date = date.today() - timedelta(days=1)
+
+        job_config = JobConfig(DataFrequency.DAILY, module)
+        with self.metadata_helper.job_lock(job_config) as is_locked:
+            if not is_locked:
+                self.log.warning("%s is being extracted by another job", module.name)
+                return []
+
+            missing_days = self.get_missing_days(module, end_date, first_date)
+            self.log.info("Extracting %s days of %s", len(missing_days), module.name)
+            for day in missing_days:
+                self.metadata_helper.save_metadata(job_config, day, JobStatus.IN_PROGRESS)
+                try:
+                    self.extract_day(module, day)
+                except Exception as ex:
+                    self.metadata_helper.save_metadata(
+                        job_config, day, JobStatus.FAILED, failure_reason=str(ex)
+                    )
+                    raise
+                self.metadata_helper.save_metadata(job_config, day, JobStatus.SUCCESS)
+
+        return missing_days
+
+    def extract_modules(
+        self,
+        modules: list[DataModule] = None,
+        end_date: date = None,
+        first_date: date = date(2021, 1, 1),
+    ) -> dict:
+        """extract the missing days of every data module.
+        Returns the extracted days of each data module
+        """
+        if modules is None:
+            modules = DAILY_DATA_MODULES
+
+        return {
+            module: self.extract_module(module, end_date, first_date)
+            for module in modules
+        }
+
+    def extract_dataset_breakdowns(
+        self,
+        dataset_id: str,
+        start_date: date,
+        end_date: date,
+        run_id: str = None,
+    ) -> str:
+        """save sessions of dataset by age, gender, source, medium and landing page
+        as run files of run_id, the reports are requested together in a batch.
+        Returns the run id
+        """
+        if run_id is None:
+            now_date = self.date_helper.convert_date_to_yyyy_mm_dd_hh_mm_ss(datetime.now())
+            run_id = f"{now_date}_{uuid.uuid4()}"
+
+        breakdowns = self.google_analytics_service.get_dataset_breakdowns(
+            dataset_id, start_date, end_date
+        )
+        for module, data_df in breakdowns.items():
+            data_df["start_date"] = pd.Timestamp(start_date)
+            data_df["end_date"] = pd.Timestamp(end_date)
+            self.file_helper.save_run_file(data_df, run_id, module)
+            self.log.info("Saved %s rows of %s in run %s", len(data_df), module.name, run_id)
+
+        return run_id
@@ -2,10 +2,13 @@
 Google analytics service
 """
 
+import logging
+import re
 from datetime import date
 from joblib import Parallel, delayed
 import pandas as pd
 from dtos.date_range_dto import DateRangeDto
+from dtos.page_dto import PageDto
 from google_analytics_module.dtos.google_analytics_filter_clause_dto import (
     GoogleAnalyticsFilterClause,
 )
@@ -13,44 +16,111 @@ from google_analytics_module.dtos.google_analytics_request_config_dto import (
     GoogleAnalyticsRequestConfig,
 )
 from google_analytics_module.repositories.google_analytics_repository_v4 import (
+    MAXIMUM_BATCH_SIZE,
     GoogleAnalyticsRepositoryV4,
 )
+from google_analytics_module.repositories.google_analytics_response_cache import (
+    GoogleAnalyticsResponseCache,
+)
+from helpers.date_helper import DateHelper
+from helpers.enums import DataFrequency, DataModule
+from helpers.file_helper import FileHelper
+from helpers.list_helper import ListHelper
 from helpers.pandas_helper import PandasHelper
 from helpers.settings_helper import SettingsHelper
 from helpers.string_helper import StringHelper
 
+# landing page of organisation is /org/<id>-<name>
+ORGANISATION_LANDING_PAGE_PATTERN = re.compile(r"^/org/(\d+)(?!\d)")
+# number of organisation ids filtered in a single report
+ORGANISATIONS_PER_REPORT = 100
+# concurrent requests of date range shards, google analytics allows 10 per property
+SHARDS_CONCURRENT_REQUESTS = 4
+# dimensions of the sessions report of each data module
+DATA_MODULE_DIMENSIONS = {
+    DataModule.AGE: ["customEvent:DatasetID", "userAgeBracket"],
+    DataModule.GENDER: ["customEvent:DatasetID", "userGender"],
+    DataModule.LANDING_PAGE: ["customEvent:DatasetID", "landingPage"],
+    DataModule.DEVICE_CATEGORY: ["customEvent:DatasetID", "deviceCategory"],
+    DataModule.SOURCE_MEDIUM: ["customEvent:DatasetID", "sessionSourceMedium"],
+    DataModule.SOURCE: ["customEvent:DatasetID", "sessionSource"],
+    DataModule.MEDIUM: ["customEvent:DatasetID", "sessionMedium"],
+}
+# breakdowns of a dataset fetched together by get_dataset_breakdowns
+DATASET_BREAKDOWN_MODULES = [
+    DataModule.AGE,
+    DataModule.GENDER,
+    DataModule.SOURCE,
+    DataModule.MEDIUM,
+    DataModule.LANDING_PAGE,
+]
+
 
+# pylint: disable=too-many-instance-attributes
+# pylint: disable=too-many-public-methods
 class GoogleAnalyticsService:
     """Google analytics service"""
 
-    def __init__(self, google_analytics_repository=None) -> None:
+    def __init__(self, google_analytics_repository=None,
+                 settings_helper: SettingsHelper = None) -> None:
+        self.settings_helper = settings_helper
+        if self.settings_helper is None:
+            self.settings_helper = SettingsHelper()
         if google_analytics_repository is None:
-            self.google_analytics_repository = GoogleAnalyticsRepositoryV4()
+            self.google_analytics_repository = GoogleAnalyticsRepositoryV4(
+                response_cache=self.get_response_cache()
+            )
         else:
             self.google_analytics_repository = google_analytics_repository
-        self.settings_helper = SettingsHelper()
         self.property_id = self.settings_helper.get_google_analytics_view_id_v4()
         self.string_helper = StringHelper()
         self.pandas_helper = PandasHelper()
+        self.file_helper = FileHelper()
+        self.list_helper = ListHelper()
+        self.date_helper = DateHelper()
+        self.log = logging.getLogger(__name__)
+
+    def get_response_cache(self):
+        """response cache configured in app_settings, None if not configured"""
+        cache_settings = self.settings_helper.get_google_analytics_cache_settings()
+        if cache_settings is None:
+            return None
+        return GoogleAnalyticsResponseCache.from_settings(cache_settings)
 
     # pylint: disable=too-many-arguments
     # pylint: disable=too-many-positional-arguments
-    def get_data(
+    def get_filter_clause(
         self,
         dataset_id: str,
         start_date: date,
         end_date: date,
-        dimensions,
-        metrics,
         organisation_id: str = "",
-    ):
-        """Get data from google analytics"""
+        page_size: int = None,
+    ) -> GoogleAnalyticsFilterClause:
+        """construct filter clause for the request"""
         filter_clause = GoogleAnalyticsFilterClause()
         filter_clause.set_dataset_id(dataset_id)
         filter_clause.set_date_range(
             DateRangeDto(start_date=start_date, end_date=end_date)
         )
         filter_clause.set_organisation_id(organisation_id)
+        if page_size:
+            filter_clause.set_page_dto(PageDto(page_size, None))
+        return filter_clause
+
+    def get_data(
+        self,
+        dataset_id: str,
+        start_date: date,
+        end_date: date,
+        dimensions,
+        metrics,
+        organisation_id: str = "",
+    ):
+        """Get data from google analytics"""
+        filter_clause = self.get_filter_clause(
+            dataset_id, start_date, end_date, organisation_id
+        )
         request_config = GoogleAnalyticsRequestConfig(dimensions, metrics)
         results = self.google_analytics_repository.get_data(
             property_id=self.property_id,
@@ -60,6 +130,127 @@ class GoogleAnalyticsService:
 
         return results
 
+    def get_data_sharded(
+        self,
+        dataset_id: str,
+        start_date: date,
+        end_date: date,
+        dimensions,
+        metrics,
+        organisation_id: str = "",
+        shard_frequency: DataFrequency = DataFrequency.MONTHLY,
+        n_jobs: int = SHARDS_CONCURRENT_REQUESTS,
+    ):
+        """Get data from google analytics, splitting the date range into shards
+        of shard_frequency (week, month or year) which are requested concurrently.
+        Exhausted quota and unavailable service errors are retried by the repository,
+        other errors fail the request.
+        The rows of the same dimension values in different shards are merged and
+        their metrics summed, so the metrics must be additive, eg. sessions, eventCount.
+        n_jobs: concurrent requests, keep below the concurrent requests quota of property
+        """
+        shards = self.date_helper.split_date_range(
+            DateRangeDto(start_date=start_date, end_date=end_date), shard_frequency
+        )
+        self.log.info("Requesting %s shards of %s", len(shards), shard_frequency.name)
+        shards_results = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(self.get_data)(
+                dataset_id,
+                shard.start_date,
+                shard.end_date,
+                dimensions,
+                metrics,
+                organisation_id=organisation_id,
+            )
+            for shard in shards
+        )
+
+        return self.merge_shards_results(shards_results, dimensions, metrics)
+
+    def merge_shards_results(self, shards_results: list[list[dict]], dimensions, metrics):
+        """rows of all shards, metrics of the same dimension values are summed.
+        The values are text as in the rows of get_data"""
+        results_df = pd.DataFrame([row for rows in shards_results for row in rows])
+        if len(results_df) == 0:
+            return []
+
+        results_df[metrics] = results_df[metrics].apply(pd.to_numeric)
+        results_df = (
+            results_df.groupby(dimensions, sort=False, dropna=False)[metrics]
+            .sum()
+            .reset_index()
+        )
+        return results_df.astype(str).to_dict("records")
+
+    def get_data_in_pages(
+        self,
+        dataset_id: str,
+        start_date: date,
+        end_date: date,
+        dimensions,
+        metrics,
+        organisation_id: str = "",
+        page_size: int = None,
+    ):
+        """Get data from google analytics as a stream of dataframes, one per page.
+        Only a single page is held in memory at a time.
+        page_size defaults to PageSize in app_settings
+        """
+        if page_size is None:
+            page_size = self.settings_helper.get_google_analytics_page_size()
+        filter_clause = self.get_filter_clause(
+            dataset_id, start_date, end_date, organisation_id, page_size
+        )
+        request_config = GoogleAnalyticsRequestConfig(dimensions, metrics)
+        yield from self.get_data_frames(request_config, filter_clause)
+
+    def get_data_frames(
+        self,
+        request_config: GoogleAnalyticsRequestConfig,
+        filter_clause: GoogleAnalyticsFilterClause,
+    ):
+        """yields a typed dataframe for each page of the report"""
+        for page in self.google_analytics_repository.get_data_pages(
+            property_id=self.property_id,
+            request_config=request_config,
+            filter_clause=filter_clause,
+            as_data_frame=True,
+        ):
+            yield self.pandas_helper.convert_data_types(page)
+
+    def save_data_to_csv(
+        self,
+        file_path: str,
+        dataset_id: str,
+        start_date: date,
+        end_date: date,
+        dimensions,
+        metrics,
+        organisation_id: str = "",
+        page_size: int = None,
+    ) -> int:
+        """Stream data from google analytics straight to csv file,
+        each page is appended as it arrives. Returns the number of rows saved
+        """
+        self.file_helper.create_directory_excluding_filename(file_path)
+        rows_count = 0
+        is_header_written = False
+        with open(file_path, "w", encoding="UTF-8", newline="") as file_obj:
+            for page_df in self.get_data_in_pages(
+                dataset_id,
+                start_date,
+                end_date,
+                dimensions,
+                metrics,
+                organisation_id=organisation_id,
+                page_size=page_size,
+            ):
+                page_df.to_csv(file_obj, index=False, header=not is_header_written)
+                is_header_written = True
+                rows_count += len(page_df)
+
+        return rows_count
+
     # pylint: enable=too-many-arguments
     # pylint: enable=too-many-positional-arguments
 
@@ -73,10 +264,13 @@ class GoogleAnalyticsService:
         organisation_id: str = "",
         additional_dimensions: list[str] = None,
         additional_metrics: list[str] = None,
+        shard_frequency: DataFrequency = None,
     ):
         """get session data with landing page
         additional dimensions could be "eventName", "date"
         additional metrics could be "eventCount"
+        shard_frequency: split long date ranges into concurrent requests
+        of week or month, eg. DataFrequency.MONTHLY
         """
         dimensions = ["customEvent:DatasetID", "landingPage"]
         if additional_dimensions:
@@ -86,6 +280,17 @@ class GoogleAnalyticsService:
         if additional_metrics:
             metrics.extend(additional_metrics)
 
+        if shard_frequency is not None:
+            return self.get_data_sharded(
+                dataset_id,
+                start_date,
+                end_date,
+                dimensions,
+                metrics,
+                organisation_id=organisation_id,
+                shard_frequency=shard_frequency,
+            )
+
         return self.get_data(
             dataset_id,
             start_date,
@@ -140,18 +345,150 @@ class GoogleAnalyticsService:
     # pylint: enable=too-many-arguments
     # pylint: enable=too-many-positional-arguments
 
-    def get_sessions_by_organisation_ids(
-        self, start_date: date, end_date: date, organisation_ids: list[str], n_jobs=5
+    def get_organisation_id_from_landing_page(self, landing_page: str):
+        """extract organisation id from landing page of format /org/<id>-<name>"""
+        match = ORGANISATION_LANDING_PAGE_PATTERN.match(landing_page)
+        if match is None:
+            return None
+        return match.group(1)
+
+    def get_organisations_report_request(
+        self, start_date: date, end_date: date, organisation_ids: list[str]
     ):
-        """get sessions by organisation ids"""
-        total_count = len(organisation_ids)
-        return Parallel(n_jobs=n_jobs)(
-            delayed(self.get_sessions_by_organisation_id)(
-                start_date, end_date, organisation_id, row_count, total_count
+        """single report request for sessions of many organisations"""
+        filter_clause = self.get_filter_clause("", start_date, end_date)
+        filter_clause.set_organisation_ids(organisation_ids)
+        request_config = GoogleAnalyticsRequestConfig(
+            ["customEvent:DatasetID", "landingPage"], ["sessions"]
+        )
+        return request_config, filter_clause
+
+    def get_sessions_of_all_organisations(
+        self, start_date: date, end_date: date, page_size: int = None
+    ) -> pd.Series:
+        """get sessions of every organisation from a single paginated report grouped by
+        landing page. The organisation id is parsed from the landing page and the
+        sessions are summed per organisation id, page by page.
+        Returns series of sessions count indexed by organisation id
+        """
+        if page_size is None:
+            page_size = self.settings_helper.get_google_analytics_page_size()
+        filter_clause = self.get_filter_clause("", start_date, end_date, page_size=page_size)
+        filter_clause.set_landing_page_prefix("/org/")
+        request_config = GoogleAnalyticsRequestConfig(
+            ["customEvent:DatasetID", "landingPage"], ["sessions"]
+        )
+
+        sessions_per_page = []
+        for page_df in self.get_data_frames(request_config, filter_clause):
+            page_df["organisation_id"] = page_df["landingPage"].str.extract(
+                ORGANISATION_LANDING_PAGE_PATTERN, expand=False
+            )
+            sessions_per_page.append(page_df.groupby("organisation_id")["sessions"].sum())
+
+        if len(sessions_per_page) == 0:
+            return pd.Series(dtype="int64", name="sessions")
+
+        return pd.concat(sessions_per_page).groupby(level=0).sum()
+
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def get_sessions_counts_in_batches(
+        self,
+        start_date: date,
+        end_date: date,
+        organisation_ids: list[str],
+        n_jobs=5,
+        organisations_per_report=ORGANISATIONS_PER_REPORT,
+    ) -> dict:
+        """get sessions count of each organisation id.
+        The organisation ids are packed into reports of organisations_per_report ids,
+        which are sent 5 reports per batchRunReports call. The landing pages of the
+        reports are then split back per organisation.
+        n_jobs: number of batchRunReports calls running concurrently
+        """
+        report_requests = [
+            self.get_organisations_report_request(start_date, end_date, ids_chunk)
+            for ids_chunk in self.list_helper.split_into_chunks(
+                organisation_ids, organisations_per_report
+            )
+        ]
+        batches = self.list_helper.split_into_chunks(
+            report_requests, MAXIMUM_BATCH_SIZE
+        )
+        self.log.info(
+            "Sessions of %s organisations in %s reports, %s batch requests",
+            len(organisation_ids),
+            len(report_requests),
+            len(batches),
+        )
+        # threads share the pooled google analytics client of the process
+        batch_results = Parallel(n_jobs=n_jobs, prefer="threads")(
+            delayed(self.google_analytics_repository.get_batch_data)(
+                self.property_id, batch
             )
-            for row_count, organisation_id in enumerate(organisation_ids)
+            for batch in batches
         )
 
+        sessions_counts = {o: 0 for o in organisation_ids}
+        for reports in batch_results:
+            for rows in reports:
+                for row in rows:
+                    organisation_id = self.get_organisation_id_from_landing_page(
+                        row.get("landingPage", "")
+                    )
+                    if organisation_id in sessions_counts:
+                        sessions_counts[organisation_id] += int(row.get("sessions", 0))
+
+        return sessions_counts
+
+    def get_sessions_by_organisation_ids(
+        self,
+        start_date: date,
+        end_date: date,
+        organisation_ids: list[str],
+        n_jobs=5,
+        organisations_per_report=ORGANISATIONS_PER_REPORT,
+        all_organisations_threshold: int = None,
+    ):
+        """get sessions by organisation ids
+        When there are more organisations than all_organisations_threshold
+        (AllOrganisationsThreshold in app_settings), the sessions of all organisations
+        are pulled in a single report, else the organisation ids are filtered in batches.
+        """
+        if all_organisations_threshold is None:
+            all_organisations_threshold = (
+                self.settings_helper.get_google_analytics_all_organisations_threshold()
+            )
+        # each organisation is requested once, even if it is repeated in the list
+        unique_organisation_ids = list(dict.fromkeys(str(o) for o in organisation_ids))
+
+        if len(unique_organisation_ids) > all_organisations_threshold:
+            self.log.info(
+                "Sessions of %s organisations from all organisations report",
+                len(unique_organisation_ids),
+            )
+            all_sessions = self.get_sessions_of_all_organisations(start_date, end_date)
+            sessions_counts = {
+                o: int(all_sessions.get(o, 0)) for o in unique_organisation_ids
+            }
+        else:
+            sessions_counts = self.get_sessions_counts_in_batches(
+                start_date,
+                end_date,
+                unique_organisation_ids,
+                n_jobs=n_jobs,
+                organisations_per_report=organisations_per_report,
+            )
+
+        return [
+            {"organisation_id": o, "sessions_count": sessions_counts[str(o)]}
+            for o in organisation_ids
+        ]
+
+    # pylint: enable=too-many-arguments
+    # pylint: enable=too-many-positional-arguments
+
     def get_sessions_by_organisation_ids_as_df(
         self,
         start_date: date,
@@ -168,6 +505,53 @@ class GoogleAnalyticsService:
         )
         return pd.DataFrame(sessions)
 
+    def get_sessions_by_data_module(
+        self, dataset_id: str, start_date: date, end_date: date, module: DataModule
+    ):
+        """get sessions data for the dimensions of data module"""
+        if module not in DATA_MODULE_DIMENSIONS:
+            raise ValueError(f"{module} is not supported")
+
+        return self.get_data(
+            dataset_id, start_date, end_date, DATA_MODULE_DIMENSIONS[module], ["sessions"]
+        )
+
+    def get_sessions_by_data_module_as_df(
+        self, dataset_id: str, start_date: date, end_date: date, module: DataModule
+    ):
+        """get sessions data for the dimensions of data module as dataframe"""
+        results = self.get_sessions_by_data_module(dataset_id, start_date, end_date, module)
+        return self.pandas_helper.convert_data_types(pd.DataFrame(results))
+
+    def get_dataset_breakdowns(
+        self,
+        dataset_id: str,
+        start_date: date,
+        end_date: date,
+        modules: list[DataModule] = None,
+    ) -> dict:
+        """get sessions of dataset broken down by each data module.
+        The reports are sent together, 5 reports per batchRunReports call,
+        instead of a request per data module.
+        Returns typed dataframe of each data module
+        """
+        if modules is None:
+            modules = DATASET_BREAKDOWN_MODULES
+
+        unsupported_modules = [m for m in modules if m not in DATA_MODULE_DIMENSIONS]
+        if unsupported_modules:
+            raise ValueError(f"{unsupported_modules} are not supported")
+
+        filter_clause = self.get_filter_clause(dataset_id, start_date, end_date)
+        requests = [
+            (GoogleAnalyticsRequestConfig(DATA_MODULE_DIMENSIONS[m], ["sessions"]), filter_clause)
+            for m in modules
+        ]
+        reports = self.google_analytics_repository.get_batch_data(
+            self.property_id, requests, as_data_frame=True
+        )
+        return dict(zip(modules, reports))
+
     def get_sessions_by_age(self, dataset_id: str, start_date: date, end_date: date):
         """get sessions data by age"""
         dimensions = ["customEvent:DatasetID", "userAgeBracket"]
@@ -223,3 +607,7 @@ class GoogleAnalyticsService:
         """get sessions by medium as dataframe"""
         results = self.get_sessions_by_medium(dataset_id, start_date, end_date)
         return pd.DataFrame(results)
+
+
+# pylint: enable=too-many-instance-attributes
+# pylint: enable=too-many-public-methods
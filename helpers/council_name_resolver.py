@@ -0,0 +1,95 @@
+"""Resolve council names to dataset ids"""
+
+import re
+from collections import Counter, defaultdict
+
+# words of council names which do not identify the council,
+# eg. City of Burnside, Adelaide Hills Council, District Council of Mount Barker
+COUNCIL_STOP_WORDS = {
+    "the",
+    "of",
+    "city",
+    "town",
+    "council",
+    "district",
+    "regional",
+    "municipal",
+    "corporation",
+    "shire",
+}
+NON_ALPHANUMERIC_PATTERN = re.compile(r"[^a-z0-9]+")
+
+
+class CouncilNameResolver:
+    """Resolves council names to the datasets of cu dataset pdf.
+    Council names are normalised (lowercase, punctuation and words such as
+    "City of" or "Council" removed) and indexed by trigrams once, then every council
+    name is ranked by the trigram similarity of the normalised names.
+    """
+
+    def __init__(self, datasets: list[dict], minimum_score: float = 0.3) -> None:
+        """
+        datasets: dataset_id and council_name of each dataset
+        minimum_score: matches with lower similarity are not returned
+        """
+        self.minimum_score = minimum_score
+        self.datasets_by_name = defaultdict(list)
+        for dataset in datasets:
+            name = self.normalise_council_name(dataset["council_name"])
+            self.datasets_by_name[name].append(dataset)
+
+        self.names = list(self.datasets_by_name)
+        self.trigrams = [self.get_trigrams(name) for name in self.names]
+        self.trigram_index = defaultdict(list)
+        for name_index, trigrams in enumerate(self.trigrams):
+            for trigram in trigrams:
+                self.trigram_index[trigram].append(name_index)
+
+    def normalise_council_name(self, council_name: str) -> str:
+        """lowercase words of council name without punctuation and stop words"""
+        words = NON_ALPHANUMERIC_PATTERN.sub(" ", str(council_name).lower()).split()
+        tokens = [w for w in words if w not in COUNCIL_STOP_WORDS]
+        # names made only of stop words, eg. "City Council", are kept as they are
+        return " ".join(tokens or words)
+
+    def get_trigrams(self, name: str) -> set[str]:
+        """trigrams of name padded with spaces"""
+        padded_name = f"  {name} "
+        return {padded_name[i : i + 3] for i in range(len(padded_name) - 2)}
+
+    def resolve(self, council_name: str, limit: int = 5) -> list[dict]:
+        """datasets matching council name, best match first.
+        Each match has dataset_id, council_name and score between 0 and 1"""
+        scores = self.get_similarity_scores(self.normalise_council_name(council_name))
+
+        ranked_names = sorted(
+            (i for i, score in scores.items() if score >= self.minimum_score),
+            key=lambda i: (-scores[i], self.names[i]),
+        )
+        matches = [
+            {**dataset, "score": scores[i]}
+            for i in ranked_names
+            for dataset in self.datasets_by_name[self.names[i]]
+        ]
+        return matches[:limit]
+
+    def get_similarity_scores(self, name: str) -> dict:
+        """jaccard similarity of trigrams of name and of names sharing a trigram"""
+        trigrams = self.get_trigrams(name)
+        shared_trigrams_counts = Counter(
+            name_index
+            for trigram in trigrams
+            for name_index in self.trigram_index.get(trigram, [])
+        )
+        return {
+            name_index: shared_count
+            / (len(trigrams) + len(self.trigrams[name_index]) - shared_count)
+            for name_index, shared_count in shared_trigrams_counts.items()
+        }
+
+    def resolve_many(self, council_names: list[str], limit: int = 1) -> dict:
+        """ranked datasets of each council name"""
+        return {
+            council_name: self.resolve(council_name, limit)
+            for council_name in dict.fromkeys(council_names)
+        }
@@ -1,16 +1,62 @@
 """read CU dataset reader to identify council name and dataset id"""
 
+import hashlib
+from bisect import bisect_right
+import json
+import logging
+import math
+import os
+from threading import Lock
 import pandas as pd
+from joblib import Parallel, delayed, cpu_count
 from PyPDF2 import PdfReader
 
+from helpers.council_name_resolver import CouncilNameResolver
+from helpers.list_helper import ListHelper
 
+# starting worker processes takes longer than extracting a few pages,
+# pdfs of fewer pages are extracted in the current process
+DEFAULT_MINIMUM_PAGES_PER_JOB = 50
+
+
+def extract_pages_text(file_path: str, page_indexes: list[int]) -> list[str]:
+    """text of pages of pdf, run in worker processes"""
+    reader = PdfReader(file_path)
+    return [reader.pages[i].extract_text() for i in page_indexes]
+
+
+# pylint: disable=too-many-instance-attributes
 class CuDatasetReader():
-    """read cu dataset pdf"""
+    """read cu dataset pdf
+    The datasets parsed from the pdf are cached in memory of the process and in a json
+    file next to the pdf, keyed by modified time, size and sha256 of the pdf.
+    The council name index and resolver are built once per version of the datasets
+    and kept on the reader
+    """
 
-    def __init__(self, file_path='./settings/cu_dataset.pdf') -> None:
+    # file path: (pdf fingerprint, datasets) of the pdfs parsed by the process
+    _datasets_cache = {}
+    _datasets_cache_lock = Lock()
+
+    def __init__(self, file_path='./settings/cu_dataset.pdf', n_jobs=-1,
+                 minimum_pages_per_job=DEFAULT_MINIMUM_PAGES_PER_JOB) -> None:
+        """
+        n_jobs: processes extracting the pages of pdf, -1 uses every core
+        minimum_pages_per_job: smaller pdfs are extracted in the current process
+        """
         self.file_path = file_path
+        self.n_jobs = n_jobs
+        self.minimum_pages_per_job = minimum_pages_per_job
+        self.list_helper = ListHelper()
+        self.cache_file_path = f'{os.path.splitext(file_path)[0]}_datasets.json'
         self.row_identifier = 'support@sacommu'
         self.page_header_identifier = 'https://sacommunity.org/admin/settings/datasets'
+        self.log = logging.getLogger(__name__)
+        self.lock = Lock()
+        # datasets indexed by council name, built again when the datasets change
+        self.council_name_index = None
+        # (datasets, resolver) of the datasets the resolver was built from
+        self.council_name_resolver = None
 
     def remove_texts(self, text: str, texts_to_remove: list[str]):
         """remove texts from text"""
@@ -19,46 +65,182 @@ class CuDatasetReader():
 
         return text
 
-    def read_cu_dataset_settings_pdf(self, return_dataframe=False):
-        """read CU dataset: CU datasets settings _ SAcommunity - Connecting Up Australia.pdf"""
+    def parse_page(self, page_text: str, page_number: int, total_pages: int) -> list[dict]:
+        """datasets of a single page. The page number printed in the header of page
+        is removed from the rows, so that pages are parsed independently"""
         texts_to_remove = [
             self.row_identifier,
             self.page_header_identifier,
             'nity.org',
             'support@sacommu'
         ]
+        page_lines = page_text.splitlines()
+        if any(self.page_header_identifier in line for line in page_lines):
+            texts_to_remove.append(f'{page_number}/{total_pages}')
 
-        reader = PdfReader(self.file_path)
-        total_pages = len(reader.pages)
         datasets = []
-        for i, page in enumerate(reader.pages):
-            page_lines = page.extract_text().splitlines()
-
-            for page_line in page_lines:
-                if self.page_header_identifier in page_line:
-                    page_number = f'{i+1}/{total_pages}'
-                    texts_to_remove.append(page_number)
-                if self.row_identifier in page_line:
-                    row_text = self.remove_texts(page_line, texts_to_remove)
-                    row_text = row_text.split()
-                    row_text = [s.strip() for s in row_text]
-                    dataset_id = row_text[0]
-                    council_name = ' '.join(row_text[1:])
-                    datasets.append({'dataset_id': dataset_id,
-                                    'council_name': council_name})
+        for page_line in page_lines:
+            if self.row_identifier in page_line:
+                row_text = self.remove_texts(page_line, texts_to_remove)
+                row_text = row_text.split()
+                row_text = [s.strip() for s in row_text]
+                dataset_id = row_text[0]
+                council_name = ' '.join(row_text[1:])
+                datasets.append({'dataset_id': dataset_id,
+                                'council_name': council_name})
+
+        return datasets
+
+    def extract_pages_text(self, total_pages: int, n_jobs: int) -> list[str]:
+        """text of every page in page order. Pages are split into a chunk per
+        process, and extracted in parallel when there are enough pages"""
+        n_jobs = cpu_count() if n_jobs < 0 else max(1, n_jobs)
+        pages_per_job = max(self.minimum_pages_per_job, math.ceil(total_pages / n_jobs))
+        page_chunks = self.list_helper.split_into_chunks(
+            list(range(total_pages)), pages_per_job)
+        if len(page_chunks) <= 1:
+            return extract_pages_text(self.file_path, list(range(total_pages)))
+
+        texts_per_chunk = Parallel(n_jobs=len(page_chunks))(
+            delayed(extract_pages_text)(self.file_path, page_indexes)
+            for page_indexes in page_chunks
+        )
+        return [text for texts in texts_per_chunk for text in texts]
+
+    def read_cu_dataset_settings_pdf(self, return_dataframe=False, n_jobs=None):
+        """read CU dataset: CU datasets settings _ SAcommunity - Connecting Up Australia.pdf
+        n_jobs: processes extracting the pages, defaults to n_jobs of reader"""
+        if n_jobs is None:
+            n_jobs = self.n_jobs
+
+        total_pages = len(PdfReader(self.file_path).pages)
+        datasets = []
+        for i, page_text in enumerate(self.extract_pages_text(total_pages, n_jobs)):
+            datasets.extend(self.parse_page(page_text, i + 1, total_pages))
 
         if return_dataframe:
             return pd.DataFrame(datasets)
 
         return datasets
 
+    def get_file_stat(self) -> dict:
+        """modified time and size of pdf"""
+        file_stat = os.stat(self.file_path)
+        return {'modified_time': file_stat.st_mtime_ns, 'size': file_stat.st_size}
+
+    def get_file_hash(self) -> str:
+        """sha256 of pdf"""
+        sha256 = hashlib.sha256()
+        with open(self.file_path, 'rb') as file_obj:
+            for chunk in iter(lambda: file_obj.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def is_fingerprint_valid(self, fingerprint: dict, file_stat: dict) -> bool:
+        """pdf is unchanged. Hash is compared only when modified time or size differ"""
+        if fingerprint is None:
+            return False
+        if all(fingerprint.get(k) == v for k, v in file_stat.items()):
+            return True
+        return fingerprint.get('sha256') == self.get_file_hash()
+
+    def read_cache_file(self):
+        """(fingerprint, datasets) from json file, None if not found or corrupt"""
+        if not os.path.exists(self.cache_file_path):
+            return None
+        try:
+            with open(self.cache_file_path, 'r', encoding='UTF-8') as file_obj:
+                cache = json.load(file_obj)
+        except json.JSONDecodeError as ex:
+            self.log.warning('Ignoring corrupt cu datasets cache %s: %s',
+                             self.cache_file_path, ex)
+            return None
+        return cache.get('fingerprint'), cache.get('datasets')
+
+    def write_cache_file(self, fingerprint: dict, datasets: list[dict]):
+        """save datasets to json file atomically"""
+        temp_file_path = f'{self.cache_file_path}.tmp'
+        with open(temp_file_path, 'w', encoding='UTF-8') as file_obj:
+            json.dump({'fingerprint': fingerprint, 'datasets': datasets}, file_obj)
+        os.replace(temp_file_path, self.cache_file_path)
+
+    def get_datasets(self) -> list[dict]:
+        """datasets of pdf, parsed only when the pdf changes"""
+        file_stat = self.get_file_stat()
+        with self._datasets_cache_lock:
+            fingerprint, datasets = self._datasets_cache.get(self.file_path, (None, None))
+            if self.is_fingerprint_valid(fingerprint, file_stat):
+                # pdf was touched without changing, the hash is not computed again
+                self._datasets_cache[self.file_path] = ({**fingerprint, **file_stat}, datasets)
+                return datasets
+
+            fingerprint, datasets = self.read_cache_file() or (None, None)
+            if self.is_fingerprint_valid(fingerprint, file_stat):
+                # pdf was touched without changing, keep its new modified time
+                fingerprint = {**fingerprint, **file_stat}
+            else:
+                self.log.info('Parsing cu datasets from %s', self.file_path)
+                datasets = self.read_cu_dataset_settings_pdf(return_dataframe=False)
+                fingerprint = {**file_stat, 'sha256': self.get_file_hash()}
+            self.write_cache_file(fingerprint, datasets)
+
+            self._datasets_cache[self.file_path] = (fingerprint, datasets)
+            return datasets
+
+    def build_council_name_index(self, datasets: list[dict]) -> dict:
+        """lowercase council names of datasets joined by new lines, so that the first
+        council name containing a text is found by a single str.find,
+        and the offset of each name in the text"""
+        names = [d['council_name'].lower().replace('\n', ' ') for d in datasets]
+        offsets = []
+        offset = 0
+        for name in names:
+            offsets.append(offset)
+            offset += len(name) + 1
+        return {'datasets': datasets, 'names_text': '\n'.join(names), 'offsets': offsets}
+
+    def get_council_name_index(self) -> dict:
+        """council name index of the current datasets"""
+        datasets = self.get_datasets()
+        with self.lock:
+            if self.council_name_index is None or \
+                    self.council_name_index['datasets'] is not datasets:
+                self.council_name_index = self.build_council_name_index(datasets)
+            return self.council_name_index
+
     def search_dataset_id_from_council_name(self, council_name: str):
         """search dataset pdf for council and returns dataset id"""
-        datasets = self.read_cu_dataset_settings_pdf(return_dataframe=False)
-        # return datasets_df[datasets_df["council_name"].str.contains(council_name, case=False)]
-        datasets = [
-            d for d in datasets if council_name in d['council_name'].lower()]
-        if len(datasets) == 0:
-            return None
+        return self.search_dataset_ids_from_council_names([council_name])[council_name]
+
+    def search_dataset_ids_from_council_names(self, council_names: list[str]) -> dict:
+        """search datasets of many councils with a single parse of dataset pdf.
+        Returns the first dataset containing each council name, None if not found"""
+        council_name_index = self.get_council_name_index()
+        results = {}
+        for council_name in council_names:
+            search_text = council_name.lower()
+            position = -1
+            if council_name_index['datasets'] and '\n' not in search_text:
+                position = council_name_index['names_text'].find(search_text)
+            results[council_name] = None
+            if position >= 0:
+                dataset_index = bisect_right(council_name_index['offsets'], position) - 1
+                results[council_name] = council_name_index['datasets'][dataset_index]
+        return results
+
+    def get_council_name_resolver(self) -> CouncilNameResolver:
+        """resolver indexing the council names of the current datasets"""
+        datasets = self.get_datasets()
+        with self.lock:
+            if self.council_name_resolver is None or \
+                    self.council_name_resolver[0] is not datasets:
+                self.council_name_resolver = (datasets, CouncilNameResolver(datasets))
+            return self.council_name_resolver[1]
+
+    def resolve_council_names(self, council_names: list[str], limit: int = 1) -> dict:
+        """ranked datasets of each council name, matching similar names such as
+        "Burnside" and "City of Burnside" """
+        return self.get_council_name_resolver().resolve_many(council_names, limit)
+
 
-        return datasets[0]
+# pylint: enable=too-many-instance-attributes
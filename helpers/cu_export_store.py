@@ -0,0 +1,137 @@
+"""
+Indexed store of the sa community (cu) export
+"""
+
+import logging
+import os
+from threading import Lock
+import pandas as pd
+
+# data types of the columns used from the export, other columns are inferred
+CU_EXPORT_DTYPES = {
+    "ID_19": "Int64",
+    "Org_name": "string",
+    "Street_Address_Line_1": "string",
+    "Suburb": "string",
+    "Organisati_Council": "string",
+    "Organisati_Electorate_State_": "string",
+    "Organisati_Electorate_Federal_": "string",
+}
+
+
+class CuExportStore:
+    """Loads the cu export csv (sacommunity.org/export) once per process,
+    and again when the modified time of the csv changes.
+    The csv is converted to a parquet file next to it on first load, which is read
+    instead of the csv until the csv changes.
+    Organisations are indexed by ID_19 (first row of each id), council and suburb.
+    The store is shared, the returned dataframes are copies which can be modified.
+    """
+
+    _shared_stores = {}
+    _shared_stores_lock = Lock()
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self.cache_file_path = f"{os.path.splitext(file_path)[0]}.parquet"
+        self.log = logging.getLogger(__name__)
+        self.lock = Lock()
+        self.cu_export_df = None
+        self.indexes = None
+        self.modified_time = None
+
+    @classmethod
+    def shared(cls, file_path: str):
+        """returns the store of file path shared by the current process"""
+        with cls._shared_stores_lock:
+            store = cls._shared_stores.get(file_path)
+            if store is None:
+                store = cls(file_path)
+                cls._shared_stores[file_path] = store
+            return store
+
+    def is_cache_valid(self) -> bool:
+        """parquet file is newer than the csv"""
+        return os.path.exists(self.cache_file_path) and os.path.getmtime(
+            self.cache_file_path
+        ) >= os.path.getmtime(self.file_path)
+
+    def read_cu_export(self) -> pd.DataFrame:
+        """read export from parquet cache, or from csv and save the parquet cache"""
+        if self.is_cache_valid():
+            self.log.debug("Reading cu export from %s", self.cache_file_path)
+            return pd.read_parquet(self.cache_file_path)
+
+        self.log.info("Reading cu export from %s", self.file_path)
+        cu_export_df = pd.read_csv(self.file_path, dtype=CU_EXPORT_DTYPES)
+        temp_file_path = f"{self.cache_file_path}.tmp"
+        cu_export_df.to_parquet(temp_file_path, index=False)
+        os.replace(temp_file_path, self.cache_file_path)
+        return cu_export_df
+
+    def build_indexes(self, cu_export_df: pd.DataFrame) -> dict:
+        """hash indexes of organisation id, council and suburb"""
+        indexes = {
+            "ID_19": cu_export_df.dropna(subset=["ID_19"])
+            .drop_duplicates("ID_19")
+            .set_index("ID_19")
+        }
+        for column in ["Organisati_Council", "Suburb"]:
+            if column in cu_export_df.columns:
+                keys = self.normalise_key(cu_export_df[column])
+                indexes[column] = keys.groupby(keys, sort=False).indices
+        return indexes
+
+    def normalise_key(self, values: pd.Series) -> pd.Series:
+        """council and suburb are looked up case insensitively"""
+        return values.astype("string").str.strip().str.lower().fillna("")
+
+    def load(self):
+        """load export and indexes, loaded again when the csv changed"""
+        modified_time = os.stat(self.file_path).st_mtime_ns
+        with self.lock:
+            if self.cu_export_df is None or self.modified_time != modified_time:
+                cu_export_df = self.read_cu_export()
+                self.indexes = self.build_indexes(cu_export_df)
+                self.cu_export_df = cu_export_df
+                self.modified_time = modified_time
+            return self.cu_export_df, self.indexes
+
+    def get_data_frame(self) -> pd.DataFrame:
+        """all rows of export"""
+        cu_export_df, _ = self.load()
+        return cu_export_df.copy()
+
+    def get_organisations_by_id(self) -> pd.DataFrame:
+        """first row of each organisation id, indexed by ID_19"""
+        _, indexes = self.load()
+        return indexes["ID_19"].copy()
+
+    def get_organisation(self, org_id: int):
+        """row of organisation id as dict, None if not found"""
+        _, indexes = self.load()
+        if org_id not in indexes["ID_19"].index:
+            return None
+        return indexes["ID_19"].loc[org_id].to_dict()
+
+    def get_organisations(self, org_ids: list[int]) -> pd.DataFrame:
+        """rows of organisation ids found in export"""
+        _, indexes = self.load()
+        organisations_df = indexes["ID_19"]
+        return organisations_df[organisations_df.index.isin(org_ids)].copy()
+
+    def get_rows_by_index(self, column: str, value: str) -> pd.DataFrame:
+        """rows of value in council or suburb index"""
+        cu_export_df, indexes = self.load()
+        positions = indexes[column].get(
+            self.normalise_key(pd.Series([value])).iloc[0], []
+        )
+        return cu_export_df.iloc[positions].copy()
+
+    def get_organisations_by_council(self, council: str) -> pd.DataFrame:
+        """rows of council"""
+        return self.get_rows_by_index("Organisati_Council", council)
+
+    def get_organisations_by_suburb(self, suburb: str) -> pd.DataFrame:
+        """rows of suburb"""
+        return self.get_rows_by_index("Suburb", suburb)
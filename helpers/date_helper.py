@@ -1,5 +1,7 @@
 """Date helpers"""
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from dtos.date_range_dto import DateRangeDto
+from helpers.enums import DataFrequency
 
 
 class DateHelper():
@@ -34,3 +36,47 @@ class DateHelper():
     def convert_yyyy_mm_dd_hh_mm_ss_to_date(self, date_str: str) -> datetime:
         """convert datetime strting to datetime obj"""
         return datetime.strptime(date_str, self.yyyy_mm_dd_hh_mm_ss_format)
+
+
+    def get_period_start(self, date_obj: date, data_frequency: DataFrequency) -> date:
+        """first day of the period (day, week starting monday, month, year) of the date"""
+        if data_frequency == DataFrequency.DAILY:
+            return date_obj
+        if data_frequency == DataFrequency.WEEKLY:
+            return date_obj - timedelta(days=date_obj.weekday())
+        if data_frequency == DataFrequency.MONTHLY:
+            return date_obj.replace(day=1)
+        if data_frequency == DataFrequency.YEARLY:
+            return date_obj.replace(month=1, day=1)
+
+        raise ValueError(f"DataFrequency: {data_frequency} is not supported")
+
+    def get_period_end(self, date_obj: date, data_frequency: DataFrequency) -> date:
+        """last day of the period (day, week ending sunday, month, year) of the date"""
+        period_start = self.get_period_start(date_obj, data_frequency)
+        if data_frequency == DataFrequency.DAILY:
+            return period_start
+        if data_frequency == DataFrequency.WEEKLY:
+            return period_start + timedelta(days=6)
+        if data_frequency == DataFrequency.MONTHLY:
+            next_month_start = (period_start + timedelta(days=31)).replace(day=1)
+            return next_month_start - timedelta(days=1)
+
+        return period_start.replace(month=12, day=31)
+
+    def split_date_range(self, date_range: DateRangeDto,
+                         data_frequency: DataFrequency) -> list[DateRangeDto]:
+        """split date range into consecutive periods of data frequency.
+        The first and last periods are clipped to the date range"""
+        if date_range.start_date > date_range.end_date:
+            raise ValueError("start date is after end date")
+
+        date_ranges = []
+        start_date = date_range.start_date
+        while start_date <= date_range.end_date:
+            end_date = min(self.get_period_end(start_date, data_frequency),
+                           date_range.end_date)
+            date_ranges.append(DateRangeDto(start_date=start_date, end_date=end_date))
+            start_date = end_date + timedelta(days=1)
+
+        return date_ranges
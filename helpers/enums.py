@@ -28,9 +28,25 @@ class DataModule(Enum):
     SOURCE_MEDIUM = 5
     LANDING_PAGE_CLEANED = 6
     LANGING_PAGE_ERRORS = 7
+    SOURCE = 8
+    MEDIUM = 9
 
 class GoogleApiVersion(Enum):
     """Api Version"""
     DEFAULT = 0
     VERSION_3 = 3
     VERSION_4 = 4
+
+
+class StorageFormat(Enum):
+    """file format of saved dataframes"""
+    CSV = 1
+    PARQUET = 2
+    FEATHER = 3
+
+
+class FsyncPolicy(Enum):
+    """when written files are synced to disk"""
+    NEVER = 1
+    ON_CLOSE = 2
+    ON_FLUSH = 3
@@ -21,3 +21,7 @@ class EnvironmentHelper:
     def get_or_default(self, key: str, default):
         """get the value of environment helper or return default"""
         return os.environ.get(key, default)
+
+    def get_by_prefix(self, prefix: str) -> dict:
+        """environment variables starting with prefix"""
+        return {k: v for k, v in os.environ.items() if k.startswith(prefix)}
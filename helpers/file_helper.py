@@ -6,17 +6,37 @@ from datetime import date
 import pandas as pd
 import jsonlines
 
-from helpers.enums import DataModule
+from helpers.enums import DataModule, StorageFormat
+from helpers.pandas_helper import PandasHelper
 from helpers.settings_helper import SettingsHelper
 from helpers.string_helper import StringHelper
 
+# file extension of each storage format
+STORAGE_FORMAT_EXTENSIONS = {
+    StorageFormat.CSV: ".csv",
+    StorageFormat.PARQUET: ".parquet",
+    StorageFormat.FEATHER: ".feather",
+}
+DEFAULT_STORAGE_FORMAT = StorageFormat.CSV
+# compression of parquet and feather files, snappy is faster to write, zstd is smaller
+DEFAULT_COMPRESSION = "zstd"
 
-class FileHelper:
-    """helper methods for file handling"""
 
-    def __init__(self) -> None:
+# pylint: disable=too-many-public-methods
+class FileHelper:
+    """helper methods for file handling.
+    Data files are saved in storage_format, csv by default for analysts.
+    The partitions and run files of google analytics use parquet, which keeps the data
+    types and reads only the requested columns and row groups.
+    """
+
+    def __init__(self, storage_format: StorageFormat = DEFAULT_STORAGE_FORMAT,
+                 compression: str = DEFAULT_COMPRESSION) -> None:
         self.settings_helper = SettingsHelper()
         self.string_helper = StringHelper()
+        self.pandas_helper = PandasHelper()
+        self.storage_format = storage_format
+        self.compression = compression
 
     def create_directory(self, dir_path: str):
         """create directory"""
@@ -44,10 +64,17 @@ class FileHelper:
         day_str = str(date_obj.day).zfill(2)
         return f"{date_obj.year}_{month_str}_{day_str}"
 
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
     def get_data_path(
-        self, root_dir, data_frequency_name: str, module_name: str, date_obj: date
+        self,
+        root_dir,
+        data_frequency_name: str,
+        module_name: str,
+        date_obj: date,
+        storage_format: StorageFormat = None,
     ):
-        """get data path
+        """get data path, the extension is of storage format (default of file helper)
         Note: cannot have DataFrequency object because of circular dependency
         """
         month_str = str(date_obj.month).zfill(2)
@@ -61,10 +88,32 @@ class FileHelper:
             month_str,
             day_str,
         )
-        file_name = f"{date_obj.year}_{month_str}_{day_str}.csv"
+        file_name = f"{date_obj.year}_{month_str}_{day_str}{self.get_extension(storage_format)}"
         full_path = os.path.join(data_dir_path, file_name)
         return full_path
 
+    # pylint: enable=too-many-arguments
+    # pylint: enable=too-many-positional-arguments
+
+    def get_extension(self, storage_format: StorageFormat = None) -> str:
+        """file extension of storage format, default storage format of file helper"""
+        return STORAGE_FORMAT_EXTENSIONS[storage_format or self.storage_format]
+
+    def get_storage_format(self, file_path: str) -> StorageFormat:
+        """storage format of file extension"""
+        extension = os.path.splitext(file_path)[1].lower()
+        for storage_format, format_extension in STORAGE_FORMAT_EXTENSIONS.items():
+            if extension == format_extension:
+                return storage_format
+        raise ValueError(f"{extension} file is not supported")
+
+    def get_newest_file_path(self, file_paths: list[str]) -> str:
+        """existing file modified last, the first file path if none exists"""
+        existing_file_paths = [f for f in file_paths if os.path.exists(f)]
+        if len(existing_file_paths) == 0:
+            return file_paths[0]
+        return max(existing_file_paths, key=lambda f: os.stat(f).st_mtime_ns)
+
     def remove_directory(self, file_path):
         """removes directory with file contents"""
         dir_name = os.path.dirname(file_path)
@@ -75,23 +124,82 @@ class FileHelper:
         self.create_directory_excluding_filename(file_path)
         dataframe.to_csv(file_path, index=False)
 
-    def get_run_file_path(self, run_id: str, module: DataModule):
+    def save_df(self, dataframe: pd.DataFrame, file_path: str,
+                storage_format: StorageFormat = None):
+        """save dataframe atomically in storage format, by default the format of file extension"""
+        if storage_format is None:
+            storage_format = self.get_storage_format(file_path)
+
+        self.create_directory_excluding_filename(file_path)
+        temp_file_path = f"{file_path}.tmp"
+        if storage_format == StorageFormat.PARQUET:
+            dataframe.to_parquet(temp_file_path, compression=self.compression, index=False)
+        elif storage_format == StorageFormat.FEATHER:
+            dataframe.reset_index(drop=True).to_feather(temp_file_path,
+                                                        compression=self.compression)
+        else:
+            dataframe.to_csv(temp_file_path, index=False)
+        os.replace(temp_file_path, file_path)
+
+    def read_df(self, file_path: str, columns: list[str] = None, filters: list[tuple] = None,
+                storage_format: StorageFormat = None) -> pd.DataFrame:
+        """read dataframe, by default in the format of file extension.
+        columns: only these columns are read
+        filters: rows matching all filters, eg. [("sessions", ">", 10)],
+        parquet skips the row groups not matching the filters
+        """
+        if storage_format is None:
+            storage_format = self.get_storage_format(file_path)
+
+        if storage_format == StorageFormat.PARQUET:
+            return pd.read_parquet(file_path, columns=columns, filters=filters or None)
+
+        # columns of filters are read too, and removed after filtering
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys(
+                list(columns) + [f[0] for f in filters or []]))
+        if storage_format == StorageFormat.FEATHER:
+            dataframe = pd.read_feather(file_path, columns=read_columns)
+        else:
+            dataframe = pd.read_csv(file_path, usecols=read_columns)
+
+        dataframe = self.pandas_helper.filter_data_frame(dataframe, filters)
+        if columns is not None:
+            dataframe = dataframe[list(columns)]
+        return dataframe.reset_index(drop=True)
+
+    def get_run_file_path(self, run_id: str, module: DataModule,
+                          storage_format: StorageFormat = None):
         """get run file path"""
-        file_name = f"{module.name.lower()}.csv"
+        file_name = f"{module.name.lower()}{self.get_extension(storage_format)}"
         root_dir = self.settings_helper.get_file_storage_root_folder()
         return os.path.join(root_dir, "data", run_id, file_name)
 
+    def save_run_file(self, dataframe: pd.DataFrame, run_id: str, module: DataModule,
+                      storage_format: StorageFormat = None):
+        """save run file with the data types of data module, returns the file path"""
+        file_path = self.get_run_file_path(run_id, module, storage_format)
+        self.save_df(self.pandas_helper.apply_schema(dataframe, module), file_path)
+        return file_path
+
     def save_run_file_to_csv(
         self, dataframe: pd.DataFrame, run_id: str, module: DataModule
     ):
-        """save run file dataframe to csv"""
-        file_path = self.get_run_file_path(run_id, module)
-        self.save_df_to_csv(dataframe, file_path)
+        """export run file dataframe to csv for analysts"""
+        return self.save_run_file(dataframe, run_id, module, StorageFormat.CSV)
 
-    def read_run_file(self, run_id: str, module: DataModule):
-        """read run file"""
-        file_path = self.get_run_file_path(run_id, module)
-        return pd.read_csv(file_path)
+    def read_run_file(self, run_id: str, module: DataModule,
+                      columns: list[str] = None, filters: list[tuple] = None):
+        """read run file with the data types of data module.
+        When the run file is saved in more than one storage format,
+        eg. exported to csv after parquet, the last saved is read"""
+        file_path = self.get_newest_file_path(
+            [self.get_run_file_path(run_id, module)]
+            + [self.get_run_file_path(run_id, module, f) for f in StorageFormat])
+
+        return self.pandas_helper.apply_schema(
+            self.read_df(file_path, columns=columns, filters=filters), module)
 
     def write_jsonlines(self, file_path: str, data_obj):
         """
@@ -142,3 +250,6 @@ class FileHelper:
     def does_file_exist(self, file_path: str):
         """Check if file exists"""
         return os.path.exists(file_path)
+
+
+# pylint: enable=too-many-public-methods
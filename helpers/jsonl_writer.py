@@ -0,0 +1,152 @@
+"""
+Buffered writer of jsonl files
+"""
+
+import atexit
+import json
+import logging
+import os
+import time
+from threading import Lock
+from helpers.enums import FsyncPolicy
+
+# file locks are not available on windows, records of a single process are not interleaved
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+DEFAULT_MAXIMUM_BUFFERED_RECORDS = 100
+DEFAULT_FLUSH_INTERVAL_IN_SECONDS = 5
+
+
+# pylint: disable=too-many-instance-attributes
+class JsonlWriter:
+    """Appends records to a jsonl file opened once.
+    Records are buffered and written together when maximum_buffered_records are buffered,
+    when flush_interval_in_seconds passed since the last write, and on close or exit.
+    Whole lines are written under a thread lock and an exclusive file lock, so threads
+    and processes appending to the same file never interleave partial lines.
+    A partially written last line of an interrupted run is ended when the file is opened.
+    Usage:
+    with JsonlWriter(file_path) as writer:
+        writer.write({"org_id": 1})
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        maximum_buffered_records: int = DEFAULT_MAXIMUM_BUFFERED_RECORDS,
+        flush_interval_in_seconds: float = DEFAULT_FLUSH_INTERVAL_IN_SECONDS,
+        fsync_policy: FsyncPolicy = FsyncPolicy.ON_CLOSE,
+    ) -> None:
+        self.file_path = file_path
+        self.maximum_buffered_records = maximum_buffered_records
+        self.flush_interval_in_seconds = flush_interval_in_seconds
+        self.fsync_policy = fsync_policy
+        self.log = logging.getLogger(__name__)
+        self.lock = Lock()
+        self.file_obj = None
+        self.buffer = []
+        self.last_flush_time = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __getstate__(self):
+        """file handle, lock and buffer are not shared with other processes"""
+        state = self.__dict__.copy()
+        state["lock"] = None
+        state["file_obj"] = None
+        state["buffer"] = []
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = Lock()
+
+    def open(self):
+        """open file for appending, directories are created once"""
+        if self.file_obj is None:
+            directory = os.path.dirname(self.file_path)
+            if directory != "":
+                os.makedirs(directory, exist_ok=True)
+            # pylint: disable=consider-using-with
+            self.file_obj = open(self.file_path, "a", encoding="UTF-8", newline="\n")
+            # pylint: enable=consider-using-with
+            self.end_partial_line()
+            atexit.register(self.close)
+        return self.file_obj
+
+    def end_partial_line(self):
+        """end the partially written last line of an interrupted run, so the first
+        record appended is not glued to it and only the partial line is invalid"""
+        if fcntl is not None:
+            fcntl.flock(self.file_obj, fcntl.LOCK_EX)
+        try:
+            with open(self.file_path, "rb") as file_obj:
+                file_obj.seek(0, os.SEEK_END)
+                if file_obj.tell() == 0:
+                    return
+                file_obj.seek(-1, os.SEEK_END)
+                if file_obj.read(1) == b"\n":
+                    return
+            self.log.warning("Ending partially written last line of %s", self.file_path)
+            self.file_obj.write("\n")
+            self.file_obj.flush()
+        finally:
+            if fcntl is not None:
+                fcntl.flock(self.file_obj, fcntl.LOCK_UN)
+
+    def write(self, record: dict):
+        """buffer record, buffered records are written when a threshold is reached"""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.buffer.append(line)
+            if len(self.buffer) >= self.maximum_buffered_records or \
+                    time.monotonic() - self.last_flush_time >= self.flush_interval_in_seconds:
+                self.flush_buffer()
+
+    def flush(self):
+        """write buffered records"""
+        with self.lock:
+            self.flush_buffer()
+
+    def flush_buffer(self):
+        """write buffered records, the lock must be held"""
+        self.last_flush_time = time.monotonic()
+        if len(self.buffer) == 0:
+            return
+
+        file_obj = self.open()
+        if fcntl is not None:
+            fcntl.flock(file_obj, fcntl.LOCK_EX)
+        try:
+            file_obj.write("".join(self.buffer))
+            file_obj.flush()
+            if self.fsync_policy == FsyncPolicy.ON_FLUSH:
+                os.fsync(file_obj.fileno())
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file_obj, fcntl.LOCK_UN)
+        self.log.debug("Wrote %s records to %s", len(self.buffer), self.file_path)
+        self.buffer = []
+
+    def close(self):
+        """write buffered records and close the file"""
+        with self.lock:
+            self.flush_buffer()
+            if self.file_obj is None:
+                return
+
+            if self.fsync_policy != FsyncPolicy.NEVER:
+                os.fsync(self.file_obj.fileno())
+            self.file_obj.close()
+            self.file_obj = None
+            atexit.unregister(self.close)
+
+
+# pylint: enable=too-many-instance-attributes
@@ -0,0 +1,16 @@
+"""Helper methods for list"""
+
+
+# pylint: disable=too-few-public-methods
+class ListHelper:
+    """list helper methods"""
+
+    def split_into_chunks(self, items: list, chunk_size: int) -> list[list]:
+        """split the items into chunks of chunk_size, the last chunk could be smaller"""
+        if chunk_size is None or chunk_size < 1:
+            raise ValueError("chunk size should be greater than zero")
+
+        return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+# pylint: enable=too-few-public-methods
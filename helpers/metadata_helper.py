@@ -1,13 +1,78 @@
 """Metadata helper module"""
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
+from threading import Lock
 import json
 import os
+import sqlite3
+import time
+import uuid
 
 # Comment these to run the methods from the current file as entry point
 from helpers.enums import DataFrequency, DataModule, JobStatus
 from helpers.file_helper import FileHelper
 from helpers.date_helper import DateHelper
 
+# locks of jobs which did not release them, eg. killed jobs, expire after the lease,
+# the lease is renewed every time the job saves its metadata
+DEFAULT_JOB_LOCK_LEASE_IN_SECONDS = 60 * 60
+
+METADATA_COLUMNS = ("data_frequency, data_frequency_name, module, module_name, "
+                    "last_data_extraction_date, job_status, job_status_name, failure_reason, "
+                    "created_date_local, created_date_utc")
+METADATA_VALUES = ("(:data_frequency, :data_frequency_name, :module, :module_name, "
+                   ":last_data_extraction_date, :job_status, :job_status_name, :failure_reason, "
+                   ":created_date_local, :created_date_utc)")
+METADATA_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    data_frequency INTEGER NOT NULL,
+    data_frequency_name TEXT NOT NULL,
+    module INTEGER NOT NULL,
+    module_name TEXT NOT NULL,
+    last_data_extraction_date TEXT NOT NULL,
+    job_status INTEGER NOT NULL,
+    job_status_name TEXT NOT NULL,
+    failure_reason TEXT,
+    created_date_local TEXT NOT NULL,
+    created_date_utc TEXT NOT NULL,
+    PRIMARY KEY (data_frequency, module)
+);
+CREATE TABLE IF NOT EXISTS job_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data_frequency INTEGER NOT NULL,
+    data_frequency_name TEXT NOT NULL,
+    module INTEGER NOT NULL,
+    module_name TEXT NOT NULL,
+    last_data_extraction_date TEXT NOT NULL,
+    job_status INTEGER NOT NULL,
+    job_status_name TEXT NOT NULL,
+    failure_reason TEXT,
+    created_date_local TEXT NOT NULL,
+    created_date_utc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_runs_job_config ON job_runs (data_frequency, module);
+CREATE TABLE IF NOT EXISTS job_locks (
+    data_frequency INTEGER NOT NULL,
+    module INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    expiry_time REAL NOT NULL,
+    PRIMARY KEY (data_frequency, module)
+);
+"""
+INSERT_METADATA_IF_MISSING_QUERY = f"""INSERT INTO metadata ({METADATA_COLUMNS})
+VALUES {METADATA_VALUES} ON CONFLICT (data_frequency, module) DO NOTHING"""
+UPSERT_METADATA_QUERY = f"""INSERT INTO metadata ({METADATA_COLUMNS})
+VALUES {METADATA_VALUES} ON CONFLICT (data_frequency, module) DO UPDATE SET
+last_data_extraction_date = excluded.last_data_extraction_date,
+job_status = excluded.job_status,
+job_status_name = excluded.job_status_name,
+failure_reason = excluded.failure_reason,
+created_date_local = excluded.created_date_local,
+created_date_utc = excluded.created_date_utc"""
+INSERT_JOB_RUN_QUERY = f"INSERT INTO job_runs ({METADATA_COLUMNS}) VALUES {METADATA_VALUES}"
+RENEW_JOB_LOCK_QUERY = """UPDATE job_locks SET expiry_time = ?
+WHERE data_frequency = ? AND module = ? AND owner = ?"""
+
 class JobConfig():
     """Job Config : data_frequency and data_module"""
 
@@ -51,11 +116,76 @@ class MetadataDto():
 
 
 class MetadataHelper():
-    """metadata helper class"""
-    def __init__(self, file_path = "./settings/metadata.json"):
+    """metadata helper class.
+    Metadata is stored in a sqlite database (WAL mode) next to file_path, eg. metadata.db
+    for metadata.json. Each (data_frequency, module) is a row updated with an atomic upsert,
+    every saved status is appended to the job run history and job locks let parallel jobs
+    skip the (data_frequency, module) extracted by another job.
+    Metadata of the legacy json file is imported when the database is created.
+    """
+
+    # database paths of which tables are created
+    _initialised_database_paths = set()
+    _initialised_database_paths_lock = Lock()
+
+    def __init__(self, file_path = "./settings/metadata.json", timeout_in_seconds = 30):
         self.file_path = file_path
+        self.database_path = os.path.splitext(file_path)[0] + ".db"
+        self.timeout_in_seconds = timeout_in_seconds
         self.file_helper = FileHelper()
         self.date_helper = DateHelper()
+        # (data_frequency, module): (owner, lease_in_seconds) of the job locks held
+        self.held_job_locks = {}
+
+    @contextmanager
+    def connect(self):
+        """connection to metadata database, commits on success and rollbacks on error"""
+        self.create_database()
+        connection = self.open_connection()
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def open_connection(self):
+        """connection with rows as dictionaries"""
+        connection = sqlite3.connect(self.database_path, timeout=self.timeout_in_seconds)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def create_database(self):
+        """create tables once per process and import legacy json metadata"""
+        with self._initialised_database_paths_lock:
+            if self.database_path in self._initialised_database_paths \
+                    and os.path.exists(self.database_path):
+                return
+
+            self.file_helper.create_directory_excluding_filename(self.database_path)
+            connection = self.open_connection()
+            try:
+                connection.execute("PRAGMA journal_mode=WAL")
+                with connection:
+                    connection.executescript(METADATA_SCHEMA)
+                    self.import_legacy_metadata(connection)
+            finally:
+                connection.close()
+            self._initialised_database_paths.add(self.database_path)
+
+    def import_legacy_metadata(self, connection):
+        """insert metadata of legacy json file missing from database"""
+        if self.file_path == self.database_path or not os.path.exists(self.file_path):
+            return
+
+        with open(self.file_path, 'r', encoding='UTF-8') as file_obj:
+            metadata = file_obj.read()
+
+        if metadata is None or metadata == "":
+            return
+
+        connection.executemany(INSERT_METADATA_IF_MISSING_QUERY,
+                               [self.to_row(m) for m in json.loads(metadata)])
 
     # pylint: disable=too-many-arguments
     # pylint: disable=too-many-positional-arguments
@@ -90,6 +220,44 @@ class MetadataHelper():
     # pylint: enable=too-many-arguments
     # pylint: enable=too-many-positional-arguments
 
+    def to_row(self, metadata: dict) -> dict:
+        """database row of metadata dictionary"""
+        return {
+            "data_frequency": metadata["data_frequency"]["value"],
+            "data_frequency_name": metadata["data_frequency"]["name"],
+            "module": metadata["module"]["value"],
+            "module_name": metadata["module"]["name"],
+            "last_data_extraction_date": metadata["last_data_extraction_date"],
+            "job_status": metadata["job_status"]["value"],
+            "job_status_name": metadata["job_status"]["name"],
+            "failure_reason": metadata.get("failure_reason", ""),
+            "created_date_local": metadata["created_date"]["date_local"],
+            "created_date_utc": metadata["created_date"]["date_utc"],
+        }
+
+    def from_row(self, row) -> dict:
+        """metadata dictionary of database row"""
+        return {
+            'data_frequency': {
+                "value": row["data_frequency"],
+                "name": row["data_frequency_name"]
+            },
+            "module": {
+                "value": row["module"],
+                "name": row["module_name"]
+            },
+            'last_data_extraction_date': row["last_data_extraction_date"],
+            "job_status": {
+                "value": row["job_status"],
+                "name": row["job_status_name"]
+            },
+            'failure_reason': row["failure_reason"],
+            "created_date": {
+                "date_local": row["created_date_local"],
+                "date_utc": row["created_date_utc"]
+            }
+        }
+
     def sort_metadatas(self, metadatas):
         """sort metadata first by data_frequency and then by module"""
         return sorted(metadatas,
@@ -98,77 +266,134 @@ class MetadataHelper():
 
 
     def load_all_metadata(self):
-        """load all metadata"""
-        metadata = []
-
-        if not os.path.exists(self.file_path):
-            return metadata
-
-        with open(self.file_path, 'r', encoding='UTF-8') as file_obj:
-            metadata = file_obj.read()
-
-        if metadata is None or metadata == "":
-            return []
-
-        metadatas = json.loads(metadata)
-        # sort
-        return self.sort_metadatas(metadatas)
+        """load all metadata sorted by data_frequency and module"""
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT * FROM metadata ORDER BY data_frequency_name, module_name").fetchall()
+        return [self.from_row(row) for row in rows]
 
 
     def load_metadata(self, data_frequency: DataFrequency,
                     module: DataModule,
                     default_date: date = date(2021, 1, 1)) -> MetadataDto:
-        """Load metadata"""
-        all_metadata = self.load_all_metadata()
-        metadatas = [m for m in all_metadata if m['module']['value'] ==
-                    module.value and m['data_frequency']['value'] == data_frequency.value]
-
-        if len(metadatas) > 0:
-            metadata = MetadataDto.from_dict(metadatas[0])
-            metadata.last_data_extraction_date = \
-                self.date_helper.convert_yyyy_mm_dd_to_date(
-                    metadata.last_data_extraction_date)
-            metadata.created_date["date_local"] = \
-                self.date_helper.convert_yyyy_mm_dd_hh_mm_ss_to_date(
-                    metadata.created_date["date_local"])
-            metadata.created_date['date_utc'] = \
-                self.date_helper.convert_yyyy_mm_dd_hh_mm_ss_to_date(
-                    metadata.created_date['date_utc'])
-
-            return metadata
-
-        if len(metadatas) == 0:
-            self.save_metadata(JobConfig(data_frequency, module),
-                        default_date,
-                        JobStatus.DEFAULT,
-                        failure_reason='')
-            # call the saved data again
-            print("Saved default first time start date, and returning the first date")
-            return self.load_metadata(data_frequency, module)
-
-        return None
+        """Load metadata, default_date is saved the first time"""
+        default_metadata = self.new_metadata(data_frequency, module, default_date,
+                                             JobStatus.DEFAULT)
+        with self.connect() as connection:
+            connection.execute(INSERT_METADATA_IF_MISSING_QUERY, self.to_row(default_metadata))
+            row = connection.execute(
+                "SELECT * FROM metadata WHERE data_frequency = ? AND module = ?",
+                (data_frequency.value, module.value)).fetchone()
+
+        metadata = MetadataDto.from_dict(self.from_row(row))
+        metadata.last_data_extraction_date = \
+            self.date_helper.convert_yyyy_mm_dd_to_date(
+                metadata.last_data_extraction_date)
+        metadata.created_date["date_local"] = \
+            self.date_helper.convert_yyyy_mm_dd_hh_mm_ss_to_date(
+                metadata.created_date["date_local"])
+        metadata.created_date['date_utc'] = \
+            self.date_helper.convert_yyyy_mm_dd_hh_mm_ss_to_date(
+                metadata.created_date['date_utc'])
+
+        return metadata
 
 
     def save_metadata(self, job_config: JobConfig,
                     last_date_extraction_date: date | datetime,
                     status: JobStatus,
                     failure_reason=''):
-        """Save metadata"""
-        self.file_helper.create_directory_excluding_filename(self.file_path)
-        all_metadata = self.load_all_metadata()
-        other_metadata = [m for m in all_metadata if not
-                        (m['module'].get('value') == job_config.data_module.value and
-                        m['data_frequency'].get('value') == job_config.data_frequency.value)]
+        """Save metadata and add it to the job run history in a single transaction.
+        When the job lock of job config is held, its lease is renewed in the same transaction,
+        and nothing is saved if another job took the lock over"""
         metadata = self.new_metadata(job_config.data_frequency,
                                 job_config.data_module,
                                 last_date_extraction_date,
                                 status,
                                 failure_reason)
-        other_metadata.append(metadata)
-        new_metadatas_json = json.dumps(self.sort_metadatas(other_metadata))
-
-        with open(self.file_path, 'w', encoding='UTF-8') as file_obj:
-            file_obj.write(new_metadatas_json)
+        row = self.to_row(metadata)
+        with self.connect() as connection:
+            self.renew_held_job_lock(connection, job_config)
+            connection.execute(UPSERT_METADATA_QUERY, row)
+            connection.execute(INSERT_JOB_RUN_QUERY, row)
+
+    def get_job_runs(self, job_config: JobConfig, limit: int = None) -> list[dict]:
+        """saved statuses of (data_frequency, module), latest first"""
+        with self.connect() as connection:
+            rows = connection.execute(
+                "SELECT * FROM job_runs WHERE data_frequency = ? AND module = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (job_config.data_frequency.value, job_config.data_module.value,
+                 -1 if limit is None else limit)).fetchall()
+        return [{"id": row["id"], **self.from_row(row)} for row in rows]
+
+    def acquire_job_lock(self, job_config: JobConfig,
+                         lease_in_seconds: float = DEFAULT_JOB_LOCK_LEASE_IN_SECONDS):
+        """lock (data_frequency, module) for a job, returns the lock owner to release it
+        or None if another job holds the lock. Locks of crashed jobs expire after the lease"""
+        owner = uuid.uuid4().hex
+        now = time.time()
+        with self.connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO job_locks (data_frequency, module, owner, expiry_time) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (data_frequency, module) DO UPDATE SET "
+                "owner = excluded.owner, expiry_time = excluded.expiry_time "
+                "WHERE job_locks.expiry_time < ?",
+                (job_config.data_frequency.value, job_config.data_module.value,
+                 owner, now + lease_in_seconds, now))
+        if cursor.rowcount != 1:
+            return None
+
+        self.held_job_locks[self.get_job_lock_key(job_config)] = (owner, lease_in_seconds)
+        return owner
+
+    def get_job_lock_key(self, job_config: JobConfig) -> tuple:
+        """key of job lock in held job locks"""
+        return (job_config.data_frequency.value, job_config.data_module.value)
+
+    def renew_held_job_lock(self, connection, job_config: JobConfig):
+        """extend the lease of job lock held by this helper, nothing if the lock is not held.
+        Raises RuntimeError when the lease expired and another job took the lock over"""
+        held_job_lock = self.held_job_locks.get(self.get_job_lock_key(job_config))
+        if held_job_lock is None:
+            return
+
+        owner, lease_in_seconds = held_job_lock
+        cursor = connection.execute(
+            RENEW_JOB_LOCK_QUERY,
+            (time.time() + lease_in_seconds, job_config.data_frequency.value,
+             job_config.data_module.value, owner))
+        if cursor.rowcount != 1:
+            raise RuntimeError(f"Job lock of {job_config.data_frequency.name} "
+                               f"{job_config.data_module.name} was taken over by another job")
+
+    def renew_job_lock(self, job_config: JobConfig):
+        """heartbeat of long running jobs between metadata saves"""
+        with self.connect() as connection:
+            self.renew_held_job_lock(connection, job_config)
+
+    def release_job_lock(self, job_config: JobConfig, owner: str):
+        """release lock held by owner"""
+        key = self.get_job_lock_key(job_config)
+        if self.held_job_locks.get(key, (None,))[0] == owner:
+            self.held_job_locks.pop(key)
+        with self.connect() as connection:
+            connection.execute(
+                "DELETE FROM job_locks WHERE data_frequency = ? AND module = ? AND owner = ?",
+                (job_config.data_frequency.value, job_config.data_module.value, owner))
+
+    @contextmanager
+    def job_lock(self, job_config: JobConfig,
+                 lease_in_seconds: float = DEFAULT_JOB_LOCK_LEASE_IN_SECONDS):
+        """lock (data_frequency, module) while the block runs,
+        yields False without running the job if another job holds the lock"""
+        owner = self.acquire_job_lock(job_config, lease_in_seconds)
+        try:
+            yield owner is not None
+        finally:
+            if owner is not None:
+                self.release_job_lock(job_config, owner)
 
 
     def get_start_date(self, last_data_extraction_date: date | datetime,
@@ -2,10 +2,52 @@
 Helper methods for pandas library
 """
 
+import operator
 import pandas as pd
+from helpers.enums import DataModule
+
+# data types of columns shared by the google analytics reports
+GOOGLE_ANALYTICS_DTYPES = {
+    "customEvent:DatasetID": "category",
+    "sessions": "int64",
+    "start_date": "datetime64[ns]",
+    "end_date": "datetime64[ns]",
+}
+# data types of the columns of each data module
+DATA_MODULE_DTYPES = {
+    DataModule.AGE: {**GOOGLE_ANALYTICS_DTYPES, "userAgeBracket": "category"},
+    DataModule.GENDER: {**GOOGLE_ANALYTICS_DTYPES, "userGender": "category"},
+    DataModule.LANDING_PAGE: {**GOOGLE_ANALYTICS_DTYPES, "landingPage": "string"},
+    DataModule.DEVICE_CATEGORY: {**GOOGLE_ANALYTICS_DTYPES, "deviceCategory": "category"},
+    DataModule.SOURCE_MEDIUM: {**GOOGLE_ANALYTICS_DTYPES, "sessionSourceMedium": "category"},
+    DataModule.SOURCE: {**GOOGLE_ANALYTICS_DTYPES, "sessionSource": "category"},
+    DataModule.MEDIUM: {**GOOGLE_ANALYTICS_DTYPES, "sessionMedium": "category"},
+    # nullable types, rows of csv exports edited by analysts can have empty values
+    DataModule.LANDING_PAGE_CLEANED: {
+        "org_id": "Int64",
+        "landing_page": "string",
+        "sessions_count": "Int64",
+        "organization_name_sa_community": "string",
+        "organization_name_google": "string",
+        "is_record_available_in_sacommunity_db": "boolean",
+        "organization_id": "Int64",
+        "sessions": "Int64",
+    },
+}
+# operators of filters, same as the filters of pyarrow
+FILTER_OPERATORS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "in": lambda column, values: column.isin(values),
+    "not in": lambda column, values: ~column.isin(values),
+}
 
 
-# pylint: disable=too-few-public-methods
 class PandasHelper:
     """
     Pandas helper
@@ -27,5 +69,33 @@ class PandasHelper:
 
         return dataframe
 
+    def get_data_module_dtypes(self, module: DataModule) -> dict:
+        """data types of columns of data module, empty for unknown modules"""
+        return DATA_MODULE_DTYPES.get(module, {})
+
+    def apply_schema(self, dataframe: pd.DataFrame, module: DataModule) -> pd.DataFrame:
+        """cast the columns of data module to their data types,
+        other columns are left as they are"""
+        dtypes = {
+            column: dtype
+            for column, dtype in self.get_data_module_dtypes(module).items()
+            if column in dataframe.columns and str(dataframe[column].dtype) != dtype
+        }
+        if not dtypes:
+            return dataframe
+
+        # shallow copy, the columns of the caller's dataframe are not replaced
+        return self.convert_data_types(dataframe.copy(deep=False)).astype(dtypes)
+
+    def filter_data_frame(self, dataframe: pd.DataFrame, filters: list[tuple]) -> pd.DataFrame:
+        """rows matching all filters, eg. [("sessions", ">", 10), ("userGender", "in", ["male"])]"""
+        if not filters:
+            return dataframe
+
+        mask = pd.Series(True, index=dataframe.index)
+        for column, operator_name, value in filters:
+            if operator_name not in FILTER_OPERATORS:
+                raise ValueError(f"{operator_name} filter is not supported")
+            mask &= FILTER_OPERATORS[operator_name](dataframe[column], value)
 
-# pylint: enable=too-few-public-methods
+        return dataframe[mask]
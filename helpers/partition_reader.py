@@ -0,0 +1,173 @@
+"""
+Reader of the date partitioned data files data/<frequency>/<module>/YYYY/MM/DD
+"""
+
+import logging
+import os
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+from joblib import Parallel, delayed
+import pandas as pd
+from dtos.date_range_dto import DateRangeDto
+from helpers.date_helper import DateHelper
+from helpers.enums import DataFrequency, DataModule, StorageFormat
+from helpers.file_helper import FileHelper
+from helpers.pandas_helper import PandasHelper
+from helpers.settings_helper import SettingsHelper
+
+# concurrent partition reads, parquet is decoded outside the GIL
+PARTITIONS_CONCURRENT_READS = 8
+# partitions kept in memory, a year of daily partitions of every data module
+DEFAULT_MAXIMUM_CACHED_PARTITIONS = 5000
+
+
+# pylint: disable=too-many-instance-attributes
+class PartitionReader:
+    """Reads a date range of a data module from its partitions into a single typed dataframe.
+    Only the paths of the partitions of the date range are checked, partitions are read
+    in parallel with column projection and kept in a LRU cache, which is invalidated
+    when a partition file changes.
+    Daily partitions are named by day, the partitions of the other data frequencies
+    (see RollupMaterialiser) by the first day of the period, so periods overlapping
+    the date range are returned whole.
+    """
+
+    _shared_readers = {}
+    _shared_readers_lock = Lock()
+
+    def __init__(
+        self,
+        root_dir: str = None,
+        file_helper: FileHelper = None,
+        maximum_cached_partitions: int = DEFAULT_MAXIMUM_CACHED_PARTITIONS,
+    ) -> None:
+        self.root_dir = root_dir
+        if self.root_dir is None:
+            self.root_dir = SettingsHelper().get_file_storage_root_folder()
+        self.file_helper = file_helper
+        if self.file_helper is None:
+            self.file_helper = FileHelper(StorageFormat.PARQUET)
+        self.maximum_cached_partitions = maximum_cached_partitions
+        self.date_helper = DateHelper()
+        self.pandas_helper = PandasHelper()
+        self.log = logging.getLogger(__name__)
+        self.lock = Lock()
+        # (file path, columns, filters): (modified time of file, dataframe)
+        self.partitions_cache = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def shared(cls, root_dir: str = None):
+        """returns the reader of root dir shared by the current process"""
+        with cls._shared_readers_lock:
+            reader = cls._shared_readers.get(root_dir)
+            if reader is None:
+                reader = cls(root_dir)
+                cls._shared_readers[root_dir] = reader
+            return reader
+
+    def get_partition_path(self, data_frequency: DataFrequency, module: DataModule,
+                           period_start) -> str:
+        """path of partition in the storage format of file helper, or in csv when the
+        partition was saved as csv after it, eg. partitions saved before parquet"""
+        return self.file_helper.get_newest_file_path([
+            self.file_helper.get_data_path(
+                self.root_dir, data_frequency.name.lower(), module.name.lower(),
+                period_start, storage_format)
+            for storage_format in [None, StorageFormat.CSV]
+        ])
+
+    def get_partition_paths(self, data_frequency: DataFrequency, module: DataModule,
+                            date_range: DateRangeDto) -> list[str]:
+        """existing partitions of the periods overlapping date range"""
+        if data_frequency == DataFrequency.DAILY:
+            period_starts = [
+                date_range.start_date + timedelta(days=i)
+                for i in range((date_range.end_date - date_range.start_date).days + 1)
+            ]
+        else:
+            period_starts = [
+                self.date_helper.get_period_start(period.start_date, data_frequency)
+                for period in self.date_helper.split_date_range(date_range, data_frequency)
+            ]
+
+        file_paths = [self.get_partition_path(data_frequency, module, period_start)
+                      for period_start in period_starts]
+        return [file_path for file_path in file_paths if os.path.exists(file_path)]
+
+    def read_partition(self, file_path: str, columns: list[str] = None,
+                       filters: list[tuple] = None) -> pd.DataFrame:
+        """partition from cache, read again when the file changed"""
+        key = (file_path, tuple(columns or ()), repr(filters))
+        modified_time = os.stat(file_path).st_mtime_ns
+        with self.lock:
+            entry = self.partitions_cache.get(key)
+            if entry is not None and entry[0] == modified_time:
+                self.partitions_cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[1]
+            self.stats["misses"] += 1
+
+        partition_df = self.file_helper.read_df(file_path, columns=columns, filters=filters)
+        with self.lock:
+            self.partitions_cache[key] = (modified_time, partition_df)
+            self.partitions_cache.move_to_end(key)
+            while len(self.partitions_cache) > self.maximum_cached_partitions:
+                self.partitions_cache.popitem(last=False)
+        return partition_df
+
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def read(
+        self,
+        data_frequency: DataFrequency,
+        module: DataModule,
+        date_range: DateRangeDto,
+        columns: list[str] = None,
+        filters: list[tuple] = None,
+        n_jobs: int = PARTITIONS_CONCURRENT_READS,
+    ) -> pd.DataFrame:
+        """rows of data module in date range with the data types of data module.
+        columns: only these columns are read
+        filters: rows matching all filters, eg. [("sessions", ">", 10)]
+        """
+        file_paths = self.get_partition_paths(data_frequency, module, date_range)
+        self.log.debug("Reading %s partitions of %s", len(file_paths), module.name)
+        if len(file_paths) == 0:
+            empty_columns = columns or list(self.pandas_helper.get_data_module_dtypes(module))
+            return self.pandas_helper.apply_schema(pd.DataFrame(columns=empty_columns), module)
+
+        partitions = Parallel(n_jobs=min(n_jobs, len(file_paths)), prefer="threads")(
+            delayed(self.read_partition)(file_path, columns, filters)
+            for file_path in file_paths
+        )
+        # partitions of days without sessions are left out, they do not change the rows
+        partitions = [p for p in partitions if len(p) > 0] or partitions[:1]
+        # categories of partitions differ, they are unified by the schema after concat
+        return self.pandas_helper.apply_schema(
+            pd.concat(partitions, ignore_index=True), module)
+
+    # pylint: enable=too-many-arguments
+    # pylint: enable=too-many-positional-arguments
+
+    def clear_cache(self, data_frequency: DataFrequency = None, module: DataModule = None):
+        """forget cached partitions, only the partitions of data frequency and module
+        when they are given"""
+        with self.lock:
+            if data_frequency is None or module is None:
+                self.partitions_cache.clear()
+                return
+
+            module_dir = os.path.join(self.root_dir, "data", data_frequency.name.lower(),
+                                      module.name.lower(), "")
+            for key in [k for k in self.partitions_cache if k[0].startswith(module_dir)]:
+                self.partitions_cache.pop(key)
+
+    def get_stats(self) -> dict:
+        """hits and misses of partitions cache"""
+        with self.lock:
+            return {**self.stats, "size": len(self.partitions_cache)}
+
+
+# pylint: enable=too-many-instance-attributes
@@ -0,0 +1,51 @@
+"""
+Index of the records already written to a jsonl output, to resume long runs
+"""
+
+import os
+from threading import Lock
+import jsonlines
+
+
+class ResumeIndex:
+    """Set of the ids of records in a jsonl output.
+    The file is streamed once, line by line, and ids of new records are added
+    as they are written, so checking whether a record exists is O(1).
+    The index is shared by the threads of a run and updated under a lock.
+    """
+
+    def __init__(self, key: str = "org_id") -> None:
+        self.key = key
+        self.ids = set()
+        self.lock = Lock()
+
+    @classmethod
+    def from_jsonl(cls, file_path: str, key: str = "org_id"):
+        """index of the ids of records in jsonl file, empty if the file does not exist"""
+        resume_index = cls(key)
+        if file_path and os.path.exists(file_path):
+            resume_index.read_jsonl(file_path)
+        return resume_index
+
+    def read_jsonl(self, file_path: str):
+        """add ids of records in jsonl file.
+        Partially written lines of interrupted runs are skipped"""
+        with jsonlines.open(file_path) as reader:
+            ids = {
+                record.get(self.key)
+                for record in reader.iter(type=dict, skip_invalid=True, skip_empty=True)
+            }
+
+        with self.lock:
+            self.ids.update(ids)
+
+    def add(self, record_id):
+        """add id of written record"""
+        with self.lock:
+            self.ids.add(record_id)
+
+    def __contains__(self, record_id) -> bool:
+        return record_id in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
@@ -1,16 +1,43 @@
 """Settings helper to retrieve settings data from json file"""
 import json
+import os
+import time
+from threading import Lock
+from helpers.environment_helper import EnvironmentHelper
 from helpers.string_helper import StringHelper
 
+DEFAULT_ALL_ORGANISATIONS_THRESHOLD = 1000
+# modified time of settings file is checked at most once per interval
+SETTINGS_RECHECK_INTERVAL_IN_SECONDS = 1
+# environment variables overriding settings, eg. APP_SETTINGS__WebScraping__DefaultTimeoutInSeconds
+SETTINGS_ENVIRONMENT_VARIABLE_PREFIX = 'APP_SETTINGS__'
+
 
 class SettingsHelper():
-    """helper class for app_settings.json"""
-    def __init__(self, file_path = './settings/app_settings.json') -> None:
+    """helper class for app_settings.json
+    Settings are parsed once per process and reloaded when the modified time of the file
+    or the environment variable overrides change, so getters cost a dict lookup.
+    The returned settings are shared, they must not be modified.
+    """
+
+    # file path: snapshot of parsed settings
+    _settings_snapshots = {}
+    _settings_snapshots_lock = Lock()
+
+    def __init__(self, file_path = './settings/app_settings.json',
+                 recheck_interval_in_seconds = SETTINGS_RECHECK_INTERVAL_IN_SECONDS) -> None:
         self.file_path = file_path
+        self.recheck_interval_in_seconds = recheck_interval_in_seconds
         self.str_helper = StringHelper()
 
-    def get_settings(self):
-        """Get all settings from settings json"""
+    @classmethod
+    def clear_cache(cls):
+        """forget the parsed settings of every file"""
+        with cls._settings_snapshots_lock:
+            cls._settings_snapshots.clear()
+
+    def read_settings_file(self):
+        """parse settings json, None if the file is empty"""
         file_data = ''
         with open(self.file_path, 'r', encoding="UTF-8") as file_obj:
             file_data = file_obj.read()
@@ -20,6 +47,58 @@ class SettingsHelper():
 
         return json.loads(file_data)
 
+    def get_environment_overrides(self) -> dict:
+        """environment variables overriding settings"""
+        return EnvironmentHelper().get_by_prefix(SETTINGS_ENVIRONMENT_VARIABLE_PREFIX)
+
+    def parse_environment_value(self, value: str):
+        """json values (numbers, booleans, objects), else the text"""
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+
+    def apply_environment_overrides(self, settings, environment_overrides: dict):
+        """APP_SETTINGS__<Module>=value or APP_SETTINGS__<Module>__<Key>=value"""
+        if settings is None:
+            return None
+
+        for name, value in sorted(environment_overrides.items()):
+            module, _, key = name[len(SETTINGS_ENVIRONMENT_VARIABLE_PREFIX):].partition('__')
+            if key == '':
+                settings[module] = self.parse_environment_value(value)
+            else:
+                if not isinstance(settings.get(module), dict):
+                    settings[module] = {}
+                settings[module][key] = self.parse_environment_value(value)
+
+        return settings
+
+    def get_settings(self):
+        """Get all settings from settings json"""
+        with self._settings_snapshots_lock:
+            snapshot = self._settings_snapshots.get(self.file_path)
+            now = time.monotonic()
+            if snapshot is not None and \
+                    now - snapshot['checked_time'] < self.recheck_interval_in_seconds:
+                return snapshot['settings']
+
+            modified_time = os.stat(self.file_path).st_mtime_ns
+            environment_overrides = self.get_environment_overrides()
+            if snapshot is None or snapshot['modified_time'] != modified_time \
+                    or snapshot['environment_overrides'] != environment_overrides:
+                settings = self.apply_environment_overrides(
+                    self.read_settings_file(), environment_overrides)
+                snapshot = {
+                    'settings': settings,
+                    'modified_time': modified_time,
+                    'environment_overrides': environment_overrides,
+                }
+                self._settings_snapshots[self.file_path] = snapshot
+
+            snapshot['checked_time'] = now
+            return snapshot['settings']
+
     def get_settings_for_a_module(self, module):
         """Get settings related to particular module"""
         settings = self.get_settings()
@@ -50,6 +129,29 @@ class SettingsHelper():
         """get page size to retrieve data"""
         return self.get_value_by_key('GoogleAnalytics', 'PageSize')
 
+    def get_google_analytics_all_organisations_threshold(self):
+        """number of organisations above which sessions are pulled for all organisations
+        in a single report instead of filtering by organisation ids"""
+        threshold = self.get_value_by_key(
+            'GoogleAnalytics', 'AllOrganisationsThreshold', is_key_required=False)
+        if threshold is None:
+            return DEFAULT_ALL_ORGANISATIONS_THRESHOLD
+        return threshold
+
+    def get_google_analytics_cache_settings(self):
+        """Get settings of google analytics response cache, None if cache is not configured"""
+        cache_settings = self.get_settings_for_a_module('GoogleAnalyticsCache')
+        if cache_settings is None or not cache_settings.get('Enabled', False):
+            return None
+        return cache_settings
+
+    def get_address_council_cache_settings(self):
+        """Get settings of address council cache, None if cache is not configured"""
+        cache_settings = self.get_settings_for_a_module('AddressCouncilCache')
+        if cache_settings is None or not cache_settings.get('Enabled', False):
+            return None
+        return cache_settings
+
     def get_file_storage_root_folder(self):
         """Get RootDir"""
         return self.get_value_by_key('FileStorage', 'RootDir')
@@ -8,6 +8,7 @@
 # from helpers.file_helper import FileHelper
 # from google_analytics_module.google_analytics_data import GoogleAnalyticsData
 # from data_transform.clean_landing_page import CleanLandingPage
+# from helpers.cu_export_store import CuExportStore
 
 
 # def get_cu_dataset_reader_instance(file_path):
@@ -52,11 +53,11 @@
 #     file_helper = FileHelper()
 #     landing_page_df = file_helper.read_run_file(
 #         run_id, DataModule.LANDING_PAGE)
-#     cu_export_df = pd.read_csv(settings_dto.sa_community_export_file_path)
+#     cu_export_store = CuExportStore.shared(settings_dto.sa_community_export_file_path)
 
 #     clean_landing_page = CleanLandingPage()
 #     processed_data_df = clean_landing_page.process_data(
-#         landing_page_df, cu_export_df)
+#         landing_page_df, None, cu_export_store=cu_export_store)
 
 #     file_helper = FileHelper()
 #     # these records are problematic, they are found in google analytics,
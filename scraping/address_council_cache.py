@@ -0,0 +1,158 @@
+"""Persistent cache of the councils found by address"""
+
+import logging
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from threading import Lock
+from scraping.find_council_by_address_response import FindCouncilByAddressResponse
+
+NO_RESULTS_TEXT = "No results found."
+NON_ALPHANUMERIC_PATTERN = re.compile(r"[^a-z0-9]+")
+# street types are written in full or abbreviated in the cu export
+STREET_TYPE_ABBREVIATIONS = {
+    "street": "st",
+    "road": "rd",
+    "avenue": "ave",
+    "av": "ave",
+    "terrace": "tce",
+    "drive": "dr",
+    "court": "ct",
+    "place": "pl",
+    "parade": "pde",
+    "highway": "hwy",
+    "crescent": "cres",
+    "lane": "ln",
+    "boulevard": "bvd",
+    "close": "cl",
+    "grove": "gr",
+    "square": "sq",
+    "circuit": "cct",
+    "way": "wy",
+}
+ADDRESS_COUNCILS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS address_councils (
+    address_key TEXT PRIMARY KEY,
+    address TEXT NOT NULL,
+    council_name TEXT NOT NULL,
+    electoral_ward TEXT NOT NULL,
+    text TEXT NOT NULL,
+    is_no_results INTEGER NOT NULL,
+    scraped_time REAL NOT NULL
+)
+"""
+
+
+# pylint: disable=too-many-instance-attributes
+class AddressCouncilCache:
+    """Caches the council and electoral ward of addresses in a sqlite database,
+    so the browser is launched only for addresses not found before.
+    Addresses are keyed by their normalised text (case, whitespace, punctuation and
+    street types), so "1 Main Road, Burnside" and "1 main rd burnside" share a result.
+    Addresses without results (No results found.) are cached for
+    no_results_time_to_live_in_seconds, errors are not cached.
+    """
+
+    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-positional-arguments
+    def __init__(
+        self,
+        file_path: str = "./cache/address_councils.db",
+        time_to_live_in_seconds: int = 180 * 24 * 60 * 60,
+        no_results_time_to_live_in_seconds: int = 7 * 24 * 60 * 60,
+        timeout_in_seconds: int = 30,
+    ) -> None:
+        self.file_path = file_path
+        self.time_to_live_in_seconds = time_to_live_in_seconds
+        self.no_results_time_to_live_in_seconds = no_results_time_to_live_in_seconds
+        self.timeout_in_seconds = timeout_in_seconds
+        self.log = logging.getLogger(__name__)
+        self.lock = Lock()
+        self.is_database_created = False
+        self.stats = {"hits": 0, "misses": 0}
+
+    # pylint: enable=too-many-arguments
+    # pylint: enable=too-many-positional-arguments
+
+    @classmethod
+    def from_settings(cls, cache_settings: dict):
+        """creates cache from AddressCouncilCache module of app_settings"""
+        return cls(
+            file_path=cache_settings.get("FilePath", "./cache/address_councils.db"),
+            time_to_live_in_seconds=cache_settings.get("TimeToLiveInDays", 180)
+            * 24 * 60 * 60,
+            no_results_time_to_live_in_seconds=cache_settings.get(
+                "NoResultsTimeToLiveInDays", 7) * 24 * 60 * 60,
+        )
+
+    def normalise_address(self, address: str) -> str:
+        """lowercase words of address without punctuation, street types abbreviated"""
+        words = NON_ALPHANUMERIC_PATTERN.sub(" ", str(address).lower()).split()
+        return " ".join(STREET_TYPE_ABBREVIATIONS.get(word, word) for word in words)
+
+    def connect(self):
+        """connection to cache database, the table is created on first use"""
+        with self.lock:
+            if not self.is_database_created or not os.path.exists(self.file_path):
+                directory = os.path.dirname(self.file_path)
+                if directory != "":
+                    os.makedirs(directory, exist_ok=True)
+                with closing(sqlite3.connect(self.file_path,
+                                             timeout=self.timeout_in_seconds)) as connection:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.execute(ADDRESS_COUNCILS_SCHEMA)
+                    connection.commit()
+                self.is_database_created = True
+
+        connection = sqlite3.connect(self.file_path, timeout=self.timeout_in_seconds)
+        connection.row_factory = sqlite3.Row
+        return closing(connection)
+
+    def is_expired(self, row) -> bool:
+        """result is older than its time to live"""
+        time_to_live_in_seconds = self.no_results_time_to_live_in_seconds \
+            if row["is_no_results"] else self.time_to_live_in_seconds
+        return time.time() - row["scraped_time"] > time_to_live_in_seconds
+
+    def get(self, address: str) -> FindCouncilByAddressResponse | None:
+        """cached council of address, None if not cached or expired"""
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT * FROM address_councils WHERE address_key = ?",
+                (self.normalise_address(address),)).fetchone()
+
+        with self.lock:
+            if row is None or self.is_expired(row):
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+
+        self.log.debug("Council of %s found in cache", address)
+        return FindCouncilByAddressResponse(
+            address, row["council_name"], row["electoral_ward"], row["text"], False, "")
+
+    def put(self, response: FindCouncilByAddressResponse):
+        """cache council of address. Errors and responses without council,
+        eg. the results panel did not load in time, are not cached"""
+        text = response.text or ""
+        is_no_results = text.startswith(NO_RESULTS_TEXT)
+        if response.has_error or (response.council_name == "" and not is_no_results):
+            return
+
+        with self.connect() as connection:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO address_councils VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.normalise_address(response.address), response.address,
+                     response.council_name, response.electoral_ward, text,
+                     int(is_no_results), time.time()))
+
+    def get_stats(self) -> dict:
+        """hits and misses"""
+        with self.lock:
+            return dict(self.stats)
+
+
+# pylint: enable=too-many-instance-attributes
@@ -9,10 +9,14 @@ import requests
 from bs4 import BeautifulSoup
 from joblib import Parallel, delayed
 from dtos.get_data_from_url_request_dto import GetDataFromUrlRequestDto
+from helpers.cu_export_store import CuExportStore
 from helpers.file_helper import FileHelper
+from helpers.jsonl_writer import JsonlWriter
 from helpers.log_helper import log_error
+from helpers.resume_index import ResumeIndex
 from helpers.settings_helper import SettingsHelper
 from helpers.string_helper import StringHelper
+from scraping.address_council_cache import AddressCouncilCache
 from scraping.find_council_by_address_response import FindCouncilByAddressResponse
 from scraping.web_scraping import WebScraping
 
@@ -20,12 +24,23 @@ from scraping.web_scraping import WebScraping
 class CouncilNameScrapingService:
     """Scrape council name"""
 
-    def __init__(self) -> None:
+    def __init__(self, address_council_cache: AddressCouncilCache = None) -> None:
         self.logger = logging.getLogger()
         self.settings_helper = SettingsHelper()
         self.string_helper = StringHelper()
         self.file_helper = FileHelper()
         self.web_scraping = WebScraping()
+        self.address_council_cache = address_council_cache
+        self.is_address_council_cache_loaded = address_council_cache is not None
+
+    def get_address_council_cache(self):
+        """address council cache configured in app_settings, None if not configured"""
+        if not self.is_address_council_cache_loaded:
+            cache_settings = self.settings_helper.get_address_council_cache_settings()
+            if cache_settings is not None:
+                self.address_council_cache = AddressCouncilCache.from_settings(cache_settings)
+            self.is_address_council_cache_loaded = True
+        return self.address_council_cache
 
     def extract_value_replacing_prefix(self, text_array, prefix):
         """
@@ -37,12 +52,12 @@ class CouncilNameScrapingService:
 
         return ""
 
-    # pylint: disable=broad-exception-caught
     def find_council_by_address(
         self, address: str, timeout_in_seconds=600, is_headless=True
     ) -> FindCouncilByAddressResponse:
         """
-        Finds council by address
+        Finds council by address, the councils of addresses found before
+        are read from the address council cache without launching the browser
         address: address where organization is located
         timeout_in_seconds: timeout in seconds until which the program will
         wait before returning None
@@ -51,8 +66,29 @@ class CouncilNameScrapingService:
         """
         self.string_helper.validate_null_or_empty(address, "address")
 
+        address_council_cache = self.get_address_council_cache()
+        if address_council_cache is not None:
+            cached_response = address_council_cache.get(address)
+            if cached_response is not None:
+                return cached_response
+
+        response = self.scrape_council_by_address(address, timeout_in_seconds, is_headless)
+        if address_council_cache is not None:
+            address_council_cache.put(response)
+        return response
+
+    # pylint: disable=broad-exception-caught
+    def scrape_council_by_address(
+        self, address: str, timeout_in_seconds=600, is_headless=True
+    ) -> FindCouncilByAddressResponse:
+        """
+        Finds council by address in the council lookup app of arcgis
+        """
         error_message = ""
         has_error = False
+        council_name = ""
+        electoral_ward = ""
+        text = ""
         try:
             app_id = "db6cce7b773746b4a1d4ce544435f9da"
             base_url = "https://lga-sa.maps.arcgis.com/apps/instant/lookup/index.html"
@@ -70,8 +106,6 @@ class CouncilNameScrapingService:
                 )
             )
 
-            council_name = ""
-            electoral_ward = ""
             if text != "":
                 text_array = text.splitlines()
 
@@ -232,10 +266,16 @@ class CouncilNameScrapingService:
     # pylint: disable=too-many-arguments
     # pylint: disable=too-many-positional-arguments
     def scrape_council_name_based_on_cu_export_df(
-        self, row_counter, total, row, output_records, output_file_path
+        self,
+        row_counter,
+        total,
+        row,
+        output_records: ResumeIndex,
+        output_writer: JsonlWriter = None,
     ):
         """
-        Scrape council name based on cu export dataframe
+        Scrape council name based on cu export dataframe, organisations in output_records
+        are skipped. The result is written by output_writer shared by the threads
         """
         org_id = row["ID_19"]
         address = str(row["Street_Address_Line_1"]) + " " + str(row["Suburb"])
@@ -278,18 +318,18 @@ class CouncilNameScrapingService:
                 "scraped_text": council_by_address_response.text,
             }
 
-            if not self.string_helper.is_null_or_whitespace(output_file_path):
-                self.file_helper.write_jsonlines(output_file_path, scraped_council)
+            if output_writer is not None:
+                output_writer.write(scraped_council)
+            output_records.add(org_id)
 
     # pylint: disable=too-many-arguments
     # pylint: disable=too-many-positional-arguments
 
-    def get_output_records_organisations(self, output_file_path):
+    def get_output_records_organisations(self, output_file_path) -> ResumeIndex:
         """
-        extract organisation ids
+        extract organisation ids, the output is streamed into an index of the ids
         """
-        output_records = self.file_helper.read_jsonlines_all(output_file_path)
-        return [o.get("org_id") for o in output_records]
+        return ResumeIndex.from_jsonl(output_file_path, "org_id")
 
     def scrape_council_names_based_on_cu_export_df(
         self, cu_export_df: pd.DataFrame, output_file_path: str = "", n_jobs=3
@@ -298,19 +338,52 @@ class CouncilNameScrapingService:
         Scrape council name based on cu export file
         """
         total = len(cu_export_df)
-        output_records = []
+        output_records = ResumeIndex("org_id")
         if not self.string_helper.is_null_or_whitespace(
             output_file_path
         ) and self.file_helper.does_file_exist(output_file_path):
             self.logger.info("Reading output records")
             output_records = self.get_output_records_organisations(output_file_path)
-            self.logger.info("Completed reading output records")
+            self.logger.info("Completed reading %s output records", len(output_records))
+
+        output_writer = None
+        if not self.string_helper.is_null_or_whitespace(output_file_path):
+            output_writer = JsonlWriter(output_file_path)
 
-        Parallel(n_jobs=n_jobs)(
-            delayed(self.scrape_council_name_based_on_cu_export_df)(
-                row_counter, total, row, output_records, output_file_path
+        # scraping waits for the browser, threads share the output writer
+        try:
+            Parallel(n_jobs=n_jobs, prefer="threads")(
+                delayed(self.scrape_council_name_based_on_cu_export_df)(
+                    row_counter, total, row, output_records, output_writer
+                )
+                for row_counter, row in cu_export_df.iterrows()
             )
-            for row_counter, row in cu_export_df.iterrows()
+        finally:
+            if output_writer is not None:
+                output_writer.close()
+
+    def scrape_council_names_based_on_cu_export_file(
+        self, cu_export_file_path: str, output_file_path: str = "", n_jobs=3
+    ):
+        """
+        Scrape council name based on cu export file, loaded once by the cu export store
+        """
+        columns = [
+            "ID_19",
+            "Street_Address_Line_1",
+            "Suburb",
+            "Organisati_Council",
+            "Organisati_Electorate_State_",
+            "Organisati_Electorate_Federal_",
+        ]
+        cu_export_df = CuExportStore.shared(cu_export_file_path).get_data_frame()[columns]
+        cu_export_df = cu_export_df.fillna(
+            {"Street_Address_Line_1": "", "Suburb": ""}
+        )
+        # missing values of nullable columns are written as null in the output
+        cu_export_df = cu_export_df.astype(object).where(cu_export_df.notna(), None)
+        self.scrape_council_names_based_on_cu_export_df(
+            cu_export_df, output_file_path, n_jobs
         )
 
     def do_council_scraping_output_require_retry(self, output):
@@ -334,13 +407,15 @@ class CouncilNameScrapingService:
     def retry_failed_scraping_of_council_name(
         self,
         output_record,
-        new_output_file_path: str,
-        existing_records,
+        output_writer: JsonlWriter,
+        existing_records: ResumeIndex,
         row_counter,
         total,
     ):
         """
-        Retry scraping
+        Retry scraping, the record is written by output_writer shared by the threads.
+        The address is scraped again even if cached, eg. cached without results,
+        and its cached council is replaced
         """
         existing_record = output_record.get("org_id") in existing_records
         if existing_record:
@@ -352,7 +427,10 @@ class CouncilNameScrapingService:
                     address {output_record.get("address")}. \
                     Progress {row_counter + 1} of {total}'
             )
-            response = self.find_council_by_address(output_record.get("address"))
+            response = self.scrape_council_by_address(output_record.get("address"))
+            address_council_cache = self.get_address_council_cache()
+            if address_council_cache is not None:
+                address_council_cache.put(response)
             output_record["error_message"] = response.error_message
             output_record["has_error"] = response.has_error
             output_record["council_scraped"] = response.council_name
@@ -362,7 +440,8 @@ class CouncilNameScrapingService:
             )
             output_record["scraped_text"] = response.text
 
-        self.file_helper.write_jsonlines(new_output_file_path, output_record)
+        output_writer.write(output_record)
+        existing_records.add(output_record.get("org_id"))
 
     # pylint: enable=too-many-arguments
     # pylint: enable=too-many-positional-arguments
@@ -376,18 +455,15 @@ class CouncilNameScrapingService:
         output_records = self.file_helper.read_jsonlines_all(output_file_path)
 
         total = len(output_records)
-        existing_records = []
-        if self.file_helper.does_file_exist(new_output_file_path):
-            existing_records = self.get_output_records_organisations(
-                new_output_file_path
-            )
-        Parallel(n_jobs=n_jobs)(
-            delayed(self.retry_failed_scraping_of_council_name)(
-                output_record,
-                new_output_file_path,
-                existing_records,
-                row_counter,
-                total,
+        existing_records = self.get_output_records_organisations(new_output_file_path)
+        with JsonlWriter(new_output_file_path) as output_writer:
+            Parallel(n_jobs=n_jobs, prefer="threads")(
+                delayed(self.retry_failed_scraping_of_council_name)(
+                    output_record,
+                    output_writer,
+                    existing_records,
+                    row_counter,
+                    total,
+                )
+                for row_counter, output_record in enumerate(output_records)
             )
-            for row_counter, output_record in enumerate(output_records)
-        )
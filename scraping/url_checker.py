@@ -3,8 +3,8 @@ URL Checker
 """
 
 from http import HTTPStatus
-import pandas as pd
 from joblib import Parallel, delayed
+from helpers.cu_export_store import CuExportStore
 from helpers.settings_helper import SettingsHelper
 from helpers.string_helper import StringHelper
 from helpers.html_helper import HtmlHelper
@@ -63,10 +63,9 @@ class UrlChecker:
         """
         Check url response statuses with cu_export file path as input
         """
-        cu_export_df = pd.read_csv(cu_export_file_path)
+        organisations_df = CuExportStore.shared(
+            cu_export_file_path
+        ).get_organisations_by_id()
         sa_community_url = self.settings_helper.get_sacommunity_url()
-        cu_export_df["url"] = f"{sa_community_url}/org/" + cu_export_df["ID_19"].apply(
-            str
-        )
-        urls = cu_export_df["url"].tolist()
+        urls = [f"{sa_community_url}/org/{org_id}" for org_id in organisations_df.index]
         return self.check_urls_statuses(urls)
@@ -0,0 +1,108 @@
+"""Tests for clean landing page"""
+import sys
+import os
+import tempfile
+import unittest
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+import pandas as pd
+from data_transform.clean_landing_page import CleanLandingPage
+from helpers.cu_export_store import CuExportStore
+# pylint: enable=wrong-import-position
+
+
+class TestCleanLandingPage(unittest.TestCase):
+    """Tests for clean landing page"""
+
+    def setUp(self) -> None:
+        self.clean_landing_page = CleanLandingPage(sacommunity_url="https://sacommunity.org")
+        self.sa_community_df = pd.DataFrame({
+            "ID_19": [196236, 201830, 196236],
+            "Org_name": ["Dave's Angels Playgroup", "Aged Rights Advocacy Service Inc.",
+                         "Duplicate"],
+        })
+
+    def test_process_data_should_use_first_match_of_organization_id(self):
+        """names and landing page come from the first row of the organization id"""
+        landing_page_df = pd.DataFrame({
+            "landingPage": [
+                "/org/196236-Dave's_Angels_Playgroup?fbclid=IwAR05WAQ",
+                "/search",
+                "/org/201669-Gifted_&_Talented_Children's_Association_of_SA_Inc.?_x_tr_sl=en",
+                "/org/196236-Daves_Angels",
+            ],
+            "sessions": [5, 1, 3, 2],
+        })
+
+        results_df = self.clean_landing_page.process_data(landing_page_df, self.sa_community_df)
+
+        self.assertEqual(results_df["org_id"].tolist(), [196236, 201669, 196236])
+        self.assertEqual(results_df["sessions_count"].tolist(), [5, 3, 2])
+        self.assertEqual(results_df["organization_name_sa_community"].tolist(),
+                         ["Dave's Angels Playgroup", "", "Dave's Angels Playgroup"])
+        self.assertEqual(results_df["organization_name_google"].tolist()[2],
+                         "Dave's Angels Playgroup")
+        self.assertEqual(results_df["is_record_available_in_sacommunity_db"].tolist(),
+                         [True, False, True])
+        self.assertEqual(
+            results_df["landing_page"].tolist()[2],
+            "https://sacommunity.org/org/196236-Dave's_Angels_Playgroup?fbclid=IwAR05WAQ")
+        self.assertIn("organization_id_name", results_df.columns)
+
+    def test_normalise_landing_pages_should_match_per_row_cleaning(self):
+        """batch parser returns the same values as the per row methods"""
+        landing_pages = pd.Series([
+            "/org/196236-Dave's_Angels_Playgroup?fbclid=IwAR05WAQ0z5mwY7v1UEVmkDITFg7sD",
+            "/search?q=cache:UTs_a-1ZNgEJ:https://sacommunity.org/org/196341-Neighbourhood_"
+            "Watch_-_Linden_Park_249+&cd=63&hl=en&ct=clnk&gl=bj",
+            "/org/201669-Gifted_&_Talented_Children's_Association_of_SA_Inc.?_x_tr_sl=en",
+            "/org/201830-Aged_Rights_Advocacy_Service_Inc.?back=https://www.google.com/search",
+            "/org/201950-SA_Ambulance_Service?_x_tr_sl=en&_x_tr_tl=fr&_x_tr_hl=fr",
+            "/search",
+            "/org/ab-cd",
+        ])
+
+        results_df = self.clean_landing_page.normalise_landing_pages(landing_pages)
+
+        self.assertEqual(str(results_df["organization_id"].dtype), "Int64")
+        for landing_page, row in zip(landing_pages, results_df.itertuples(index=False)):
+            text = self.clean_landing_page.clean_landing_page_text(landing_page)
+            self.assertEqual(row.organization_id_name, text)
+            self.assertEqual(row.organization_name,
+                             self.clean_landing_page.get_organization_name(text))
+            if text.startswith("ab"):
+                self.assertTrue(pd.isna(row.organization_id))
+            else:
+                self.assertEqual(None if pd.isna(row.organization_id) else row.organization_id,
+                                 self.clean_landing_page.get_organization_id(text))
+        self.assertEqual(results_df["organization_id_name"][1],
+                         "196341-Neighbourhood Watch - Linden Park 249")
+
+    def test_process_data_should_look_up_organizations_in_cu_export_store(self):
+        """organization names are read from the indexed cu export"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "cu_export.csv")
+            self.sa_community_df.to_csv(file_path, index=False)
+            landing_page_df = pd.DataFrame({"landingPage": ["/org/196236-Daves_Angels"],
+                                            "sessions": [2]})
+
+            results_df = self.clean_landing_page.process_data(
+                landing_page_df, None, cu_export_store=CuExportStore(file_path))
+
+        self.assertEqual(results_df["organization_name_sa_community"].tolist(),
+                         ["Dave's Angels Playgroup"])
+        self.assertTrue(results_df["is_record_available_in_sacommunity_db"].all())
+
+    def test_process_data_should_return_empty_dataframe_without_organizations(self):
+        """landing pages without organization id are skipped"""
+        landing_page_df = pd.DataFrame({"landingPage": ["/search"], "sessions": [1]})
+
+        results_df = self.clean_landing_page.process_data(landing_page_df, self.sa_community_df)
+
+        self.assertEqual(len(results_df), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
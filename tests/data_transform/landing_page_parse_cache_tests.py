@@ -0,0 +1,74 @@
+"""Tests for landing page parse cache"""
+import sys
+import os
+import tempfile
+import unittest
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+import pandas as pd
+from data_transform.clean_landing_page import CleanLandingPage
+from data_transform.landing_page_parse_cache import LandingPageParseCache
+# pylint: enable=wrong-import-position
+
+SACOMMUNITY_URL = "https://sacommunity.org"
+
+
+class TestLandingPageParseCache(unittest.TestCase):
+    """Tests for landing page parse cache"""
+
+    def setUp(self) -> None:
+        self.parsed_landing_pages = []
+
+    def parse(self, landing_page: str) -> tuple:
+        """records the parsed landing pages"""
+        self.parsed_landing_pages.append(landing_page)
+        return landing_page, None, None
+
+    def test_get_or_parse_many_should_evict_least_recently_used(self):
+        """recently used landing page is kept when the cache is full"""
+        cache = LandingPageParseCache(maximum_size=2)
+        cache.get_or_parse_many(SACOMMUNITY_URL, ["/org/1-A", "/org/2-B"], self.parse)
+        cache.get_or_parse(SACOMMUNITY_URL, "/org/1-A", self.parse)
+        cache.get_or_parse(SACOMMUNITY_URL, "/org/3-C", self.parse)
+        cache.get_or_parse(SACOMMUNITY_URL, "/org/1-A", self.parse)
+
+        self.assertEqual(self.parsed_landing_pages, ["/org/1-A", "/org/2-B", "/org/3-C"])
+        self.assertEqual(cache.get_stats(),
+                         {"hits": 2, "misses": 3, "evictions": 1, "size": 2})
+
+    def test_save_should_persist_parsed_landing_pages(self):
+        """cache loaded from file does not parse again"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "cache", "landing_pages.json")
+            cache = LandingPageParseCache(file_path=file_path)
+            cache.get_or_parse(SACOMMUNITY_URL, "/org/1-A", self.parse)
+            cache.save()
+
+            cache = LandingPageParseCache(file_path=file_path)
+            parsed = cache.get_or_parse(SACOMMUNITY_URL, "/org/1-A", self.parse)
+
+        self.assertEqual(parsed, ("/org/1-A", None, None))
+        self.assertEqual(len(self.parsed_landing_pages), 1)
+        self.assertEqual(cache.get_stats()["hits"], 1)
+
+    def test_clean_landing_page_should_parse_repeated_landing_pages_once(self):
+        """per row and batch cleaning share the cache"""
+        cache = LandingPageParseCache()
+        clean_landing_page = CleanLandingPage(sacommunity_url=SACOMMUNITY_URL,
+                                              parse_cache=cache)
+        landing_pages = pd.Series(["/org/196236-Dave's_Angels_Playgroup"] * 3
+                                  + ["/org/201950-SA_Ambulance_Service"])
+
+        results_df = clean_landing_page.normalise_landing_pages(landing_pages)
+        text = clean_landing_page.clean_landing_page_text("/org/201950-SA_Ambulance_Service")
+
+        self.assertEqual(results_df["organization_id"].tolist(), [196236] * 3 + [201950])
+        self.assertEqual(text, "201950-SA Ambulance Service")
+        self.assertEqual(cache.get_stats()["misses"], 2)
+        self.assertEqual(cache.get_stats()["hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
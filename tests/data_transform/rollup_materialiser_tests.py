@@ -0,0 +1,142 @@
+"""Tests for rollup materialiser"""
+import sys
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+import pandas as pd
+from data_transform.rollup_materialiser import RollupMaterialiser
+from dtos.date_range_dto import DateRangeDto
+from helpers.enums import DataFrequency, DataModule, JobStatus, StorageFormat
+from helpers.file_helper import FileHelper
+from helpers.metadata_helper import JobConfig, MetadataHelper
+from helpers.partition_reader import PartitionReader
+# pylint: enable=wrong-import-position
+
+
+class TestRollupMaterialiser(unittest.TestCase):
+    """Tests for rollup materialiser"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file_helper = FileHelper(StorageFormat.PARQUET)
+        self.metadata_helper = MetadataHelper(
+            os.path.join(self.temp_dir.name, "settings", "metadata.json"))
+        self.partition_reader = PartitionReader(self.temp_dir.name)
+        self.materialiser = RollupMaterialiser(self.metadata_helper, self.partition_reader,
+                                               self.temp_dir.name)
+        # friday 2024-03-08 to tuesday 2024-03-12
+        for i in range(5):
+            self.extract_day(date(2024, 3, 8) + timedelta(days=i))
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def extract_day(self, day: date, status: JobStatus = JobStatus.SUCCESS):
+        """daily partition of gender module with a session per day of month"""
+        file_path = self.file_helper.get_data_path(self.temp_dir.name, "daily", "gender", day)
+        self.file_helper.save_df(pd.DataFrame({
+            "customEvent:DatasetID": ["0QK91R12", "0QK91R12"],
+            "userGender": ["male", "female"],
+            "sessions": [day.day, 1],
+            "start_date": [pd.Timestamp(day)] * 2,
+            "end_date": [pd.Timestamp(day)] * 2,
+        }), file_path)
+        self.metadata_helper.save_metadata(JobConfig(DataFrequency.DAILY, DataModule.GENDER),
+                                           day, status)
+
+    def read_rollup(self, data_frequency: DataFrequency, start_date: date) -> pd.DataFrame:
+        """rollup partitions of gender module"""
+        return self.partition_reader.read(data_frequency, DataModule.GENDER,
+                                          DateRangeDto(start_date, start_date))
+
+    def test_materialise_should_sum_sessions_of_each_period(self):
+        """weekly partitions start on monday, end_date is the last extracted day"""
+        periods = self.materialiser.materialise(DataFrequency.WEEKLY, DataModule.GENDER,
+                                                first_date=date(2024, 3, 8))
+
+        self.assertEqual([(p.start_date, p.end_date) for p in periods],
+                         [(date(2024, 3, 4), date(2024, 3, 10)),
+                          (date(2024, 3, 11), date(2024, 3, 12))])
+        weekly_df = self.read_rollup(DataFrequency.WEEKLY, date(2024, 3, 4))
+        self.assertEqual(dict(zip(weekly_df["userGender"], weekly_df["sessions"])),
+                         {"male": 8 + 9 + 10, "female": 3})
+        self.assertEqual(weekly_df["start_date"].iloc[0], pd.Timestamp(2024, 3, 4))
+
+        self.materialiser.materialise(DataFrequency.MONTHLY, DataModule.GENDER,
+                                      first_date=date(2024, 3, 8))
+        monthly_df = self.read_rollup(DataFrequency.MONTHLY, date(2024, 3, 1))
+        self.assertEqual(monthly_df["sessions"].sum(), 8 + 9 + 10 + 11 + 12 + 5)
+        self.assertEqual(monthly_df["end_date"].iloc[0], pd.Timestamp(2024, 3, 12))
+
+    def test_materialise_should_compute_only_periods_of_new_days(self):
+        """days extracted after the last rollup update the period they belong to"""
+        self.materialiser.materialise_modules([DataModule.GENDER], first_date=date(2024, 3, 8))
+        self.extract_day(date(2024, 3, 13))
+        # failed day is rolled up after it is extracted again
+        self.extract_day(date(2024, 3, 14), JobStatus.FAILED)
+
+        results = self.materialiser.materialise_modules([DataModule.GENDER],
+                                                        first_date=date(2024, 3, 8))
+
+        for data_frequency in [DataFrequency.WEEKLY, DataFrequency.MONTHLY,
+                               DataFrequency.YEARLY]:
+            periods = results[(data_frequency, DataModule.GENDER)]
+            self.assertEqual(len(periods), 1)
+            self.assertEqual(periods[0].end_date, date(2024, 3, 13))
+        weekly_df = self.read_rollup(DataFrequency.WEEKLY, date(2024, 3, 11))
+        self.assertEqual(weekly_df["sessions"].sum(), 11 + 12 + 13 + 3)
+        metadata = self.metadata_helper.load_metadata(DataFrequency.YEARLY, DataModule.GENDER)
+        self.assertEqual(metadata.last_data_extraction_date, date(2024, 3, 13))
+        self.assertEqual(metadata.job_status.get("value"), JobStatus.SUCCESS.value)
+
+    def test_materialise_should_compute_periods_of_days_extracted_again(self):
+        """a day older than the last rollup, saved again, updates the periods of the day"""
+        self.materialiser.materialise_modules([DataModule.GENDER], first_date=date(2024, 3, 8))
+        file_path = self.file_helper.get_data_path(self.temp_dir.name, "daily", "gender",
+                                                   date(2024, 3, 9))
+        self.file_helper.save_df(pd.DataFrame({
+            "customEvent:DatasetID": ["0QK91R12"],
+            "userGender": ["male"],
+            "sessions": [100],
+            "start_date": [pd.Timestamp(2024, 3, 9)],
+            "end_date": [pd.Timestamp(2024, 3, 9)],
+        }), file_path)
+
+        results = self.materialiser.materialise_modules([DataModule.GENDER],
+                                                        first_date=date(2024, 3, 8))
+
+        periods = results[(DataFrequency.WEEKLY, DataModule.GENDER)]
+        self.assertEqual([(p.start_date, p.end_date) for p in periods],
+                         [(date(2024, 3, 4), date(2024, 3, 10))])
+        # daily partitions are not kept in cache after the rollups of the data module
+        self.assertEqual(self.partition_reader.get_stats()["size"], 0)
+        weekly_df = self.read_rollup(DataFrequency.WEEKLY, date(2024, 3, 4))
+        self.assertEqual(weekly_df["sessions"].sum(), 8 + 100 + 10 + 2)
+        monthly_df = self.read_rollup(DataFrequency.MONTHLY, date(2024, 3, 1))
+        self.assertEqual(monthly_df["sessions"].sum(), 8 + 100 + 10 + 11 + 12 + 4)
+        metadata = self.metadata_helper.load_metadata(DataFrequency.WEEKLY, DataModule.GENDER)
+        self.assertEqual(metadata.last_data_extraction_date, date(2024, 3, 12))
+
+    def test_materialise_period_should_save_empty_rollup_of_days_without_sessions(self):
+        """days saved without columns, eg. before the schema of empty days, are rolled up"""
+        day = date(2024, 3, 18)
+        file_path = self.file_helper.get_data_path(self.temp_dir.name, "daily", "gender", day)
+        self.file_helper.save_df(pd.DataFrame({"start_date": [], "end_date": []}), file_path)
+
+        self.materialiser.materialise_period(DataFrequency.WEEKLY, DataModule.GENDER,
+                                             DateRangeDto(day, day + timedelta(days=6)))
+
+        weekly_df = self.read_rollup(DataFrequency.WEEKLY, day)
+        self.assertEqual(weekly_df.columns.tolist(), [
+            "customEvent:DatasetID", "userGender", "sessions", "start_date", "end_date"])
+        self.assertEqual(len(weekly_df), 0)
+        self.assertEqual(str(weekly_df["sessions"].dtype), "int64")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for google analytics client pool"""
+import sys
+import os
+import pickle
+import unittest
+from threading import Thread
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+from google_analytics_module.repositories.google_analytics_client_pool import (
+    GoogleAnalyticsClientPool,
+)
+# pylint: enable=wrong-import-position
+
+
+# pylint: disable=too-few-public-methods
+class FakeClient:
+    """client which records the credentials it is built with"""
+
+    def __init__(self, credentials=None) -> None:
+        self.credentials = credentials
+# pylint: enable=too-few-public-methods
+
+
+class TestGoogleAnalyticsClientPool(unittest.TestCase):
+    """Tests for google analytics client pool"""
+
+    def test_get_client_should_reuse_client_for_same_credentials(self):
+        """client is created once and then reused"""
+        pool = GoogleAnalyticsClientPool(client_factory=FakeClient)
+        creds = object()
+        first_client = pool.get_client(creds)
+        second_client = pool.get_client(creds)
+
+        self.assertIs(first_client, second_client)
+        stats = pool.get_stats()
+        self.assertEqual(stats["created_count"], 1)
+        self.assertEqual(stats["reused_count"], 1)
+
+    def test_get_client_should_rebuild_client_when_credentials_rotate(self):
+        """new credentials object creates a new client"""
+        pool = GoogleAnalyticsClientPool(client_factory=FakeClient)
+        first_client = pool.get_client(object())
+        new_creds = object()
+        second_client = pool.get_client(new_creds)
+
+        self.assertIsNot(first_client, second_client)
+        self.assertIs(second_client.credentials, new_creds)
+        self.assertEqual(pool.get_stats()["created_count"], 2)
+
+    def test_get_client_should_create_single_client_across_threads(self):
+        """concurrent requests share one client"""
+        pool = GoogleAnalyticsClientPool(client_factory=FakeClient)
+        creds = object()
+        clients = []
+        threads = [Thread(target=lambda: clients.append(pool.get_client(creds)))
+                   for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(c) for c in clients}), 1)
+        self.assertEqual(pool.get_stats()["created_count"], 1)
+
+    def test_pool_should_be_picklable(self):
+        """joblib workers receive the pool without the client"""
+        pool = GoogleAnalyticsClientPool(client_factory=FakeClient)
+        pool.get_client(None)
+        unpickled_pool = pickle.loads(pickle.dumps(pool))
+
+        self.assertIsNone(unpickled_pool.client)
+        self.assertIsNotNone(unpickled_pool.get_client(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""Tests for incremental extraction of google analytics data"""
+import sys
+import os
+import json
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+import pandas as pd
+from data_transform.rollup_materialiser import RollupMaterialiser
+from dtos.date_range_dto import DateRangeDto
+from google_analytics_module.services.google_analytics_extraction_service import (
+    GoogleAnalyticsExtractionService,
+)
+from google_analytics_module.services.google_analytics_service import (
+    GoogleAnalyticsService,
+)
+from helpers.enums import DataFrequency, DataModule, JobStatus
+from helpers.metadata_helper import JobConfig, MetadataHelper
+from helpers.partition_reader import PartitionReader
+from helpers.settings_helper import SettingsHelper
+# pylint: enable=wrong-import-position
+
+
+# pylint: disable=too-few-public-methods
+class FakeGoogleAnalyticsService:
+    """returns a single row per day and fails on the configured day"""
+
+    def __init__(self, failing_day: date = None, empty_day: date = None) -> None:
+        self.failing_day = failing_day
+        self.empty_day = empty_day
+        self.requested_days = []
+
+    def get_sessions_by_data_module_as_df(self, dataset_id, start_date, end_date, module):
+        """get sessions data of data module"""
+        self.requested_days.append((module, start_date, end_date, dataset_id))
+        if start_date == self.failing_day:
+            raise ValueError("quota exhausted")
+        if start_date == self.empty_day:
+            return pd.DataFrame([])
+        return pd.DataFrame([{"customEvent:DatasetID": "0QK91R12", "sessions": 5}])
+
+
+class FakeGoogleAnalyticsRepository:
+    """returns a row per value of the last dimension of each report"""
+
+    def __init__(self) -> None:
+        self.batch_requests = []
+
+    def get_batch_data(self, property_id, requests, as_data_frame=False):
+        """a dataframe for each report"""
+        del property_id, as_data_frame
+        self.batch_requests.append(requests)
+        return [
+            pd.DataFrame({
+                "customEvent:DatasetID": [filter_clause.dataset_id] * 2,
+                request_config.dimensions[-1]: ["first", "second"],
+                "sessions": [3, 4],
+            })
+            for request_config, filter_clause in requests
+        ]
+# pylint: enable=too-few-public-methods
+
+
+class TestGoogleAnalyticsExtractionService(unittest.TestCase):
+    """Tests for incremental extraction"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.metadata_helper = MetadataHelper(
+            os.path.join(self.temp_dir.name, "settings", "metadata.json"))
+        self.end_date = date(2024, 3, 10)
+        self.first_date = date(2024, 3, 8)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def get_service(self, google_analytics_service):
+        """extraction service storing data in temp directory"""
+        return GoogleAnalyticsExtractionService(google_analytics_service,
+                                                self.metadata_helper,
+                                                self.temp_dir.name)
+
+    def test_extract_module_should_extract_only_missing_days(self):
+        """second run extracts only the new day"""
+        google_analytics_service = FakeGoogleAnalyticsService()
+        service = self.get_service(google_analytics_service)
+        extracted_days = service.extract_module(DataModule.AGE, self.end_date, self.first_date)
+
+        self.assertEqual(extracted_days, [date(2024, 3, 8), date(2024, 3, 9), date(2024, 3, 10)])
+        file_path = service.get_partition_path(DataModule.AGE, date(2024, 3, 9))
+        data_df = service.file_helper.read_df(file_path)
+        self.assertEqual(data_df["start_date"].tolist(), [pd.Timestamp(2024, 3, 9)])
+        self.assertEqual(str(data_df["sessions"].dtype), "int64")
+
+        extracted_days = service.extract_module(DataModule.AGE,
+                                                self.end_date + timedelta(days=1),
+                                                self.first_date)
+        self.assertEqual(extracted_days, [date(2024, 3, 11)])
+        self.assertEqual(len(google_analytics_service.requested_days), 4)
+
+    def test_extract_module_should_resume_from_failed_day(self):
+        """failed day is recorded in metadata and retried in the next run"""
+        service = self.get_service(FakeGoogleAnalyticsService(failing_day=date(2024, 3, 9)))
+        with self.assertRaises(ValueError):
+            service.extract_module(DataModule.GENDER, self.end_date, self.first_date)
+
+        metadata = self.metadata_helper.load_metadata(DataFrequency.DAILY, DataModule.GENDER)
+        self.assertEqual(metadata.job_status.get("value"), JobStatus.FAILED.value)
+        self.assertEqual(metadata.last_data_extraction_date, date(2024, 3, 9))
+
+        service = self.get_service(FakeGoogleAnalyticsService())
+        extracted_days = service.extract_module(DataModule.GENDER, self.end_date, self.first_date)
+        self.assertEqual(extracted_days, [date(2024, 3, 9), date(2024, 3, 10)])
+
+    def test_extract_module_should_save_schema_of_day_without_sessions(self):
+        """a day without rows has the columns of data module and is rolled up"""
+        service = self.get_service(FakeGoogleAnalyticsService(empty_day=date(2024, 3, 9)))
+        service.extract_module(DataModule.AGE, self.end_date, self.first_date)
+
+        data_df = service.file_helper.read_df(
+            service.get_partition_path(DataModule.AGE, date(2024, 3, 9)))
+        self.assertEqual(data_df.columns.tolist(), [
+            "customEvent:DatasetID", "userAgeBracket", "sessions", "start_date", "end_date"])
+        self.assertEqual(len(data_df), 0)
+        self.assertEqual(str(data_df["sessions"].dtype), "int64")
+
+        partition_reader = PartitionReader(self.temp_dir.name)
+        materialiser = RollupMaterialiser(self.metadata_helper, partition_reader,
+                                          self.temp_dir.name)
+        periods = materialiser.materialise(DataFrequency.WEEKLY, DataModule.AGE,
+                                           first_date=self.first_date)
+        self.assertEqual(len(periods), 1)
+        weekly_df = partition_reader.read(DataFrequency.WEEKLY, DataModule.AGE,
+                                          DateRangeDto(date(2024, 3, 4), date(2024, 3, 4)))
+        self.assertEqual(weekly_df["sessions"].sum(), 10)
+
+    def test_extract_module_should_skip_module_locked_by_another_job(self):
+        """data module extracted by another job is not extracted twice"""
+        google_analytics_service = FakeGoogleAnalyticsService()
+        service = self.get_service(google_analytics_service)
+        with self.metadata_helper.job_lock(JobConfig(DataFrequency.DAILY, DataModule.AGE)):
+            extracted_days = service.extract_module(DataModule.AGE, self.end_date,
+                                                    self.first_date)
+
+        self.assertEqual(extracted_days, [])
+        self.assertEqual(google_analytics_service.requested_days, [])
+
+    def test_extract_dataset_breakdowns_should_save_run_file_of_each_module(self):
+        """breakdowns of dataset are requested in a single batch"""
+        settings_file_path = os.path.join(self.temp_dir.name, "app_settings.json")
+        with open(settings_file_path, "w", encoding="UTF-8") as file_obj:
+            json.dump({"GoogleAnalytics": {"ViewId_V4": "123"},
+                       "FileStorage": {"RootDir": self.temp_dir.name}}, file_obj)
+        repository = FakeGoogleAnalyticsRepository()
+        service = self.get_service(
+            GoogleAnalyticsService(repository, SettingsHelper(settings_file_path)))
+        service.file_helper.settings_helper = SettingsHelper(settings_file_path)
+
+        run_id = service.extract_dataset_breakdowns(
+            "0QK91R12", self.first_date, self.end_date, run_id="run_1")
+
+        self.assertEqual(run_id, "run_1")
+        self.assertEqual(len(repository.batch_requests), 1)
+        self.assertEqual(len(repository.batch_requests[0]), 5)
+        source_df = service.file_helper.read_run_file("run_1", DataModule.SOURCE)
+        self.assertEqual(source_df.columns.tolist(), [
+            "customEvent:DatasetID", "sessionSource", "sessions", "start_date", "end_date"])
+        self.assertEqual(str(source_df["sessionSource"].dtype), "category")
+        medium_df = service.file_helper.read_run_file("run_1", DataModule.MEDIUM)
+        self.assertEqual(medium_df["sessionMedium"].tolist(), ["first", "second"])
+        self.assertEqual(medium_df["end_date"].tolist(), [pd.Timestamp(self.end_date)] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Tests for google analytics quota limiter"""
+import sys
+import os
+import unittest
+from datetime import date
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+# pylint: disable=no-name-in-module
+from google.api_core.exceptions import ResourceExhausted
+from google.analytics.data_v1beta.types import PropertyQuota, RunReportResponse
+from dtos.date_range_dto import DateRangeDto
+from google_analytics_module.dtos.google_analytics_filter_clause_dto import (
+    GoogleAnalyticsFilterClause,
+)
+from google_analytics_module.dtos.google_analytics_request_config_dto import (
+    GoogleAnalyticsRequestConfig,
+)
+from google_analytics_module.repositories.google_analytics_client_pool import (
+    GoogleAnalyticsClientPool,
+)
+from google_analytics_module.repositories.google_analytics_quota_limiter import (
+    GoogleAnalyticsQuotaLimiter,
+)
+from google_analytics_module.repositories.google_analytics_repository_v4 import (
+    GoogleAnalyticsRepositoryV4,
+)
+# pylint: enable=wrong-import-position
+# pylint: enable=no-name-in-module
+
+
+def get_property_quota(tokens_consumed, tokens_per_hour_remaining, concurrent_remaining=9):
+    """property quota returned by google analytics"""
+    return PropertyQuota(
+        tokens_per_hour={"consumed": tokens_consumed, "remaining": tokens_per_hour_remaining},
+        tokens_per_day={"consumed": tokens_consumed, "remaining": 100000},
+        concurrent_requests={"consumed": 1, "remaining": concurrent_remaining},
+    )
+
+
+# pylint: disable=too-few-public-methods
+class FailingClient:
+    """fails with exhausted quota before returning the report"""
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.calls = 0
+
+    def run_report(self, _request):
+        """run report"""
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ResourceExhausted("Exhausted property tokens per hour")
+        return RunReportResponse(
+            dimension_headers=[{"name": "landingPage"}],
+            metric_headers=[{"name": "sessions"}],
+            rows=[{"dimension_values": [{"value": "/org/1-Org"}],
+                   "metric_values": [{"value": "4"}]}],
+            row_count=1,
+            property_quota=get_property_quota(10, 30000),
+        )
+# pylint: enable=too-few-public-methods
+
+
+class TestGoogleAnalyticsQuotaLimiter(unittest.TestCase):
+    """Tests for google analytics quota limiter"""
+
+    def test_update_from_quota_should_reduce_concurrency_when_tokens_are_low(self):
+        """remaining tokens afford only a few rounds of requests"""
+        limiter = GoogleAnalyticsQuotaLimiter(maximum_concurrent_requests=10,
+                                              requests_headroom=10)
+        limiter.update_from_quota(get_property_quota(10, 400))
+
+        metrics = limiter.get_metrics()
+        self.assertEqual(metrics["concurrent_requests_limit"], 4)
+        self.assertEqual(metrics["tokens_consumed"], 10)
+        self.assertEqual(metrics["tokens_per_hour_remaining"], 400)
+
+    def test_update_from_quota_should_increase_concurrency_when_quota_is_healthy(self):
+        """concurrency grows back by one per healthy response"""
+        limiter = GoogleAnalyticsQuotaLimiter(maximum_concurrent_requests=10)
+        limiter.record_retry({"exception": ResourceExhausted("quota"), "tries": 1})
+        self.assertEqual(limiter.get_metrics()["concurrent_requests_limit"], 5)
+
+        limiter.update_from_quota(get_property_quota(10, 40000))
+        self.assertEqual(limiter.get_metrics()["concurrent_requests_limit"], 6)
+
+    def test_update_from_quota_should_ignore_missing_quota(self):
+        """responses without quota keep the limit"""
+        limiter = GoogleAnalyticsQuotaLimiter(maximum_concurrent_requests=3)
+        limiter.update_from_quota(PropertyQuota())
+
+        self.assertEqual(limiter.get_metrics()["concurrent_requests_limit"], 3)
+        self.assertEqual(limiter.get_metrics()["tokens_consumed"], 0)
+
+    def test_repository_should_retry_exhausted_quota(self):
+        """429 errors are retried with backoff and recorded in metrics"""
+        client = FailingClient(failures=2)
+        limiter = GoogleAnalyticsQuotaLimiter(backoff_factor=0.01)
+        repository = GoogleAnalyticsRepositoryV4(
+            client_pool=GoogleAnalyticsClientPool(client_factory=lambda credentials: client),
+            quota_limiter=limiter)
+        filter_clause = GoogleAnalyticsFilterClause()
+        filter_clause.set_date_range(DateRangeDto(date(2024, 1, 1), date(2024, 1, 31)))
+
+        results = repository.get_data(
+            "123", GoogleAnalyticsRequestConfig(["landingPage"], ["sessions"]), filter_clause)
+
+        self.assertEqual(results, [{"landingPage": "/org/1-Org", "sessions": "4"}])
+        metrics = limiter.get_metrics()
+        self.assertEqual(metrics["retries"], 2)
+        self.assertEqual(metrics["resource_exhausted_errors"], 2)
+        self.assertEqual(metrics["requests"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""Tests for paginated requests of google analytics repository v4"""
+import sys
+import os
+import unittest
+from datetime import date
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+# pylint: disable=no-name-in-module
+from google.analytics.data_v1beta.types import BatchRunReportsResponse, RunReportResponse
+from dtos.date_range_dto import DateRangeDto
+from dtos.page_dto import PageDto
+from google_analytics_module.dtos.google_analytics_filter_clause_dto import (
+    GoogleAnalyticsFilterClause,
+)
+from google_analytics_module.dtos.google_analytics_request_config_dto import (
+    GoogleAnalyticsRequestConfig,
+)
+from google_analytics_module.repositories.google_analytics_client_pool import (
+    GoogleAnalyticsClientPool,
+)
+from google_analytics_module.repositories.google_analytics_repository_v4 import (
+    GoogleAnalyticsRepositoryV4,
+)
+# pylint: enable=wrong-import-position
+# pylint: enable=no-name-in-module
+
+
+# pylint: disable=too-few-public-methods
+class FakeClient:
+    """returns the landing pages of the requested offset and limit"""
+
+    def __init__(self, credentials=None, total_rows=25) -> None:
+        self.credentials = credentials
+        self.total_rows = total_rows
+        self.requests = []
+
+    def run_report(self, request):
+        """run report"""
+        self.requests.append(request)
+        end = min(request.offset + request.limit, self.total_rows)
+        return RunReportResponse(
+            dimension_headers=[{"name": "landingPage"}],
+            metric_headers=[{"name": "sessions", "type_": "TYPE_INTEGER"}],
+            rows=[
+                {
+                    "dimension_values": [{"value": f"/org/{i}-Org_{i}"}],
+                    "metric_values": [{"value": str(i)}],
+                }
+                for i in range(request.offset, end)
+            ],
+            row_count=self.total_rows,
+        )
+
+    def batch_run_reports(self, request):
+        """batch run reports"""
+        self.requests.append(request)
+        return BatchRunReportsResponse(
+            reports=[self.run_report(r) for r in request.requests]
+        )
+# pylint: enable=too-few-public-methods
+
+
+class TestGoogleAnalyticsRepositoryV4Pagination(unittest.TestCase):
+    """Tests for paginated requests"""
+
+    def setUp(self) -> None:
+        self.client = FakeClient()
+        client_pool = GoogleAnalyticsClientPool(client_factory=lambda credentials: self.client)
+        self.repository = GoogleAnalyticsRepositoryV4(client_pool=client_pool)
+        self.request_config = GoogleAnalyticsRequestConfig(["landingPage"], ["sessions"])
+        self.filter_clause = GoogleAnalyticsFilterClause()
+        self.filter_clause.set_date_range(DateRangeDto(date(2024, 1, 1), date(2024, 1, 31)))
+
+    def test_get_data_pages_should_walk_offset_until_row_count(self):
+        """every row is returned in pages of page size"""
+        self.filter_clause.set_page_dto(PageDto(10, None))
+        pages = list(self.repository.get_data_pages("123", self.request_config,
+                                                    self.filter_clause))
+
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+        self.assertEqual([r.offset for r in self.client.requests], [0, 10, 20])
+        self.assertEqual(pages[2][-1], {"landingPage": "/org/24-Org_24", "sessions": "24"})
+
+    def test_get_data_should_return_all_rows(self):
+        """get_data is not truncated to a single page"""
+        self.filter_clause.set_page_dto(PageDto(7, None))
+        results = self.repository.get_data("123", self.request_config, self.filter_clause)
+
+        self.assertEqual(len(results), 25)
+        self.assertEqual(len(self.client.requests), 4)
+
+    def test_get_data_should_use_maximum_page_size_without_page_dto(self):
+        """single request when the report fits in the maximum page"""
+        results = self.repository.get_data("123", self.request_config, self.filter_clause)
+
+        self.assertEqual(len(results), 25)
+        self.assertEqual(self.client.requests[0].limit, 250000)
+
+    def test_get_batch_data_should_send_five_reports_per_request(self):
+        """seven reports are sent in two batch requests"""
+        results = self.repository.get_batch_data(
+            "123", [(self.request_config, self.filter_clause)] * 7)
+
+        self.assertEqual(len(results), 7)
+        self.assertEqual(len(self.client.requests), 2 + 7)
+        self.assertEqual(len(self.client.requests[0].requests), 5)
+
+    def test_get_batch_data_should_fetch_remaining_pages_of_large_report(self):
+        """report larger than page size is completed with offset requests"""
+        self.filter_clause.set_page_dto(PageDto(10, None))
+        results = self.repository.get_batch_data(
+            "123", [(self.request_config, self.filter_clause)])
+
+        self.assertEqual(len(results[0]), 25)
+        self.assertEqual(results[0][-1]["landingPage"], "/org/24-Org_24")
+
+    def test_get_batch_data_should_return_data_frame_of_each_report(self):
+        """pages of large report are concatenated into a single dataframe"""
+        self.filter_clause.set_page_dto(PageDto(10, None))
+        results = self.repository.get_batch_data(
+            "123", [(self.request_config, self.filter_clause)] * 2, as_data_frame=True)
+
+        self.assertEqual([len(r) for r in results], [25, 25])
+        self.assertEqual(int(results[1]["sessions"].sum()), sum(range(25)))
+
+    def test_get_data_pages_should_yield_typed_data_frames(self):
+        """integer metrics are decoded as int64"""
+        self.filter_clause.set_page_dto(PageDto(10, None))
+        pages = list(self.repository.get_data_pages("123", self.request_config,
+                                                    self.filter_clause, as_data_frame=True))
+
+        self.assertEqual([len(p) for p in pages], [10, 10, 5])
+        self.assertEqual(str(pages[0]["sessions"].dtype), "int64")
+        self.assertEqual(pages[2]["landingPage"].tolist()[0], "/org/20-Org_20")
+
+    def test_format_response_as_df_should_decode_low_cardinality_dimensions_as_categorical(self):
+        """gender is categorical, float metrics are decoded as float64"""
+        response = RunReportResponse(
+            dimension_headers=[{"name": "userGender"}, {"name": "landingPage"}],
+            metric_headers=[{"name": "sessions", "type_": "TYPE_INTEGER"},
+                            {"name": "engagementRate", "type_": "TYPE_FLOAT"}],
+            rows=[{"dimension_values": [{"value": gender}, {"value": "/org/1-Org"}],
+                   "metric_values": [{"value": "3"}, {"value": "0.5"}]}
+                  for gender in ["male", "female", "male"]],
+        )
+
+        results_df = self.repository.format_response_as_df(response)
+
+        self.assertEqual(str(results_df["userGender"].dtype), "category")
+        self.assertEqual(results_df["engagementRate"].sum(), 1.5)
+        self.assertEqual(self.repository.format_response(response)[0],
+                         {"userGender": "male", "landingPage": "/org/1-Org",
+                          "sessions": "3", "engagementRate": "0.5"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests for google analytics response cache"""
+import sys
+import os
+import tempfile
+import time
+import unittest
+from datetime import date, datetime, timedelta
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+from dtos.date_range_dto import DateRangeDto
+from google_analytics_module.dtos.google_analytics_filter_clause_dto import (
+    GoogleAnalyticsFilterClause,
+)
+from google_analytics_module.dtos.google_analytics_request_config_dto import (
+    GoogleAnalyticsRequestConfig,
+)
+from google_analytics_module.repositories.google_analytics_response_cache import (
+    GoogleAnalyticsResponseCache,
+)
+# pylint: enable=wrong-import-position
+
+
+class TestGoogleAnalyticsResponseCache(unittest.TestCase):
+    """Tests for google analytics response cache"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.cache = GoogleAnalyticsResponseCache(cache_dir=self.temp_dir.name)
+        self.request_config = GoogleAnalyticsRequestConfig(["landingPage"], ["sessions"])
+        self.rows = [{"landingPage": "/org/1-Org", "sessions": "3"}]
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def get_filter_clause(self, start_date: date, end_date: date):
+        """filter clause for date range"""
+        filter_clause = GoogleAnalyticsFilterClause()
+        filter_clause.set_dataset_id("0QK91R12")
+        filter_clause.set_date_range(DateRangeDto(start_date, end_date))
+        return filter_clause
+
+    def test_get_key_should_ignore_order_of_organisation_ids(self):
+        """same request gives same key"""
+        first_filter = self.get_filter_clause(date(2024, 1, 1), date(2024, 1, 31))
+        first_filter.set_organisation_ids(["2", "1"])
+        second_filter = self.get_filter_clause(date(2024, 1, 1), date(2024, 1, 31))
+        second_filter.set_organisation_ids(["1", "2"])
+
+        self.assertEqual(self.cache.get_key("123", self.request_config, first_filter),
+                         self.cache.get_key("123", self.request_config, second_filter))
+        self.assertNotEqual(self.cache.get_key("123", self.request_config, first_filter),
+                            self.cache.get_key("456", self.request_config, first_filter))
+
+    def test_get_should_return_cached_rows_from_disk(self):
+        """rows are persisted between cache instances"""
+        self.cache.put("key", self.rows, date(2024, 1, 31))
+        new_cache = GoogleAnalyticsResponseCache(cache_dir=self.temp_dir.name)
+
+        self.assertEqual(new_cache.get("key"), self.rows)
+        self.assertIsNone(new_cache.get("other_key"))
+        self.assertEqual(new_cache.get_stats(), {"hits": 1, "misses": 1, "evictions": 0})
+
+    def test_get_should_expire_open_date_range_only(self):
+        """closed date ranges never expire"""
+        self.cache.time_to_live_in_seconds = 0
+        self.cache.put("closed", self.rows, date(2024, 1, 31))
+        self.cache.put("open", self.rows, date.today())
+        time.sleep(0.01)
+
+        self.assertEqual(self.cache.get("closed"), self.rows)
+        self.assertIsNone(self.cache.get("open"))
+
+    def test_is_closed_date_range_should_accept_datetime(self):
+        """end date of filter clause can be a datetime"""
+        self.assertTrue(self.cache.is_closed_date_range(datetime(2024, 1, 31, 23, 59)))
+        self.assertFalse(self.cache.is_closed_date_range(datetime.now()))
+
+        self.cache.time_to_live_in_seconds = 0
+        self.cache.put("closed", self.rows, datetime(2024, 1, 31, 12))
+        time.sleep(0.01)
+        self.assertEqual(self.cache.get("closed"), self.rows)
+
+    def test_put_should_evict_least_recently_used(self):
+        """least recently used report is evicted when maximum size is exceeded"""
+        self.cache.put("first", self.rows, date(2024, 1, 31))
+        self.cache.maximum_size_in_bytes = self.cache.index["first"]["size_in_bytes"] * 2
+        self.cache.put("second", self.rows, date(2024, 1, 31))
+        self.cache.get("first")
+        self.cache.put("third", self.rows, date.today() - timedelta(days=10))
+
+        self.assertIsNotNone(self.cache.get("first"))
+        self.assertIsNone(self.cache.get("second"))
+        self.assertIsNotNone(self.cache.get("third"))
+
+    def test_get_should_save_last_access_on_close(self):
+        """hits are not written to disk until close"""
+        self.cache.put("key", self.rows, date(2024, 1, 31))
+        saved_access_time = self.cache.read_index_file()["key"]["last_accessed_time"]
+        time.sleep(0.01)
+        self.cache.get("key")
+
+        self.assertEqual(self.cache.read_index_file()["key"]["last_accessed_time"],
+                         saved_access_time)
+        self.cache.close()
+        self.assertGreater(self.cache.read_index_file()["key"]["last_accessed_time"],
+                           saved_access_time)
+
+    def test_put_should_keep_reports_of_other_caches(self):
+        """caches of different processes merge their index"""
+        other_cache = GoogleAnalyticsResponseCache(cache_dir=self.temp_dir.name)
+        self.cache.put("first", self.rows, date(2024, 1, 31))
+        other_cache.put("second", self.rows, date(2024, 1, 31))
+        self.cache.put("third", self.rows, date(2024, 1, 31))
+
+        self.assertEqual(sorted(self.cache.read_index_file()), ["first", "second", "third"])
+        self.assertEqual(GoogleAnalyticsResponseCache(cache_dir=self.temp_dir.name)
+                         .get("second"), self.rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
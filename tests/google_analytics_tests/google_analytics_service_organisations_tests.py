@@ -0,0 +1,121 @@
+"""Tests for sessions of organisations with a fake google analytics repository"""
+import sys
+import os
+import json
+import tempfile
+import unittest
+from datetime import date
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+import pandas as pd
+from google_analytics_module.services.google_analytics_service import (
+    GoogleAnalyticsService,
+)
+from helpers.settings_helper import SettingsHelper
+# pylint: enable=wrong-import-position
+
+
+class FakeGoogleAnalyticsRepository:
+    """returns the sessions of landing pages, page_size rows per page"""
+
+    def __init__(self, landing_page_sessions: list[tuple], page_size: int = 2) -> None:
+        self.landing_page_sessions = landing_page_sessions
+        self.page_size = page_size
+        self.pages_filter_clauses = []
+        self.batches = []
+
+    def get_data_pages(self, property_id, request_config, filter_clause, as_data_frame=False):
+        """landing pages beginning with the landing page prefix, page by page"""
+        del property_id, request_config, as_data_frame
+        self.pages_filter_clauses.append(filter_clause)
+        rows = [
+            {"customEvent:DatasetID": "", "landingPage": landing_page, "sessions": str(sessions)}
+            for landing_page, sessions in self.landing_page_sessions
+            if landing_page.startswith(filter_clause.landing_page_prefix)
+        ]
+        for i in range(0, len(rows), self.page_size):
+            yield pd.DataFrame(rows[i:i + self.page_size])
+
+    def get_batch_data(self, property_id, requests, as_data_frame=False):
+        """landing pages of the organisation ids of each request"""
+        del property_id, as_data_frame
+        self.batches.append(requests)
+        return [
+            [
+                {"landingPage": landing_page, "sessions": str(sessions)}
+                for landing_page, sessions in self.landing_page_sessions
+                if any(landing_page.startswith(f"/org/{o}-")
+                       for o in filter_clause.organisation_ids)
+            ]
+            for _, filter_clause in requests
+        ]
+
+
+class TestGoogleAnalyticsServiceOrganisations(unittest.TestCase):
+    """Tests for sessions of organisations"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        settings_file_path = os.path.join(self.temp_dir.name, "app_settings.json")
+        with open(settings_file_path, "w", encoding="UTF-8") as file_obj:
+            json.dump({"GoogleAnalytics": {"ViewId_V4": "123", "PageSize": 2,
+                                           "AllOrganisationsThreshold": 2}}, file_obj)
+        self.settings_helper = SettingsHelper(settings_file_path)
+        # the same organisation has landing pages in different pages of the report
+        self.repository = FakeGoogleAnalyticsRepository([
+            ("/org/101-burnside-library", 3),
+            ("/org/202-unley-museum", 4),
+            ("/org/101-burnside-library/events", 5),
+            ("/about", 7),
+            ("/org/303-norwood-hall", 1),
+        ])
+        self.service = GoogleAnalyticsService(self.repository, self.settings_helper)
+        self.start_date = date(2024, 1, 1)
+        self.end_date = date(2024, 1, 31)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_get_sessions_of_all_organisations_should_sum_sessions_across_pages(self):
+        """sessions of organisation landing pages are summed over every page"""
+        sessions = self.service.get_sessions_of_all_organisations(
+            self.start_date, self.end_date)
+
+        self.assertEqual(sessions.to_dict(), {"101": 8, "202": 4, "303": 1})
+        filter_clause = self.repository.pages_filter_clauses[0]
+        self.assertEqual(filter_clause.landing_page_prefix, "/org/")
+        self.assertEqual(filter_clause.page_dto.page_size, 2)
+
+    def test_get_sessions_by_organisation_ids_above_threshold_should_use_all_organisations(self):
+        """more organisations than threshold are pulled from a single report"""
+        sessions = self.service.get_sessions_by_organisation_ids(
+            self.start_date, self.end_date, ["101", "202", "404"])
+
+        self.assertEqual(sessions, [
+            {"organisation_id": "101", "sessions_count": 8},
+            {"organisation_id": "202", "sessions_count": 4},
+            {"organisation_id": "404", "sessions_count": 0},
+        ])
+        self.assertEqual(len(self.repository.pages_filter_clauses), 1)
+        self.assertEqual(self.repository.batches, [])
+
+    def test_get_sessions_by_organisation_ids_within_threshold_should_filter_in_batches(self):
+        """organisations up to threshold are filtered by their ids"""
+        sessions = self.service.get_sessions_by_organisation_ids(
+            self.start_date, self.end_date, ["101", "303", "101"], n_jobs=1)
+
+        self.assertEqual(sessions, [
+            {"organisation_id": "101", "sessions_count": 8},
+            {"organisation_id": "303", "sessions_count": 1},
+            {"organisation_id": "101", "sessions_count": 8},
+        ])
+        self.assertEqual(self.repository.pages_filter_clauses, [])
+        self.assertEqual(len(self.repository.batches), 1)
+        _, filter_clause = self.repository.batches[0][0]
+        self.assertEqual(filter_clause.organisation_ids, ["101", "303"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Tests for google analytics data streamed page by page"""
+import sys
+import os
+import json
+import tempfile
+import unittest
+from datetime import date
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+import pandas as pd
+from google_analytics_module.services.google_analytics_service import (
+    GoogleAnalyticsService,
+)
+from helpers.settings_helper import SettingsHelper
+# pylint: enable=wrong-import-position
+
+
+# pylint: disable=too-few-public-methods
+class FakeGoogleAnalyticsRepository:
+    """returns rows page_size rows per page, counts the pages read by the caller"""
+
+    def __init__(self, rows_count: int) -> None:
+        self.rows = [
+            {"customEvent:DatasetID": "0QK91R12", "landingPage": f"/org/{i}-library",
+             "sessions": str(i)}
+            for i in range(rows_count)
+        ]
+        self.filter_clauses = []
+        self.pages_read = 0
+
+    def get_data_pages(self, property_id, request_config, filter_clause, as_data_frame=False):
+        """rows of the report, a dataframe per page"""
+        del property_id, request_config, as_data_frame
+        self.filter_clauses.append(filter_clause)
+        page_size = filter_clause.page_dto.page_size
+        for i in range(0, len(self.rows), page_size):
+            self.pages_read += 1
+            yield pd.DataFrame(self.rows[i:i + page_size])
+# pylint: enable=too-few-public-methods
+
+
+class TestGoogleAnalyticsServicePages(unittest.TestCase):
+    """Tests for data streamed page by page"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        settings_file_path = os.path.join(self.temp_dir.name, "app_settings.json")
+        with open(settings_file_path, "w", encoding="UTF-8") as file_obj:
+            json.dump({"GoogleAnalytics": {"ViewId_V4": "123", "PageSize": 2}}, file_obj)
+        self.repository = FakeGoogleAnalyticsRepository(5)
+        self.service = GoogleAnalyticsService(self.repository,
+                                              SettingsHelper(settings_file_path))
+        self.start_date = date(2024, 1, 1)
+        self.end_date = date(2024, 12, 31)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_get_data_in_pages_should_yield_typed_page_as_it_is_read(self):
+        """pages are requested only when the caller reads them"""
+        pages = self.service.get_data_in_pages(
+            "0QK91R12", self.start_date, self.end_date, ["landingPage"], ["sessions"])
+
+        first_page_df = next(pages)
+        self.assertEqual(self.repository.pages_read, 1)
+        self.assertEqual(first_page_df["sessions"].tolist(), [0, 1])
+        self.assertEqual(str(first_page_df["sessions"].dtype), "int64")
+        self.assertEqual(self.repository.filter_clauses[0].page_dto.page_size, 2)
+        self.assertEqual(self.repository.filter_clauses[0].dataset_id, "0QK91R12")
+
+        self.assertEqual([len(page_df) for page_df in pages], [2, 1])
+
+    def test_save_data_to_csv_should_append_every_page_with_a_single_header(self):
+        """rows of all pages are saved under one header"""
+        file_path = os.path.join(self.temp_dir.name, "exports", "landing_pages.csv")
+        rows_count = self.service.save_data_to_csv(
+            file_path, "0QK91R12", self.start_date, self.end_date,
+            ["landingPage"], ["sessions"], page_size=3)
+
+        self.assertEqual(rows_count, 5)
+        self.assertEqual(self.repository.pages_read, 2)
+        data_df = pd.read_csv(file_path)
+        self.assertEqual(data_df.columns.tolist(),
+                         ["customEvent:DatasetID", "landingPage", "sessions"])
+        self.assertEqual(data_df["sessions"].tolist(), [0, 1, 2, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
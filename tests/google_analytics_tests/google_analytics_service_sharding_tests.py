@@ -0,0 +1,88 @@
+"""Tests for google analytics requests sharded by date range"""
+import sys
+import os
+import json
+import tempfile
+import unittest
+from datetime import date
+
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+# pylint: disable=wrong-import-position
+from google.api_core.exceptions import PermissionDenied
+from google_analytics_module.services.google_analytics_service import (
+    GoogleAnalyticsService,
+)
+from helpers.enums import DataFrequency
+from helpers.settings_helper import SettingsHelper
+# pylint: enable=wrong-import-position
+
+
+# pylint: disable=too-few-public-methods
+class FakeGoogleAnalyticsRepository:
+    """returns the sessions of landing pages in each month, fails on the failing month"""
+
+    def __init__(self, failing_month: int = None) -> None:
+        self.failing_month = failing_month
+        self.requested_date_ranges = []
+
+    def get_data(self, property_id, request_config, filter_clause):
+        """rows of the month of date range"""
+        del property_id, request_config
+        date_range = filter_clause.date_range
+        self.requested_date_ranges.append((date_range.start_date, date_range.end_date))
+        if date_range.start_date.month == self.failing_month:
+            raise PermissionDenied("property is not accessible")
+        rows = [{"customEvent:DatasetID": "0QK91R12", "landingPage": "/org/101-library",
+                 "sessions": str(date_range.start_date.month)}]
+        if date_range.start_date.month == 2:
+            rows.append({"customEvent:DatasetID": "0QK91R12", "landingPage": "/about",
+                         "sessions": "7"})
+        return rows
+# pylint: enable=too-few-public-methods
+
+
+class TestGoogleAnalyticsServiceSharding(unittest.TestCase):
+    """Tests for sharded requests"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        settings_file_path = os.path.join(self.temp_dir.name, "app_settings.json")
+        with open(settings_file_path, "w", encoding="UTF-8") as file_obj:
+            json.dump({"GoogleAnalytics": {"ViewId_V4": "123"}}, file_obj)
+        self.settings_helper = SettingsHelper(settings_file_path)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_get_sessions_by_landing_page_should_sum_sessions_of_shards(self):
+        """landing page requested in every month is returned once"""
+        repository = FakeGoogleAnalyticsRepository()
+        service = GoogleAnalyticsService(repository, self.settings_helper)
+        results = service.get_sessions_by_landing_page(
+            "0QK91R12", date(2024, 1, 15), date(2024, 3, 10),
+            shard_frequency=DataFrequency.MONTHLY)
+
+        self.assertEqual(len(repository.requested_date_ranges), 3)
+        self.assertEqual(results, [
+            {"customEvent:DatasetID": "0QK91R12", "landingPage": "/org/101-library",
+             "sessions": "6"},
+            {"customEvent:DatasetID": "0QK91R12", "landingPage": "/about", "sessions": "7"},
+        ])
+
+    def test_get_data_sharded_should_not_retry_failed_shard(self):
+        """errors other than exhausted quota fail the request without retrying"""
+        repository = FakeGoogleAnalyticsRepository(failing_month=2)
+        service = GoogleAnalyticsService(repository, self.settings_helper)
+        with self.assertRaises(PermissionDenied):
+            service.get_data_sharded("0QK91R12", date(2024, 1, 1), date(2024, 3, 31),
+                                     ["landingPage"], ["sessions"], n_jobs=1)
+
+        self.assertEqual(repository.requested_date_ranges, [
+            (date(2024, 1, 1), date(2024, 1, 31)),
+            (date(2024, 2, 1), date(2024, 2, 29)),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
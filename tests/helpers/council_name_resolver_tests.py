@@ -0,0 +1,55 @@
+"""Tests for council name resolver"""
+import sys
+import os
+import unittest
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+#pylint: disable=wrong-import-position
+from helpers.council_name_resolver import CouncilNameResolver
+#pylint: enable=wrong-import-position
+
+COUNCIL_NAMES = [
+    "City of Burnside",
+    "Adelaide Hills Council",
+    "City of Adelaide",
+    "District Council of Mount Barker",
+    "Corporation of the Town of Walkerville",
+]
+
+
+class TestCouncilNameResolver(unittest.TestCase):
+    """Tests for council name resolver"""
+
+    def setUp(self) -> None:
+        self.resolver = CouncilNameResolver([
+            {"dataset_id": f"0QK91R{i}", "council_name": name}
+            for i, name in enumerate(COUNCIL_NAMES)
+        ])
+
+    def test_normalise_council_name_should_remove_council_words(self):
+        """City of, Council and punctuation are removed"""
+        self.assertEqual(self.resolver.normalise_council_name("City of Burnside"), "burnside")
+        self.assertEqual(self.resolver.normalise_council_name("Adelaide Hills Council."),
+                         "adelaide hills")
+        self.assertEqual(self.resolver.normalise_council_name("City Council"), "city council")
+
+    def test_resolve_should_rank_exact_name_first(self):
+        """capitalised name matches, exact name is ranked before similar names"""
+        self.assertEqual(self.resolver.resolve("Burnside")[0]["dataset_id"], "0QK91R0")
+
+        matches = self.resolver.resolve("Adelaide")
+        self.assertEqual([m["council_name"] for m in matches],
+                         ["City of Adelaide", "Adelaide Hills Council"])
+        self.assertEqual(matches[0]["score"], 1.0)
+
+    def test_resolve_many_should_match_misspelled_names(self):
+        """similar names are matched, unknown names return no match"""
+        results = self.resolver.resolve_many(["Walkervile", "Mount Barker", "Unknown"])
+
+        self.assertEqual(results["Walkervile"][0]["dataset_id"], "0QK91R4")
+        self.assertEqual(results["Mount Barker"][0]["dataset_id"], "0QK91R3")
+        self.assertEqual(results["Unknown"], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
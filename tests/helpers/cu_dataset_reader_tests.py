@@ -0,0 +1,168 @@
+"""Tests for cu dataset reader"""
+import sys
+import os
+import tempfile
+import unittest
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+#pylint: disable=wrong-import-position
+from PyPDF2 import PageObject, PdfWriter
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+from helpers.cu_dataset_reader import CuDatasetReader
+#pylint: enable=wrong-import-position
+
+PAGE_HEADER = "https://sacommunity.org/admin/settings/datasets"
+
+
+def write_pdf(file_path: str, pages_lines: list[list[str]]):
+    """pdf with a line of text per item"""
+    font = DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+        NameObject("/Encoding"): NameObject("/WinAnsiEncoding"),
+    })
+    writer = PdfWriter()
+    for lines in pages_lines:
+        page = PageObject.create_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+        contents = DecodedStreamObject()
+        text = " ".join(f"({line}) Tj 0 -14 Td" for line in lines)
+        contents.set_data(f"BT /F1 12 Tf 72 700 Td {text} ET".encode())
+        page[NameObject("/Contents")] = contents
+        writer.add_page(page)
+    with open(file_path, "wb") as file_obj:
+        writer.write(file_obj)
+
+
+class CountingCuDatasetReader(CuDatasetReader):
+    """counts the parses and hashes of dataset pdf"""
+
+    def __init__(self, file_path) -> None:
+        super().__init__(file_path)
+        self.parse_count = 0
+        self.hash_count = 0
+
+    def get_file_hash(self) -> str:
+        """sha256 of pdf"""
+        self.hash_count += 1
+        return super().get_file_hash()
+
+    def read_cu_dataset_settings_pdf(self, return_dataframe=False, n_jobs=None):
+        """datasets of pdf"""
+        self.parse_count += 1
+        return [{"dataset_id": "0QK91R12", "council_name": "City of Burnside"},
+                {"dataset_id": "0QK91R13", "council_name": "City of Holdfast Bay"}]
+
+
+class TestCuDatasetReader(unittest.TestCase):
+    """Tests for cu dataset reader"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file_path = os.path.join(self.temp_dir.name, "cu_dataset.pdf")
+        with open(self.file_path, "wb") as file_obj:
+            file_obj.write(b"%PDF-1.4 datasets")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_search_dataset_ids_from_council_names_should_parse_pdf_once(self):
+        """many councils are searched with a single parse"""
+        reader = CountingCuDatasetReader(self.file_path)
+        results = reader.search_dataset_ids_from_council_names(["Burnside", "holdfast", "Unley"])
+
+        self.assertEqual(results["Burnside"]["dataset_id"], "0QK91R12")
+        self.assertEqual(results["holdfast"]["dataset_id"], "0QK91R13")
+        self.assertIsNone(results["Unley"])
+        self.assertEqual(reader.search_dataset_id_from_council_name("BURNSIDE")["dataset_id"],
+                         "0QK91R12")
+        self.assertEqual(
+            reader.resolve_council_names(["Holdfast Bay"])["Holdfast Bay"][0]["dataset_id"],
+            "0QK91R13")
+        self.assertEqual(reader.parse_count, 1)
+
+    def test_get_council_name_index_should_be_built_once_per_datasets(self):
+        """index is kept on the reader until the pdf changes"""
+        reader = CountingCuDatasetReader(self.file_path)
+        council_name_index = reader.get_council_name_index()
+        reader.search_dataset_ids_from_council_names(["Burnside"])
+        self.assertIs(reader.get_council_name_index(), council_name_index)
+
+        with open(self.file_path, "ab") as file_obj:
+            file_obj.write(b" new council")
+        self.assertIsNot(reader.get_council_name_index(), council_name_index)
+        self.assertEqual(reader.search_dataset_id_from_council_name("Holdfast")["dataset_id"],
+                         "0QK91R13")
+
+    def test_get_council_name_resolver_should_be_built_once_per_datasets(self):
+        """resolver is kept on the reader until the pdf changes"""
+        reader = CountingCuDatasetReader(self.file_path)
+        resolver = reader.get_council_name_resolver()
+        reader.resolve_council_names(["Burnside"])
+        self.assertIs(reader.get_council_name_resolver(), resolver)
+
+        with open(self.file_path, "ab") as file_obj:
+            file_obj.write(b" new council")
+        self.assertIsNot(reader.get_council_name_resolver(), resolver)
+        self.assertEqual(reader.parse_count, 2)
+
+    def test_get_datasets_should_read_json_cache_until_pdf_changes(self):
+        """datasets are cached on disk across processes"""
+        CountingCuDatasetReader(self.file_path).get_datasets()
+        # a new process has an empty memory cache
+        CuDatasetReader._datasets_cache.clear()  # pylint: disable=protected-access
+        reader = CountingCuDatasetReader(self.file_path)
+        reader.get_datasets()
+        self.assertEqual(reader.parse_count, 0)
+
+        with open(self.file_path, "ab") as file_obj:
+            file_obj.write(b" new council")
+        reader.get_datasets()
+        self.assertEqual(reader.parse_count, 1)
+
+    def test_get_datasets_should_hash_touched_pdf_once(self):
+        """modified time of pdf touched without changing is kept in memory cache"""
+        reader = CountingCuDatasetReader(self.file_path)
+        reader.get_datasets()
+        hash_count = reader.hash_count
+        file_stat = os.stat(self.file_path)
+        os.utime(self.file_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns + 10 ** 9))
+
+        reader.get_datasets()
+        reader.get_datasets()
+        self.assertEqual(reader.hash_count, hash_count + 1)
+        self.assertEqual(reader.parse_count, 1)
+
+    def test_get_datasets_should_parse_pdf_when_json_cache_is_corrupt(self):
+        """corrupt json cache is a cache miss and is written again"""
+        reader = CountingCuDatasetReader(self.file_path)
+        with open(reader.cache_file_path, "w", encoding="UTF-8") as file_obj:
+            file_obj.write('{"fingerprint": {"size"')
+
+        self.assertEqual(len(reader.get_datasets()), 2)
+        self.assertEqual(reader.parse_count, 1)
+        self.assertEqual(len(reader.read_cache_file()[1]), 2)
+
+    def test_read_cu_dataset_settings_pdf_should_merge_pages_extracted_in_parallel(self):
+        """rows are in page order and page numbers are removed from every page"""
+        total_pages = 4
+        write_pdf(self.file_path, [
+            [f"{PAGE_HEADER} {page}/{total_pages}",
+             f"0QK91R{page} City of Council {page} {page}/{total_pages} support@sacommu"]
+            for page in range(1, total_pages + 1)
+        ])
+        reader = CuDatasetReader(self.file_path, n_jobs=2, minimum_pages_per_job=1)
+
+        datasets = reader.read_cu_dataset_settings_pdf()
+
+        self.assertEqual(datasets, reader.read_cu_dataset_settings_pdf(n_jobs=1))
+        self.assertEqual(datasets, [
+            {"dataset_id": f"0QK91R{page}", "council_name": f"City of Council {page}"}
+            for page in range(1, total_pages + 1)
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Tests for cu export store"""
+import sys
+import os
+import tempfile
+import unittest
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+#pylint: disable=wrong-import-position
+from helpers.cu_export_store import CuExportStore
+#pylint: enable=wrong-import-position
+
+CU_EXPORT_CSV = """ID_19,Org_name,Street_Address_Line_1,Suburb,Organisati_Council
+196236,Dave's Angels Playgroup,1 Main Road,Burnside,City of Burnside
+201830,Aged Rights Advocacy Service Inc.,,Glenunga,City of Burnside
+196236,Duplicate,2 Main Road,Kensington,City of Norwood
+,Missing id,,,
+"""
+
+
+class TestCuExportStore(unittest.TestCase):
+    """Tests for cu export store"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file_path = os.path.join(self.temp_dir.name, "cu_export.csv")
+        with open(self.file_path, "w", encoding="UTF-8") as file_obj:
+            file_obj.write(CU_EXPORT_CSV)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_get_organisation_should_return_first_row_of_id(self):
+        """organisations are looked up by ID_19"""
+        store = CuExportStore(self.file_path)
+
+        self.assertEqual(store.get_organisation(196236)["Org_name"], "Dave's Angels Playgroup")
+        self.assertIsNone(store.get_organisation(1))
+        self.assertEqual(str(store.get_data_frame()["ID_19"].dtype), "Int64")
+        self.assertEqual(len(store.get_organisations([196236, 201830, 1])), 2)
+
+    def test_get_organisations_by_council_should_ignore_case(self):
+        """council and suburb indexes"""
+        store = CuExportStore(self.file_path)
+
+        self.assertEqual(store.get_organisations_by_council(" city of burnside")["ID_19"].tolist(),
+                         [196236, 201830])
+        self.assertEqual(store.get_organisations_by_suburb("Kensington")["Org_name"].tolist(),
+                         ["Duplicate"])
+        self.assertEqual(len(store.get_organisations_by_suburb("Unknown")), 0)
+
+    def test_load_should_read_parquet_cache_until_csv_changes(self):
+        """csv is converted to parquet on first load"""
+        CuExportStore(self.file_path).load()
+        cache_file_path = os.path.join(self.temp_dir.name, "cu_export.parquet")
+        self.assertTrue(os.path.exists(cache_file_path))
+
+        store = CuExportStore(self.file_path)
+        self.assertTrue(store.is_cache_valid())
+        self.assertEqual(len(store.get_data_frame()), 4)
+
+        os.utime(self.file_path, (os.path.getmtime(cache_file_path) + 10,) * 2)
+        self.assertFalse(CuExportStore(self.file_path).is_cache_valid())
+
+    def test_shared_store_should_reload_changed_csv(self):
+        """shared dataframes are copies, a changed csv is loaded again"""
+        store = CuExportStore.shared(self.file_path)
+        cu_export_df = store.get_data_frame()
+        cu_export_df.loc[0, "Org_name"] = "Changed"
+        self.assertEqual(store.get_organisation(196236)["Org_name"], "Dave's Angels Playgroup")
+
+        with open(self.file_path, "a", encoding="UTF-8") as file_obj:
+            file_obj.write("1,New Organisation,1 Main Rd,Unley,City of Unley\n")
+        os.utime(self.file_path, (os.path.getmtime(self.file_path) + 10,) * 2)
+
+        self.assertIs(CuExportStore.shared(self.file_path), store)
+        self.assertEqual(store.get_organisation(1)["Org_name"], "New Organisation")
+
+
+if __name__ == '__main__':
+    unittest.main()
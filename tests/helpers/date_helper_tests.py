@@ -6,7 +6,9 @@ from datetime import date, datetime
 # insert current path to system path, so that we can import python file
 sys.path.insert(1, os.getcwd())
 #pylint: disable=wrong-import-position
+from dtos.date_range_dto import DateRangeDto
 from helpers.date_helper import DateHelper
+from helpers.enums import DataFrequency
 #pylint: enable=wrong-import-position
 
 class TestDateHelper(unittest.TestCase):
@@ -51,5 +53,30 @@ class TestDateHelper(unittest.TestCase):
         self.assertEqual(datetime_obj.minute, 53)
         self.assertEqual(datetime_obj.second, 20)
 
+    def test_split_date_range_by_month_should_clip_first_and_last_month(self):
+        """Months are clipped to the date range"""
+        date_ranges = self.date_helper.split_date_range(
+            DateRangeDto(date(2023, 12, 20), date(2024, 3, 5)), DataFrequency.MONTHLY)
+        self.assertEqual([(d.start_date, d.end_date) for d in date_ranges],
+                         [(date(2023, 12, 20), date(2023, 12, 31)),
+                          (date(2024, 1, 1), date(2024, 1, 31)),
+                          (date(2024, 2, 1), date(2024, 2, 29)),
+                          (date(2024, 3, 1), date(2024, 3, 5))])
+
+    def test_split_date_range_by_week_should_start_weeks_on_monday(self):
+        """Weeks run from monday to sunday"""
+        date_ranges = self.date_helper.split_date_range(
+            DateRangeDto(date(2024, 2, 28), date(2024, 3, 11)), DataFrequency.WEEKLY)
+        self.assertEqual([(d.start_date, d.end_date) for d in date_ranges],
+                         [(date(2024, 2, 28), date(2024, 3, 3)),
+                          (date(2024, 3, 4), date(2024, 3, 10)),
+                          (date(2024, 3, 11), date(2024, 3, 11))])
+
+    def test_split_date_range_should_throw_error_for_invalid_range(self):
+        """Start date after end date is invalid"""
+        self.assertRaises(ValueError, self.date_helper.split_date_range,
+                          DateRangeDto(date(2024, 3, 1), date(2024, 2, 1)),
+                          DataFrequency.MONTHLY)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,97 @@
+"""Tests for file helper"""
+import sys
+import os
+import json
+import tempfile
+import unittest
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+#pylint: disable=wrong-import-position
+import pandas as pd
+from helpers.enums import DataModule, StorageFormat
+from helpers.file_helper import FileHelper
+from helpers.settings_helper import SettingsHelper
+#pylint: enable=wrong-import-position
+
+
+class TestFileHelper(unittest.TestCase):
+    """Tests for file helper"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        settings_file_path = os.path.join(self.temp_dir.name, "app_settings.json")
+        with open(settings_file_path, "w", encoding="UTF-8") as file_obj:
+            json.dump({"FileStorage": {"RootDir": self.temp_dir.name}}, file_obj)
+        self.file_helper = FileHelper(StorageFormat.PARQUET)
+        self.file_helper.settings_helper = SettingsHelper(settings_file_path)
+        self.age_df = pd.DataFrame({
+            "customEvent:DatasetID": ["0QK91R12", "0QK91R12", "0QK91R13"],
+            "userAgeBracket": ["18-24", "25-34", "18-24"],
+            "sessions": ["5", "7", "11"],
+            "start_date": ["2024-03-08"] * 3,
+            "end_date": ["2024-03-08"] * 3,
+        })
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_save_run_file_should_keep_data_types_of_data_module(self):
+        """run files are parquet with the schema of data module"""
+        file_path = self.file_helper.save_run_file(self.age_df, "run_1", DataModule.AGE)
+
+        self.assertTrue(file_path.endswith(os.path.join("run_1", "age.parquet")))
+        age_df = self.file_helper.read_run_file("run_1", DataModule.AGE)
+        self.assertEqual(str(age_df["sessions"].dtype), "int64")
+        self.assertEqual(str(age_df["userAgeBracket"].dtype), "category")
+        self.assertEqual(str(age_df["start_date"].dtype), "datetime64[ns]")
+
+    def test_read_df_should_project_columns_and_filter_rows_in_every_format(self):
+        """columns and filters return the same rows for parquet, feather and csv"""
+        filters = [("sessions", ">", 5), ("customEvent:DatasetID", "in", ["0QK91R13"])]
+        for storage_format in StorageFormat:
+            file_path = os.path.join(self.temp_dir.name,
+                                     f"age{self.file_helper.get_extension(storage_format)}")
+            self.file_helper.save_df(self.age_df.astype({"sessions": "int64"}), file_path)
+
+            data_df = self.file_helper.read_df(file_path, columns=["userAgeBracket"],
+                                               filters=filters)
+
+            self.assertEqual(data_df.columns.tolist(), ["userAgeBracket"], storage_format)
+            self.assertEqual(data_df["userAgeBracket"].tolist(), ["18-24"], storage_format)
+
+    def test_read_run_file_should_read_csv_run_files(self):
+        """run files exported to csv are read with the schema of data module"""
+        self.file_helper.save_run_file_to_csv(self.age_df, "run_1", DataModule.AGE)
+
+        age_df = self.file_helper.read_run_file("run_1", DataModule.AGE,
+                                                filters=[("sessions", ">=", 7)])
+        self.assertEqual(age_df["sessions"].tolist(), [7, 11])
+        self.assertEqual(str(age_df["end_date"].dtype), "datetime64[ns]")
+
+    def test_read_run_file_should_read_last_saved_storage_format(self):
+        """csv exported after the parquet run file is read instead of the parquet"""
+        parquet_file_path = self.file_helper.save_run_file(self.age_df, "run_1", DataModule.AGE)
+        os.utime(parquet_file_path, ns=(1, 1))
+        self.file_helper.save_run_file_to_csv(self.age_df.head(1), "run_1", DataModule.AGE)
+
+        self.assertEqual(len(self.file_helper.read_run_file("run_1", DataModule.AGE)), 1)
+        self.assertEqual(FileHelper().get_extension(), ".csv")
+
+    def test_save_run_file_should_keep_empty_values_of_landing_page_cleaned(self):
+        """organisations without id or sessions are saved with nullable types"""
+        landing_page_cleaned_df = pd.DataFrame({
+            "org_id": [196236, None],
+            "sessions_count": [3, None],
+            "is_record_available_in_sacommunity_db": [True, None],
+            "sessions": [3, None],
+        })
+        self.file_helper.save_run_file(landing_page_cleaned_df, "run_1",
+                                       DataModule.LANDING_PAGE_CLEANED)
+
+        data_df = self.file_helper.read_run_file("run_1", DataModule.LANDING_PAGE_CLEANED)
+        self.assertEqual(str(data_df["org_id"].dtype), "Int64")
+        self.assertTrue(pd.isna(data_df["sessions"][1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
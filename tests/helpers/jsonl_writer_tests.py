@@ -0,0 +1,85 @@
+"""Tests for jsonl writer"""
+import sys
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+#pylint: disable=wrong-import-position
+from helpers.enums import FsyncPolicy
+from helpers.file_helper import FileHelper
+from helpers.jsonl_writer import JsonlWriter
+from helpers.resume_index import ResumeIndex
+#pylint: enable=wrong-import-position
+
+
+class TestJsonlWriter(unittest.TestCase):
+    """Tests for jsonl writer"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file_path = os.path.join(self.temp_dir.name, "output", "councils.jsonl")
+        self.file_helper = FileHelper()
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_write_should_buffer_records_until_maximum_buffered_records(self):
+        """records are written in batches and on close"""
+        writer = JsonlWriter(self.file_path, maximum_buffered_records=3,
+                             flush_interval_in_seconds=3600)
+        writer.write({"org_id": 1, "council": "City of Burnside"})
+        writer.write({"org_id": 2, "council": "Café Council"})
+        self.assertFalse(os.path.exists(self.file_path))
+
+        writer.write({"org_id": 3, "council": None})
+        writer.write({"org_id": 4, "council": ""})
+        self.assertEqual(len(self.file_helper.read_jsonlines_all(self.file_path)), 3)
+
+        writer.close()
+        records = self.file_helper.read_jsonlines_all(self.file_path)
+        self.assertEqual([r["org_id"] for r in records], [1, 2, 3, 4])
+        self.assertEqual(records[1]["council"], "Café Council")
+
+    def test_write_should_not_interleave_records_of_threads(self):
+        """every line is a whole record when threads share the writer"""
+        with JsonlWriter(self.file_path, maximum_buffered_records=7,
+                         fsync_policy=FsyncPolicy.ON_FLUSH) as writer:
+            with ThreadPoolExecutor(8) as executor:
+                list(executor.map(lambda i: writer.write({"org_id": i, "text": "x" * i}),
+                                  range(500)))
+
+        records = self.file_helper.read_jsonlines_all(self.file_path)
+        self.assertEqual(sorted(r["org_id"] for r in records), list(range(500)))
+
+        # appended by the next run
+        with JsonlWriter(self.file_path) as writer:
+            writer.write({"org_id": 500})
+        self.assertEqual(len(self.file_helper.read_jsonlines_all(self.file_path)), 501)
+
+    def test_open_should_end_partial_line_of_interrupted_run(self):
+        """records appended after a crash are not glued to the partially written line"""
+        with JsonlWriter(self.file_path) as writer:
+            writer.write({"org_id": 1})
+        with open(self.file_path, "a", encoding="UTF-8") as file_obj:
+            file_obj.write('{"org_id": 2, "coun')
+
+        with JsonlWriter(self.file_path) as writer:
+            writer.write({"org_id": 3})
+            writer.write({"org_id": 4})
+
+        with open(self.file_path, encoding="UTF-8") as file_obj:
+            lines = file_obj.read().splitlines()
+        self.assertEqual(lines, ['{"org_id": 1}', '{"org_id": 2, "coun',
+                                 '{"org_id": 3}', '{"org_id": 4}'])
+        self.assertEqual(ResumeIndex.from_jsonl(self.file_path).ids, {1, 3, 4})
+
+        # a file ending with a whole line is appended as is
+        with JsonlWriter(self.file_path) as writer:
+            writer.write({"org_id": 5})
+        self.assertEqual(ResumeIndex.from_jsonl(self.file_path).ids, {1, 3, 4, 5})
+
+
+if __name__ == '__main__':
+    unittest.main()
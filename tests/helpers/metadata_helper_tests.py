@@ -1,8 +1,10 @@
 """Tests methods for string helper methods"""
 import sys
 import os
+import json
+import time
 import unittest
-from datetime import datetime
+from datetime import date, datetime
 # insert current path to system path, so that we can import python file
 sys.path.insert(1, os.getcwd())
 # disable wrong import position,
@@ -65,6 +67,77 @@ class TestMetadataHelper(unittest.TestCase):
         all_metadata = self.metadata_helper.load_all_metadata()
         self.assertEqual(len(all_metadata), 1)
 
+    def test_save_metadata_should_add_job_runs_history(self):
+        """every saved status is kept in job runs, latest first"""
+        job_config = JobConfig(DataFrequency.DAILY, DataModule.GENDER)
+        self.metadata_helper.save_metadata(job_config, date(2024, 3, 8), JobStatus.IN_PROGRESS)
+        self.metadata_helper.save_metadata(job_config, date(2024, 3, 8), JobStatus.FAILED,
+                                           failure_reason="quota exhausted")
+
+        job_runs = self.metadata_helper.get_job_runs(job_config)
+        self.assertEqual([r["job_status"]["value"] for r in job_runs],
+                         [JobStatus.FAILED.value, JobStatus.IN_PROGRESS.value])
+        self.assertEqual(job_runs[0]["failure_reason"], "quota exhausted")
+        self.assertEqual(len(self.metadata_helper.get_job_runs(job_config, limit=1)), 1)
+
+    def test_load_metadata_should_import_legacy_json_file(self):
+        """metadata of metadata.json is imported into the database"""
+        legacy_metadata = self.metadata_helper.new_metadata(
+            DataFrequency.DAILY, DataModule.LANDING_PAGE, date(2024, 1, 31), JobStatus.SUCCESS)
+        self.file_helper.create_directory_excluding_filename(self.metadata_helper.file_path)
+        with open(self.metadata_helper.file_path, 'w', encoding='UTF-8') as file_obj:
+            json.dump([legacy_metadata], file_obj)
+
+        metadata = self.metadata_helper.load_metadata(DataFrequency.DAILY,
+                                                      DataModule.LANDING_PAGE)
+        self.assertEqual(metadata.last_data_extraction_date, date(2024, 1, 31))
+        self.assertEqual(metadata.job_status.get('value'), JobStatus.SUCCESS.value)
+
+    def test_job_lock_should_be_held_by_one_job(self):
+        """second job can not lock the same (data_frequency, module) until it is released"""
+        job_config = JobConfig(DataFrequency.DAILY, DataModule.AGE)
+        with self.metadata_helper.job_lock(job_config) as is_locked:
+            self.assertTrue(is_locked)
+            self.assertIsNone(MetadataHelper("./tmp/metadata.json").acquire_job_lock(job_config))
+            self.assertIsNotNone(self.metadata_helper.acquire_job_lock(
+                JobConfig(DataFrequency.DAILY, DataModule.GENDER)))
+
+        self.assertIsNotNone(self.metadata_helper.acquire_job_lock(job_config))
+
+    def test_acquire_job_lock_should_take_over_expired_lock(self):
+        """locks of crashed jobs expire after the lease"""
+        job_config = JobConfig(DataFrequency.DAILY, DataModule.AGE)
+        self.assertIsNotNone(self.metadata_helper.acquire_job_lock(job_config,
+                                                                   lease_in_seconds=-1))
+        self.assertIsNotNone(self.metadata_helper.acquire_job_lock(job_config))
+
+    def get_job_lock_expiry_time(self, job_config: JobConfig) -> float:
+        """expiry time of job lock in database"""
+        with self.metadata_helper.connect() as connection:
+            return connection.execute(
+                "SELECT expiry_time FROM job_locks WHERE data_frequency = ? AND module = ?",
+                (job_config.data_frequency.value, job_config.data_module.value)
+            ).fetchone()["expiry_time"]
+
+    def test_save_metadata_should_renew_lease_of_held_job_lock(self):
+        """lease of the job lock is extended every time the job saves its metadata"""
+        job_config = JobConfig(DataFrequency.DAILY, DataModule.AGE)
+        self.metadata_helper.acquire_job_lock(job_config, lease_in_seconds=60)
+        expiry_time = self.get_job_lock_expiry_time(job_config)
+        time.sleep(0.01)
+        self.metadata_helper.save_metadata(job_config, date(2024, 1, 1), JobStatus.IN_PROGRESS)
+
+        self.assertGreater(self.get_job_lock_expiry_time(job_config), expiry_time)
+
+    def test_save_metadata_should_fail_when_job_lock_was_taken_over(self):
+        """job whose lease expired does not overwrite the metadata of the new lock owner"""
+        job_config = JobConfig(DataFrequency.DAILY, DataModule.AGE)
+        self.metadata_helper.acquire_job_lock(job_config, lease_in_seconds=-1)
+        self.assertIsNotNone(MetadataHelper("./tmp/metadata.json").acquire_job_lock(job_config))
+
+        with self.assertRaises(RuntimeError):
+            self.metadata_helper.save_metadata(job_config, date(2024, 1, 2), JobStatus.SUCCESS)
+        self.assertEqual(self.metadata_helper.get_job_runs(job_config), [])
 
 if __name__ == '__main__':
     unittest.main()
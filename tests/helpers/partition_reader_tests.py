@@ -0,0 +1,88 @@
+"""Tests for partition reader"""
+import sys
+import os
+import tempfile
+import unittest
+from datetime import date, timedelta
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+#pylint: disable=wrong-import-position
+import pandas as pd
+from dtos.date_range_dto import DateRangeDto
+from helpers.enums import DataFrequency, DataModule, StorageFormat
+from helpers.file_helper import FileHelper
+from helpers.partition_reader import PartitionReader
+#pylint: enable=wrong-import-position
+
+
+class TestPartitionReader(unittest.TestCase):
+    """Tests for partition reader"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file_helper = FileHelper(StorageFormat.PARQUET)
+        self.reader = PartitionReader(self.temp_dir.name, self.file_helper)
+        for i in range(5):
+            self.save_day(date(2024, 3, 8) + timedelta(days=i), sessions=i + 1)
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def save_day(self, day: date, sessions: int, storage_format: StorageFormat = None):
+        """daily partition of gender module"""
+        file_path = self.file_helper.get_data_path(self.temp_dir.name, "daily", "gender", day,
+                                                   storage_format)
+        self.file_helper.save_df(pd.DataFrame({
+            "customEvent:DatasetID": ["0QK91R12", "0QK91R13"],
+            "userGender": ["male", "female"],
+            "sessions": [sessions, sessions * 10],
+            "start_date": [pd.Timestamp(day)] * 2,
+            "end_date": [pd.Timestamp(day)] * 2,
+        }), file_path)
+
+    def test_read_should_return_typed_rows_of_date_range(self):
+        """only the partitions of the date range are read"""
+        gender_df = self.reader.read(DataFrequency.DAILY, DataModule.GENDER,
+                                     DateRangeDto(date(2024, 3, 9), date(2024, 3, 10)),
+                                     columns=["userGender", "sessions", "start_date"],
+                                     filters=[("customEvent:DatasetID", "==", "0QK91R12")])
+
+        self.assertEqual(gender_df["sessions"].tolist(), [2, 3])
+        self.assertEqual(gender_df.columns.tolist(), ["userGender", "sessions", "start_date"])
+        self.assertEqual(str(gender_df["userGender"].dtype), "category")
+        self.assertEqual(len(self.reader.get_partition_paths(
+            DataFrequency.DAILY, DataModule.GENDER,
+            DateRangeDto(date(2024, 3, 1), date(2024, 3, 31)))), 5)
+
+    def test_read_should_cache_partitions_until_they_change(self):
+        """partitions read again only when the file is saved again"""
+        date_range = DateRangeDto(date(2024, 3, 8), date(2024, 3, 12))
+        self.reader.read(DataFrequency.DAILY, DataModule.GENDER, date_range)
+        self.reader.read(DataFrequency.DAILY, DataModule.GENDER, date_range)
+        self.assertEqual(self.reader.get_stats()["hits"], 5)
+
+        self.save_day(date(2024, 3, 12), sessions=100)
+        file_path = self.reader.get_partition_path(DataFrequency.DAILY, DataModule.GENDER,
+                                                   date(2024, 3, 12))
+        os.utime(file_path, ns=(1, 1))
+        gender_df = self.reader.read(DataFrequency.DAILY, DataModule.GENDER, date_range)
+        self.assertEqual(gender_df["sessions"].sum(), (1 + 2 + 3 + 4 + 100) * 11)
+        self.assertEqual(self.reader.get_stats()["misses"], 6)
+
+    def test_read_should_read_csv_partitions_and_empty_ranges(self):
+        """partitions saved as csv are read with the data types of the data module"""
+        self.save_day(date(2024, 3, 1), sessions=7, storage_format=StorageFormat.CSV)
+
+        gender_df = self.reader.read(DataFrequency.DAILY, DataModule.GENDER,
+                                     DateRangeDto(date(2024, 3, 1), date(2024, 3, 8)))
+        self.assertEqual(gender_df["sessions"].tolist(), [7, 70, 1, 10])
+        self.assertEqual(str(gender_df["start_date"].dtype), "datetime64[ns]")
+
+        empty_df = self.reader.read(DataFrequency.DAILY, DataModule.GENDER,
+                                    DateRangeDto(date(2023, 1, 1), date(2023, 1, 2)))
+        self.assertEqual(len(empty_df), 0)
+        self.assertIn("userGender", empty_df.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
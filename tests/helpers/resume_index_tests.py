@@ -0,0 +1,47 @@
+"""Tests for resume index"""
+import sys
+import os
+import tempfile
+import unittest
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+#pylint: disable=wrong-import-position
+from helpers.jsonl_writer import JsonlWriter
+from helpers.resume_index import ResumeIndex
+#pylint: enable=wrong-import-position
+
+
+class TestResumeIndex(unittest.TestCase):
+    """Tests for resume index"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file_path = os.path.join(self.temp_dir.name, "councils.jsonl")
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def test_from_jsonl_should_index_ids_of_written_records(self):
+        """ids of the output are indexed, a partially written last line is skipped"""
+        with JsonlWriter(self.file_path) as writer:
+            for org_id in [196236, 201830]:
+                writer.write({"org_id": org_id, "council": "City of Burnside"})
+        with open(self.file_path, "a", encoding="UTF-8") as file_obj:
+            file_obj.write('{"org_id": 2019')
+
+        resume_index = ResumeIndex.from_jsonl(self.file_path)
+
+        self.assertEqual(len(resume_index), 2)
+        self.assertIn(196236, resume_index)
+        self.assertNotIn(2019, resume_index)
+        resume_index.add(2019)
+        self.assertIn(2019, resume_index)
+
+    def test_from_jsonl_should_return_empty_index_without_output(self):
+        """first run has no output file"""
+        self.assertEqual(len(ResumeIndex.from_jsonl(self.file_path)), 0)
+        self.assertEqual(len(ResumeIndex.from_jsonl("")), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
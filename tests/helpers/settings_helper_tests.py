@@ -0,0 +1,72 @@
+"""Tests for settings helper"""
+import sys
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+#pylint: disable=wrong-import-position
+from helpers.settings_helper import SettingsHelper
+#pylint: enable=wrong-import-position
+
+
+class TestSettingsHelper(unittest.TestCase):
+    """Tests for settings helper"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.file_path = os.path.join(self.temp_dir.name, "app_settings.json")
+        self.write_settings(500, modified_time=1000)
+        SettingsHelper.clear_cache()
+
+    def tearDown(self) -> None:
+        SettingsHelper.clear_cache()
+        self.temp_dir.cleanup()
+
+    def write_settings(self, page_size, modified_time):
+        """settings file with page size"""
+        with open(self.file_path, "w", encoding="UTF-8") as file_obj:
+            json.dump({"GoogleAnalytics": {"PageSize": page_size, "ViewId_V4": "123"},
+                       "SACommunityUrl": "https://sacommunity.org"}, file_obj)
+        os.utime(self.file_path, (modified_time, modified_time))
+
+    def test_get_settings_should_reload_when_file_changes(self):
+        """settings are parsed once until modified time of file changes"""
+        settings_helper = SettingsHelper(self.file_path, recheck_interval_in_seconds=0)
+        self.assertEqual(settings_helper.get_google_analytics_page_size(), 500)
+
+        # same modified time, the parsed settings are used
+        self.write_settings(1000, modified_time=1000)
+        self.assertEqual(settings_helper.get_google_analytics_page_size(), 500)
+        self.assertIs(settings_helper.get_settings(),
+                      SettingsHelper(self.file_path).get_settings())
+
+        self.write_settings(1000, modified_time=2000)
+        self.assertEqual(settings_helper.get_google_analytics_page_size(), 1000)
+
+    def test_get_settings_should_not_check_file_within_interval(self):
+        """modified time is checked once per recheck interval"""
+        settings_helper = SettingsHelper(self.file_path, recheck_interval_in_seconds=3600)
+        settings_helper.get_settings()
+        self.write_settings(1000, modified_time=2000)
+
+        self.assertEqual(settings_helper.get_google_analytics_page_size(), 500)
+
+    def test_get_settings_should_apply_environment_overrides(self):
+        """APP_SETTINGS__ environment variables override module keys and modules"""
+        environment = {"APP_SETTINGS__GoogleAnalytics__PageSize": "250",
+                       "APP_SETTINGS__SACommunityUrl": "https://test.sacommunity.org"}
+        with mock.patch.dict(os.environ, environment):
+            settings_helper = SettingsHelper(self.file_path, recheck_interval_in_seconds=0)
+            self.assertEqual(settings_helper.get_google_analytics_page_size(), 250)
+            self.assertEqual(settings_helper.get_google_analytics_view_id_v4(), "123")
+            self.assertEqual(settings_helper.get_settings()["SACommunityUrl"],
+                             "https://test.sacommunity.org")
+
+        self.assertEqual(settings_helper.get_google_analytics_page_size(), 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""Tests for address council cache"""
+import sys
+import os
+import tempfile
+import unittest
+# insert current path to system path, so that we can import python file
+sys.path.insert(1, os.getcwd())
+#pylint: disable=wrong-import-position
+from helpers.jsonl_writer import JsonlWriter
+from helpers.resume_index import ResumeIndex
+from scraping.address_council_cache import AddressCouncilCache
+from scraping.council_name_scraping_service import CouncilNameScrapingService
+#pylint: enable=wrong-import-position
+
+COUNCIL_TEXT = "Council Name City of Burnside\nElectoral Ward Beaumont"
+
+
+# pylint: disable=too-few-public-methods
+class FakeWebScraping:
+    """returns the text of the lookup app, counts the launched browsers"""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.requests_count = 0
+
+    def get_data_from_url(self, _request):
+        """text of results panel"""
+        self.requests_count += 1
+        return self.text
+# pylint: enable=too-few-public-methods
+
+
+class TestAddressCouncilCache(unittest.TestCase):
+    """Tests for address council cache"""
+
+    def setUp(self) -> None:
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.cache = AddressCouncilCache(os.path.join(self.temp_dir.name, "councils.db"))
+
+    def tearDown(self) -> None:
+        self.temp_dir.cleanup()
+
+    def get_service(self, text: str) -> CouncilNameScrapingService:
+        """scraping service with fake browser"""
+        service = CouncilNameScrapingService(self.cache)
+        service.web_scraping = FakeWebScraping(text)
+        return service
+
+    def test_normalise_address_should_abbreviate_street_types(self):
+        """case, punctuation, whitespace and street types do not change the key"""
+        self.assertEqual(self.cache.normalise_address("130 L'Estrange  Street, Glenunga"),
+                         "130 l estrange st glenunga")
+        self.assertEqual(self.cache.normalise_address("1 Main Road Burnside"),
+                         self.cache.normalise_address("1 MAIN RD., burnside"))
+
+    def test_find_council_by_address_should_launch_browser_once_per_address(self):
+        """the council of an address found before is read from the cache"""
+        service = self.get_service(COUNCIL_TEXT)
+        service.find_council_by_address("1 Main Road, Burnside")
+        response = service.find_council_by_address("1 main rd burnside")
+
+        self.assertEqual(service.web_scraping.requests_count, 1)
+        self.assertEqual(response.council_name, "City of Burnside")
+        self.assertEqual(response.electoral_ward, "Beaumont")
+        self.assertEqual(response.address, "1 main rd burnside")
+        # persisted for the next run
+        self.assertIsNotNone(AddressCouncilCache(self.cache.file_path).get("1 Main Rd Burnside"))
+
+    def test_put_should_expire_no_results_and_skip_failed_responses(self):
+        """no results are cached with their own time to live, empty texts are not cached"""
+        self.get_service("No results found.").find_council_by_address("1 Unknown Road")
+        self.assertIsNotNone(self.cache.get("1 Unknown Road"))
+        self.cache.no_results_time_to_live_in_seconds = -1
+        self.assertIsNone(self.cache.get("1 Unknown Road"))
+
+        service = self.get_service("")
+        service.find_council_by_address("2 Main Road")
+        service.find_council_by_address("2 Main Road")
+        self.assertEqual(service.web_scraping.requests_count, 2)
+
+    def test_retry_failed_scraping_of_council_name_should_bypass_cache(self):
+        """an address cached without results is scraped again and its council cached"""
+        self.get_service("No results found.").find_council_by_address("1 Main Road, Burnside")
+        service = self.get_service(COUNCIL_TEXT)
+        output_record = {"org_id": 1, "address": "1 Main Road, Burnside",
+                         "council": "City of Burnside", "has_error": False,
+                         "scraped_text": "No results found."}
+        output_file_path = os.path.join(self.temp_dir.name, "councils.jsonl")
+        with JsonlWriter(output_file_path) as output_writer:
+            service.retry_failed_scraping_of_council_name(
+                output_record, output_writer, ResumeIndex(), 0, 1)
+
+        self.assertEqual(service.web_scraping.requests_count, 1)
+        self.assertEqual(output_record["council_scraped"], "City of Burnside")
+        self.assertTrue(output_record["is_council_correct"])
+        self.assertEqual(self.cache.get("1 main rd burnside").council_name, "City of Burnside")
+
+
+if __name__ == '__main__':
+    unittest.main()